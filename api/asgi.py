@@ -0,0 +1,146 @@
+"""
+ASGI entry point for the API.
+
+Serves the same Flask blueprints as api/main.py behind uvicorn's event loop:
+
+- Flask requests run on a bounded pool of ASGI_THREADS worker threads
+  (a2wsgi), so SQLite, Stripe and bcrypt waits tie up one worker thread
+  each while the loop keeps accepting. Response bodies go through a
+  bounded send queue, so a slow client holds back its own stream instead
+  of being buffered in memory (the CSV and NDJSON exports stay flat).
+- /api/notifications/realtime is a native async route. An open stream is a
+  coroutine waiting on pubsub, not a worker thread, so hundreds of
+  subscribers can stay connected without starving other requests.
+- /api/login is a native async route too. The bcrypt check runs on the
+  password pool (models/passwords.py) and the route awaits it, so a login
+  holds no thread while bcrypt works.
+- Emails and pushes are sent by the outbox dispatcher thread (models/outbox.py),
+  never from a request.
+
+Ordinary requests still run at most ASGI_THREADS at a time; a burst beyond
+that waits in line for a free thread rather than failing.
+
+    uvicorn api.asgi:app --host 0.0.0.0 --port 8000
+    python -m api.asgi
+
+Keep POS_API_POOL_SIZE (api/db.py) near ASGI_THREADS so threads rarely open a
+connection outside the pool.
+"""
+import asyncio
+import os
+
+from a2wsgi import WSGIMiddleware
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from flask_jwt_extended import create_access_token, decode_token
+
+from api import pubsub
+from api.db import query_one
+from api.main import app as flask_app
+from api.routes.notifications import KEEPALIVE_SECONDS, RECONNECT_MILLISECONDS
+from models import passwords
+
+ASGI_THREADS = int(os.getenv("POS_ASGI_THREADS", "32"))
+
+# Response chunks queued per request before the worker thread waits for the client.
+SEND_QUEUE_SIZE = 10
+
+app = FastAPI(title="PyFiles2 API", docs_url=None, redoc_url=None, openapi_url=None)
+
+
+@app.get("/api/health")
+async def health():
+    """Answered on the event loop itself, so it stays fast however busy the workers are."""
+    return {"status": "ok"}
+
+
+def customer_from_token(request):
+    """The customer id in the request's bearer token, checked like @jwt_required() does."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Missing Authorization Header")
+    try:
+        with flask_app.app_context():
+            claims = decode_token(token)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+    return claims[flask_app.config.get("JWT_IDENTITY_CLAIM", "sub")]["id"]
+
+
+@app.get("/api/notifications/realtime")
+async def realtime_notifications(request: Request):
+    """Async twin of the Flask route in api/routes/notifications.py, same events and framing."""
+    customer_id = customer_from_token(request)
+    subscriber = pubsub.subscribe_async(customer_id)
+
+    async def event_stream():
+        try:
+            yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+            while True:
+                try:
+                    event = await subscriber.get(KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield event.encode()
+        finally:
+            pubsub.unsubscribe(customer_id, subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+def _login_row(employee_name):
+    with flask_app.app_context():
+        return query_one(
+            'SELECT employee_id, password_hash FROM Employees WHERE employee_name = ?',
+            (employee_name,)
+        )
+
+
+@app.post("/api/login")
+async def login(request: Request):
+    """
+    Async twin of the Flask route in api/routes/auth.py, same request and token.
+
+    The employee lookup runs on the loop's default executor and the bcrypt
+    check on the password pool; this coroutine awaits both, so no worker
+    thread waits on bcrypt. A full pool answers 503 at once instead of queueing.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'employee_name' not in data or 'password' not in data:
+        raise HTTPException(status_code=400, detail="Employee name and password are required")
+
+    employee = await asyncio.to_thread(_login_row, data['employee_name'].strip().lower())
+    if not employee:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    try:
+        check = passwords.submit_check(data['password'], employee['password_hash'], wait=0)
+    except passwords.PasswordPoolBusy as e:
+        return JSONResponse({'error': str(e)}, status_code=503, headers={'Retry-After': '1'})
+    if not await asyncio.wrap_future(check):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    with flask_app.app_context():
+        access_token = create_access_token(identity=str(employee['employee_id']))
+    return {'access_token': access_token}
+
+
+# Everything else goes to the Flask app, unchanged
+app.mount("/", WSGIMiddleware(flask_app, workers=ASGI_THREADS, send_queue_size=SEND_QUEUE_SIZE))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.getenv("POS_API_HOST", "127.0.0.1"),
+        port=int(os.getenv("POS_API_PORT", "8000")),
+    )
@@ -0,0 +1,83 @@
+"""
+Conditional GET for read-mostly routes.
+
+Triggers keep a version counter per customer (and per employee, and for the
+whole ticket and customer collections) in resource_versions; see migration 7.
+A route decorated with @conditional(...) turns the counters it depends on into
+an ETag and Last-Modified before running the view, and answers 304 straight
+away when the client already has that version, without querying or
+serializing anything else.
+
+    @customers_bp.route('/api/customers/<int:customer_id>/tickets', methods=['GET'])
+    @conditional(lambda customer_id: [('customer', customer_id)])
+    def get_customer_tickets(customer_id): ...
+
+Put it below @jwt_required() so the identity is available to the key function.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from api.db import query_one
+
+# Forces clients to revalidate every time; the 304 makes that cheap.
+CACHE_CONTROL = 'private, no-cache'
+
+
+def resource_validators(keys):
+    """Return (etag, last_modified) for the current request and the given (scope, owner_id) keys."""
+    parts = [request.full_path]
+    last_modified = None
+    for scope, owner_id in keys:
+        row = query_one(
+            'SELECT version, updated_at FROM resource_versions WHERE scope = ? AND owner_id = ?',
+            (scope, int(owner_id))
+        )
+        parts.append(f'{scope}:{owner_id}:{row["version"] if row else 0}')
+        if row:
+            changed = datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            last_modified = max(last_modified, changed) if last_modified else changed
+
+    etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:24]
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins when both are sent (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def conditional(keys):
+    """
+    Decorate a GET view with ETag/Last-Modified handling.
+
+    `keys` is called with the view's URL arguments and returns the
+    (scope, owner_id) counters the response depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = resource_validators(keys(**kwargs))
+            if _not_modified(etag, last_modified):
+                return _set_validators(current_app.response_class(status=304), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
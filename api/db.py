@@ -0,0 +1,84 @@
+"""
+Request-scoped database access for the API.
+
+Each request borrows one connection from a small per-process pool the first
+time it calls get_db(), and teardown hands it back, so an abort() halfway
+through a route can no longer leak it. Pooled connections live for the life
+of the process, which keeps their pragmas applied once and their prepared
+statement caches warm.
+
+Routes use the helpers below instead of opening connections themselves:
+
+    customer = query_one('SELECT * FROM customers WHERE id = ?', (customer_id,))
+    execute('UPDATE customers SET notes = ? WHERE id = ?', (notes, customer_id))
+    commit()
+"""
+import os
+import queue
+
+from flask import g
+
+from api.models import DB_PATH
+from models.database import open_connection
+
+# Idle connections kept per process; busier moments open extras that are closed when returned.
+POOL_SIZE = int(os.getenv("POS_API_POOL_SIZE", "8"))
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+
+def _acquire():
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return open_connection(DB_PATH, check_same_thread=False)
+
+
+def _release(conn):
+    # Whatever the route did not commit is thrown away, never carried into the next request
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def get_db():
+    """Return this request's connection, borrowing one from the pool on first use."""
+    if 'db' not in g:
+        g.db = _acquire()
+    return g.db
+
+
+def close_db(exception=None):
+    """Return this request's connection to the pool. Registered as a teardown by init_app()."""
+    conn = g.pop('db', None)
+    if conn is not None:
+        _release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
+
+
+def query_all(sql, params=()):
+    return get_db().execute(sql, params).fetchall()
+
+
+def query_one(sql, params=()):
+    return get_db().execute(sql, params).fetchone()
+
+
+def query_iter(sql, params=()):
+    """Run a read and return the cursor, for streaming rows without fetching them all."""
+    return get_db().execute(sql, params)
+
+
+def execute(sql, params=()):
+    """Run a write and return the cursor (for lastrowid/rowcount). Call commit() when done."""
+    return get_db().execute(sql, params)
+
+
+def commit():
+    get_db().commit()
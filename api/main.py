@@ -24,6 +24,10 @@ from api.routes.messages import messages_bp
 from api.routes.credit_cards import credit_cards_bp
 from api.routes.reports import reports_bp
 from api.routes.settings import settings_bp
+from api.routes.changes import changes_bp
+from api import db
+from models.migrations import run_migrations
+from models import outbox
 
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = '9f823c4a8d8f45e292e8a6bdfb6721e5c4e9bb78db61471e24ef99bce12b3c45'  # Replace with a secure key
@@ -31,6 +35,7 @@ CORS(app, resources={r"/*": {"origins": "https://your-app-domain.com"}})
 
 CORS(app)
 jwt = JWTManager(app)
+db.init_app(app)
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(customers_bp)
@@ -42,6 +47,14 @@ app.register_blueprint(messages_bp)
 app.register_blueprint(credit_cards_bp)
 app.register_blueprint(reports_bp)
 app.register_blueprint(settings_bp)
+app.register_blueprint(changes_bp)
+
+# Bring the database schema up to date before serving requests
+run_migrations()
+
+# Emails and pushes queued by the routes are sent from this background thread
+outbox.start_dispatcher()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server only; production runs the ASGI app (see api/asgi.py)
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
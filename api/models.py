@@ -1,9 +1,15 @@
-import sqlite3
 import os
 
+from models.database import open_connection
+
+DB_PATH = os.getenv("POS_DB_PATH") or os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/pos_system.db'))
+
+
 def get_db_connection():
-    db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../models/pos_system.db'))
-    conn = sqlite3.connect(db_path, timeout=30.0)  # Adding a timeout to handle locking issues
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL;")  # Enable Write-Ahead Logging for better concurrency
-    return conn
\ No newline at end of file
+    """
+    Open a standalone connection for code that runs outside an API request.
+
+    Routes should use api.db.get_db() (or its query helpers) instead, which
+    reuse a pooled connection and return it when the request ends.
+    """
+    return open_connection(DB_PATH)
@@ -0,0 +1,219 @@
+import base64
+import json
+import threading
+import time
+
+from flask import abort
+
+# Rows per page when the client does not ask, and the most it may ask for.
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# count=estimate stops counting here and reports the total as a lower bound.
+ESTIMATE_CAP = 1000
+
+# count=cached reuses an exact count for the same filters for this long, and
+# keeps at most this many filter combinations.
+COUNT_CACHE_SECONDS = 30
+COUNT_CACHE_MAX_ENTRIES = 256
+
+COUNT_MODES = ("exact", "estimate", "cached", "none")
+
+# A full COUNT(*) on every page is what keyset pagination is meant to avoid,
+# so clients have to ask for an exact count.
+DEFAULT_COUNT_MODE = "estimate"
+
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def encode_cursor(sort_value, row_id, order):
+    """Opaque token pointing just past the row (sort_value, row_id)."""
+    payload = json.dumps([sort_value, row_id, order], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (sort_value, row_id, order) from a cursor, or abort with 400."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, row_id, order = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(row_id, int) or order not in ("asc", "desc"):
+            raise ValueError(token)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+    return sort_value, row_id, order
+
+
+def get_page_args(args, default_order='desc'):
+    """
+    Read per_page, cursor, order, count and the legacy page parameter.
+
+    Returns a dict; bad values abort with 400 like the rest of the API.
+    """
+    try:
+        per_page = int(args.get('per_page', DEFAULT_PAGE_SIZE))
+        page = int(args['page']) if 'page' in args else None
+    except ValueError:
+        abort(400, description="'page' and 'per_page' must be integers")
+
+    count = args.get('count', DEFAULT_COUNT_MODE)
+    if count not in COUNT_MODES:
+        abort(400, description=f"'count' must be one of: {', '.join(COUNT_MODES)}")
+
+    cursor = args.get('cursor')
+    if cursor:
+        after = decode_cursor(cursor)
+        order = after[2]
+    else:
+        after = None
+        order = args.get('order', default_order)
+        if order not in ("asc", "desc"):
+            abort(400, description="'order' must be 'asc' or 'desc'")
+
+    return {
+        'per_page': min(max(1, per_page), MAX_PAGE_SIZE),
+        'page': max(1, page) if page is not None else None,
+        'after': after,
+        'order': order,
+        'count': count,
+    }
+
+
+def count_rows(conn, table, where, params, mode):
+    """
+    Count the rows matching `where` according to `mode`.
+
+    Returns (total, exact): exact is False when the count was capped at
+    ESTIMATE_CAP, and total is None for mode 'none'.
+    """
+    if mode == 'none':
+        return None, False
+
+    if mode == 'estimate':
+        total = conn.execute(
+            f'SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE {where} LIMIT ?)',
+            [*params, ESTIMATE_CAP + 1],
+        ).fetchone()[0]
+        if total > ESTIMATE_CAP:
+            return ESTIMATE_CAP, False
+        return total, True
+
+    key = (table, where, tuple(params))
+    if mode == 'cached':
+        with _count_lock:
+            cached = _count_cache.get(key)
+        if cached and time.monotonic() - cached[1] < COUNT_CACHE_SECONDS:
+            return cached[0], True
+
+    total = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', params).fetchone()[0]
+    with _count_lock:
+        _store_count(key, total)
+    return total, True
+
+
+def _store_count(key, total):
+    """Cache a count, dropping expired entries and then the oldest ones past the cap. Hold _count_lock."""
+    now = time.monotonic()
+    _count_cache.pop(key, None)
+    _count_cache[key] = (total, now)
+    if len(_count_cache) <= COUNT_CACHE_MAX_ENTRIES:
+        return
+    for stale in [k for k, (_, stored_at) in _count_cache.items() if now - stored_at >= COUNT_CACHE_SECONDS]:
+        del _count_cache[stale]
+    # Entries are kept in the order they were stored, oldest first
+    while len(_count_cache) > COUNT_CACHE_MAX_ENTRIES:
+        del _count_cache[next(iter(_count_cache))]
+
+
+def keyset_page(conn, table, where, params, page_args, columns='*', sort_column='date_created'):
+    """
+    Fetch one page of `table` ordered by (sort_column, id).
+
+    Pages are found by seeking past the cursor's (sort value, id), so every
+    page costs the same no matter how deep it is. Rows whose sort value is
+    NULL sort first ascending and last descending, as sqlite orders them.
+    `page` without a cursor is still accepted for old clients and falls back
+    to OFFSET.
+
+    Returns (rows, pagination metadata).
+    """
+    per_page = page_args['per_page']
+    order = page_args['order']
+    direction = 'DESC' if order == 'desc' else 'ASC'
+    comparison = '<' if order == 'desc' else '>'
+    by_id = sort_column == 'id'
+
+    query = f'SELECT {columns} FROM {table} WHERE {where}'
+    query_params = list(params)
+    if page_args['after']:
+        sort_value, row_id, _ = page_args['after']
+        if by_id:
+            query += f' AND id {comparison} ?'
+            query_params.append(row_id)
+        elif sort_value is None:
+            # Inside the NULLs: the rest of them, then (ascending) every non-NULL row
+            query += f' AND (({sort_column} IS NULL AND id {comparison} ?)'
+            query += f' OR {sort_column} IS NOT NULL)' if order == 'asc' else ')'
+            query_params.append(row_id)
+        else:
+            # A NULL never compares, so descending pages reach the NULLs explicitly
+            query += f' AND (({sort_column}, id) {comparison} (?, ?)'
+            query += f' OR {sort_column} IS NULL)' if order == 'desc' else ')'
+            query_params.extend([sort_value, row_id])
+    if by_id:
+        query += f' ORDER BY id {direction} LIMIT ?'
+    else:
+        query += f' ORDER BY {sort_column} {direction}, id {direction} LIMIT ?'
+    # One extra row tells us whether there is a next page without counting
+    query_params.append(per_page + 1)
+    if page_args['page'] and not page_args['after']:
+        query += ' OFFSET ?'
+        query_params.append((page_args['page'] - 1) * per_page)
+
+    rows = conn.execute(query, query_params).fetchall()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(None if by_id else last[sort_column], last['id'], order)
+
+    total, exact = count_rows(conn, table, where, params, page_args['count'])
+    pagination = {
+        'per_page': per_page,
+        'order': order,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'total_items': total,
+        'total_is_exact': exact,
+    }
+    if page_args['page'] and not page_args['after']:
+        pagination['current_page'] = page_args['page']
+    if total is not None and exact:
+        pagination['total_pages'] = (total + per_page - 1) // per_page
+    return rows, pagination
+
+
+def ticket_filters(args, customer_id=None):
+    """WHERE clause and params for the ticket list filters shared by the ticket endpoints."""
+    clauses = ['1=1']
+    params = []
+    customer_id = customer_id if customer_id is not None else args.get('customer_id')
+    if customer_id:
+        clauses.append('customer_id = ?')
+        params.append(customer_id)
+    if args.get('start_date'):
+        clauses.append('date_created >= ?')
+        params.append(args['start_date'])
+    if args.get('end_date'):
+        clauses.append('date_created <= ?')
+        params.append(args['end_date'])
+    if args.get('status'):
+        clauses.append('delivery_status = ?')
+        params.append(args['status'])
+    if args.get('type'):
+        clauses.append('ticket_type_id = ?')
+        params.append(args['type'])
+    return ' AND '.join(clauses), params
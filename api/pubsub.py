@@ -0,0 +1,118 @@
+"""
+In-process publish/subscribe for the push channel.
+
+Routes publish an event for a customer after committing the change behind it,
+and each open /api/notifications/realtime stream holds one bounded queue for
+its customer. Publishing never blocks: a client that stops reading and lets
+its queue fill up just misses events, and catches up through /api/changes
+when it reconnects.
+
+Only subscribers in the same process are reached, so run the API as a single
+process (for example one uvicorn worker, see api/asgi.py) when relying on push.
+Under ASGI the stream is a coroutine waiting on an AsyncSubscriber, so an
+idle client costs no thread.
+"""
+import asyncio
+import itertools
+import json
+import queue
+import threading
+
+# Events buffered per open stream before new ones are dropped for it.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_lock = threading.Lock()
+_subscribers = {}
+_event_ids = itertools.count(1)
+
+
+class Event:
+    __slots__ = ("id", "name", "data")
+
+    def __init__(self, name, data):
+        self.id = next(_event_ids)
+        self.name = name
+        self.data = data
+
+    def encode(self):
+        """Serialize as one server-sent event."""
+        return f"id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class AsyncSubscriber:
+    """
+    A subscriber read from an asyncio event loop.
+
+    publish() runs on request and worker threads, so events are handed to the
+    loop with call_soon_threadsafe; like queue.Queue it raises queue.Full once
+    SUBSCRIBER_QUEUE_SIZE events are waiting.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        # Events handed to the loop but not read yet, including ones still in flight
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def put_nowait(self, event):
+        with self._pending_lock:
+            if self._pending >= SUBSCRIBER_QUEUE_SIZE:
+                raise queue.Full
+            self._pending += 1
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            # The loop has closed; the stream is gone
+            with self._pending_lock:
+                self._pending -= 1
+            raise queue.Full
+
+    async def get(self, timeout):
+        """Wait up to `timeout` seconds for the next event; raises asyncio.TimeoutError."""
+        event = await asyncio.wait_for(self._queue.get(), timeout)
+        with self._pending_lock:
+            self._pending -= 1
+        return event
+
+
+def _add(customer_id, subscriber):
+    with _lock:
+        _subscribers.setdefault(int(customer_id), set()).add(subscriber)
+    return subscriber
+
+
+def subscribe(customer_id):
+    """Open a queue receiving every event published for the customer."""
+    return _add(customer_id, queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+
+
+def subscribe_async(customer_id):
+    """Like subscribe(), for a coroutine on the running event loop."""
+    return _add(customer_id, AsyncSubscriber(asyncio.get_running_loop()))
+
+
+def unsubscribe(customer_id, subscriber):
+    with _lock:
+        subscribers = _subscribers.get(int(customer_id))
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del _subscribers[int(customer_id)]
+
+
+def publish(customer_id, name, data):
+    """Send an event to the customer's open streams. Returns how many received it."""
+    if customer_id is None:
+        return 0
+    event = Event(name, data)
+    with _lock:
+        subscribers = list(_subscribers.get(int(customer_id), ()))
+    delivered = 0
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(event)
+            delivered += 1
+        except queue.Full:
+            pass
+    return delivered
@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import get_db, query_one, execute, commit
+from api.conditional import conditional
+from models import passwords, permissions
 import sqlite3
-from views.utils import hash_password, check_password
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -28,24 +29,22 @@ def register():
     display_name = data['display_name'].strip()
 
     # Hash the password
-    password_hash = hash_password(password)
-
-    # Database connection
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
+        password_hash = passwords.submit_hash(password).result()
+    except passwords.PasswordPoolBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
 
+    try:
         # Check if the employee already exists
-        cursor.execute('SELECT 1 FROM Employees WHERE employee_name = ?', (employee_name,))
-        if cursor.fetchone():
+        if query_one('SELECT 1 FROM Employees WHERE employee_name = ?', (employee_name,)):
             abort(400, description="Employee name already exists")
 
         # Insert employee
-        cursor.execute(
+        execute(
             'INSERT INTO Employees (employee_name, password_hash, display_name) VALUES (?, ?, ?)',
             (employee_name, password_hash, display_name)
         )
-        conn.commit()
+        commit()
 
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
@@ -53,8 +52,6 @@ def register():
         abort(400, description=f"Database integrity error: {str(e)}")
     except Exception as e:
         abort(500, description=f"Database error: {str(e)}")
-    finally:
-        conn.close()
 
     return jsonify({'message': 'Employee registered successfully'}), 201
 
@@ -71,44 +68,46 @@ def login():
     password = data['password']
 
     try:
-        conn = get_db_connection()
         # Fetch employee record
-        employee = conn.execute(
+        employee = query_one(
             'SELECT employee_id, password_hash FROM Employees WHERE employee_name = ?',
             (employee_name,)
-        ).fetchone()
-        conn.close()
-
-        if employee:
-            # Compare the plain text password with the stored hash
-            if check_password(password, employee['password_hash']):
-                # Create a token with employee_id as a string
-                access_token = create_access_token(identity=str(employee['employee_id']))
-                return jsonify({'access_token': access_token}), 200
-            else:
-                abort(401, description="Invalid credentials")
-        else:
-            abort(401, description="Invalid credentials")
-
+        )
     except Exception as e:
         print(f"Login error: {e}")  # Log error details for debugging
         abort(500, description=f"Internal Server Error: {str(e)}")
 
+    if not employee:
+        abort(401, description="Invalid credentials")
+
+    # bcrypt runs on the shared password pool; this thread just waits for the answer.
+    # Under api/asgi.py the async twin of this route awaits it instead.
+    try:
+        valid = passwords.submit_check(password, employee['password_hash']).result()
+    except passwords.PasswordPoolBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+
+    if not valid:
+        abort(401, description="Invalid credentials")
+
+    # Create a token with employee_id as a string
+    access_token = create_access_token(identity=str(employee['employee_id']))
+    return jsonify({'access_token': access_token}), 200
+
 # Get account details
 @auth_bp.route('/api/account', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [('employee', get_jwt_identity())])
 def get_account():
     # Decode JWT identity
     user_id = get_jwt_identity()  # Ensure this returns the employee_id as a string
 
     try:
-        conn = get_db_connection()
         # Fetch employee account using the decoded user_id
-        account = conn.execute(
+        account = query_one(
             'SELECT * FROM Employees WHERE employee_id = ?',
             (user_id,)
-        ).fetchone()
-        conn.close()
+        )
 
         if account:
             # Return account details as JSON
@@ -135,13 +134,15 @@ def update_account():
         if field not in data:
             abort(400, description=f"Missing required field: {field}")
 
-    try:
-        # If password is provided, hash it
-        if 'password' in data and data['password']:
-            data['password_hash'] = hash_password(data['password'])
+    # If password is provided, hash it
+    if 'password' in data and data['password']:
+        try:
+            data['password_hash'] = passwords.submit_hash(data['password']).result()
+        except passwords.PasswordPoolBusy as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
 
-        conn = get_db_connection()
-        conn.execute(
+    try:
+        execute(
             '''
             UPDATE Employees 
             SET 
@@ -161,8 +162,7 @@ def update_account():
                 user_id,
             )
         )
-        conn.commit()
-        conn.close()
+        commit()
 
         return jsonify({'message': 'Account updated successfully'}), 200
     except sqlite3.IntegrityError as e:
@@ -175,60 +175,8 @@ def update_account():
 
 
 def has_permission(employee_id, permission_name):
-    conn = get_db_connection()
-
-    # Check if the employee has a 'custom' role
-    role = conn.execute(
-        '''
-        SELECT r.name
-        FROM roles r
-        JOIN employee_roles er ON r.id = er.role_id
-        WHERE er.employee_id = ?
-        ''', (employee_id,)
-    ).fetchone()
-
-    if role and role['name'] == 'custom':
-        # Only check employee-specific permissions for custom roles
-        employee_permissions = conn.execute(
-            '''
-            SELECT p.name
-            FROM permissions p
-            JOIN employee_permissions ep ON p.id = ep.permission_id
-            WHERE ep.employee_id = ?
-            ''', (employee_id,)
-        ).fetchall()
-
-        conn.close()
-        # Check if the required permission exists
-        return permission_name in {perm['name'] for perm in employee_permissions}
-
-    # Otherwise, combine role permissions and employee-specific permissions
-    employee_permissions = conn.execute(
-        '''
-        SELECT p.name
-        FROM permissions p
-        JOIN employee_permissions ep ON p.id = ep.permission_id
-        WHERE ep.employee_id = ?
-        ''', (employee_id,)
-    ).fetchall()
-
-    role_permissions = conn.execute(
-        '''
-        SELECT p.name
-        FROM permissions p
-        JOIN role_permissions rp ON p.id = rp.permission_id
-        JOIN employee_roles er ON rp.role_id = er.role_id
-        WHERE er.employee_id = ?
-        ''', (employee_id,)
-    ).fetchall()
-
-    conn.close()
-
-    # Combine all permissions
-    all_permissions = {perm['name'] for perm in employee_permissions + role_permissions}
-
-    # Check if the required permission exists
-    return permission_name in all_permissions
+    """Role and custom permissions come from the shared cached resolver."""
+    return permissions.has_permission(employee_id, permission_name, get_db())
 
 
 @auth_bp.route('/api/account', methods=['DELETE'])
@@ -247,21 +195,18 @@ def delete_employee():
         if str(current_employee) == str(employee_id_to_delete):
             abort(403, description="You cannot delete your own account")
 
-        conn = get_db_connection()
         # Check if the employee exists
-        employee_to_delete = conn.execute(
+        employee_to_delete = query_one(
             'SELECT * FROM Employees WHERE employee_id = ?',
             (employee_id_to_delete,)
-        ).fetchone()
+        )
 
         if not employee_to_delete:
-            conn.close()
             abort(404, description="Employee not found")
 
         # Perform deletion
-        conn.execute('DELETE FROM Employees WHERE employee_id = ?', (employee_id_to_delete,))
-        conn.commit()
-        conn.close()
+        execute('DELETE FROM Employees WHERE employee_id = ?', (employee_id_to_delete,))
+        commit()
 
         return jsonify({'message': 'Employee deleted successfully'}), 200
     except ValueError:
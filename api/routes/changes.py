@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify, abort
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from api.db import get_db
+from models.changes import changes_since, latest_cursor, CHANGES_LIMIT
+
+changes_bp = Blueprint('changes', __name__)
+
+# Delta sync for the mobile app
+@changes_bp.route('/api/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """
+    Return what changed for the authenticated customer since `since`.
+
+    Query parameters:
+    - since (optional): the next_cursor of the previous call. Omit it to get
+      the current cursor without any changes, right after a full download.
+    - limit (optional): log entries to read, at most CHANGES_LIMIT.
+    """
+    try:
+        limit = min(CHANGES_LIMIT, max(1, int(request.args.get('limit', CHANGES_LIMIT))))
+        since = request.args.get('since')
+        since = int(since) if since is not None else None
+    except ValueError:
+        abort(400, description="'since' and 'limit' must be integers")
+
+    conn = get_db()
+    if since is None:
+        return jsonify({'changes': [], 'next_cursor': str(latest_cursor(conn)), 'has_more': False}), 200
+
+    changes, next_cursor, has_more = changes_since(conn, get_jwt_identity()['id'], since, limit)
+    return jsonify({
+        'changes': changes,
+        'next_cursor': str(next_cursor),
+        'has_more': has_more
+    }), 200
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import query_all, query_one, execute, commit
 
 # Credit Card APIs
 credit_cards_bp = Blueprint('credit_cards', __name__)
@@ -13,9 +13,8 @@ def get_credit_cards():
     Fetch all saved credit/debit cards for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        cards = conn.execute(
+        cards = query_all(
             '''
             SELECT id, card_last_4, expiration_date, is_default 
             FROM CreditCards 
@@ -23,11 +22,9 @@ def get_credit_cards():
             ORDER BY is_default DESC
             ''',
             (user_id,)
-        ).fetchall()
-        conn.close()
+        )
         return jsonify([dict(row) for row in cards]), 200
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching credit cards: {str(e)}")
 
 # Add a new credit/debit card
@@ -46,11 +43,10 @@ def add_credit_card():
             abort(400, description=f"'{field}' is required")
 
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
 
     try:
         # Insert the card into the database
-        conn.execute(
+        execute(
             '''
             INSERT INTO CreditCards (user_id, card_last_4, expiration_date, token, is_default) 
             VALUES (?, ?, ?, ?, ?)
@@ -65,7 +61,7 @@ def add_credit_card():
         )
         # If set_as_default is True, ensure all other cards are not default
         if data.get('set_as_default', False):
-            conn.execute(
+            execute(
                 '''
                 UPDATE CreditCards 
                 SET is_default = 0 
@@ -73,11 +69,9 @@ def add_credit_card():
                 ''',
                 (user_id, data['card_last_4'])
             )
-        conn.commit()
-        conn.close()
+        commit()
         return jsonify({'message': 'Credit card added successfully'}), 201
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error adding credit card: {str(e)}")
 
 # Remove a saved credit/debit card
@@ -88,27 +82,23 @@ def delete_credit_card(card_id):
     Delete a saved credit/debit card by card ID for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
         # Check if the card exists
-        card = conn.execute(
+        card = query_one(
             'SELECT * FROM CreditCards WHERE id = ? AND user_id = ?',
             (card_id, user_id)
-        ).fetchone()
+        )
         if not card:
-            conn.close()
             abort(404, description="Card not found")
 
         # Delete the card
-        conn.execute(
+        execute(
             'DELETE FROM CreditCards WHERE id = ? AND user_id = ?',
             (card_id, user_id)
         )
-        conn.commit()
-        conn.close()
+        commit()
         return jsonify({'message': 'Credit card deleted successfully'}), 200
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error deleting credit card: {str(e)}")
 
 # Set a default credit/debit card
@@ -119,29 +109,25 @@ def set_default_credit_card(card_id):
     Set a credit/debit card as the default for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
         # Validate the card exists for the user
-        card = conn.execute(
+        card = query_one(
             'SELECT * FROM CreditCards WHERE id = ? AND user_id = ?',
             (card_id, user_id)
-        ).fetchone()
+        )
         if not card:
-            conn.close()
             abort(404, description="Card not found")
 
         # Update default card
-        conn.execute(
+        execute(
             'UPDATE CreditCards SET is_default = 0 WHERE user_id = ?',
             (user_id,)
         )
-        conn.execute(
+        execute(
             'UPDATE CreditCards SET is_default = 1 WHERE id = ?',
             (card_id,)
         )
-        conn.commit()
-        conn.close()
+        commit()
         return jsonify({'message': 'Default credit card updated successfully'}), 200
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error updating default credit card: {str(e)}")
@@ -1,5 +1,10 @@
-from flask import Blueprint, request, jsonify, abort
-from api.models import get_db_connection
+import json
+from flask import Blueprint, Response, request, jsonify, abort, stream_with_context
+from api.db import get_db, query_iter, execute, commit
+from api.conditional import conditional
+from models.customer_search import search_customers, CUSTOMER_FIELDS, SEARCH_LIMIT
+from models.ledger import get_balance
+from api.pagination import get_page_args, keyset_page, ticket_filters
 
 customers_bp = Blueprint('customers', __name__)
 
@@ -10,13 +15,65 @@ def validate_customer_data(data):
         if field not in data or not data[field].strip():
             abort(400, description=f"Missing or invalid field: {field}")
 
-# Get all customers
+# Fields clients may ask for with ?fields= are CUSTOMER_FIELDS (models/customer_search.py).
+DEFAULT_CUSTOMER_FIELDS = ('id', 'first_name', 'last_name', 'phone_number', 'email')
+
+
+def customer_columns(conn, fields_arg):
+    """SELECT list for ?fields=a,b,c, limited to CUSTOMER_FIELDS that exist in this database."""
+    existing = {row['name'] for row in conn.execute('PRAGMA table_info(customers)')}
+    if fields_arg:
+        fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in CUSTOMER_FIELDS]
+        if unknown:
+            abort(400, description=f"Unknown field(s): {', '.join(unknown)}")
+    else:
+        fields = DEFAULT_CUSTOMER_FIELDS
+    # id always comes back; the cursor is built from it
+    fields = ['id'] + [field for field in fields if field != 'id' and field in existing]
+    return ', '.join(fields)
+
+
+def stream_customers(columns):
+    """
+    Yield every customer as one JSON line, reading rows off the cursor as they are sent.
+
+    Runs under stream_with_context, so the request's connection stays checked
+    out until the last row is written.
+    """
+    for row in query_iter(f'SELECT {columns} FROM customers ORDER BY id'):
+        yield json.dumps(dict(row)) + '\n'
+
+
+# List customers a page at a time, or stream them all with ?format=ndjson
 @customers_bp.route('/api/customers', methods=['GET'])
+@conditional(lambda: [('customers', 0)])
 def get_customers():
+    page_args = get_page_args(request.args, default_order='asc')
+    conn = get_db()
+    columns = customer_columns(conn, request.args.get('fields'))
+    if request.args.get('format') == 'ndjson':
+        return Response(stream_with_context(stream_customers(columns)), mimetype='application/x-ndjson')
+    customers, pagination = keyset_page(conn, 'customers', '1=1', [], page_args, columns=columns, sort_column='id')
+
+    return jsonify({
+        'customers': [dict(row) for row in customers],
+        'pagination': pagination
+    }), 200
+
+# Search customers by name, phone, email or notes
+@customers_bp.route('/api/customers/search', methods=['GET'])
+@conditional(lambda: [('customers', 0)])
+def search_customers_route():
+    term = request.args.get('q', '')
+    try:
+        limit = min(SEARCH_LIMIT, max(1, int(request.args.get('limit', 25))))
+    except ValueError:
+        abort(400, description="limit must be an integer")
+
     try:
-        conn = get_db_connection()
-        customers = conn.execute('SELECT * FROM customers').fetchall()
-        conn.close()
+        conn = get_db()
+        customers = search_customers(conn, term, limit)
         return jsonify([dict(row) for row in customers]), 200
     except Exception as e:
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
@@ -28,8 +85,7 @@ def add_customer():
     validate_customer_data(data)
 
     try:
-        conn = get_db_connection()
-        conn.execute(
+        execute(
             '''
             INSERT INTO customers (first_name, last_name, phone_number, notes, deladdress, billaddress, email, zipcode) 
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
@@ -45,8 +101,7 @@ def add_customer():
                 data.get('zipcode', '').strip()
             )
         )
-        conn.commit()
-        conn.close()
+        commit()
         return jsonify({'message': 'Customer added successfully'}), 201
     except Exception as e:
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
@@ -58,8 +113,7 @@ def update_customer(customer_id):
     validate_customer_data(data)
 
     try:
-        conn = get_db_connection()
-        result = conn.execute(
+        result = execute(
             '''
             UPDATE customers 
             SET first_name = ?, last_name = ?, phone_number = ?, notes = ?, deladdress = ?, billaddress = ?, email = ?, zipcode = ? 
@@ -77,8 +131,7 @@ def update_customer(customer_id):
                 customer_id
             )
         )
-        conn.commit()
-        conn.close()
+        commit()
 
         if result.rowcount == 0:
             return jsonify({'error': 'Customer not found'}), 404
@@ -91,10 +144,8 @@ def update_customer(customer_id):
 @customers_bp.route('/api/customers/<int:customer_id>', methods=['DELETE'])
 def delete_customer(customer_id):
     try:
-        conn = get_db_connection()
-        result = conn.execute('DELETE FROM customers WHERE id = ?', (customer_id,))
-        conn.commit()
-        conn.close()
+        result = execute('DELETE FROM customers WHERE id = ?', (customer_id,))
+        commit()
 
         if result.rowcount == 0:
             return jsonify({'error': 'Customer not found'}), 404
@@ -104,87 +155,28 @@ def delete_customer(customer_id):
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
 
 @customers_bp.route('/api/customers/<int:customer_id>/total_owed', methods=['GET'])
+@conditional(lambda customer_id: [('customer', customer_id)])
 def get_customer_total_owed(customer_id):
     try:
-        conn = get_db_connection()
-        total = conn.execute(
-            '''
-            SELECT SUM(total_price) as total_owed 
-            FROM Tickets 
-            WHERE customer_id = ? AND pickedup = 0
-            ''',
-            (customer_id,)
-        ).fetchone()
-        conn.close()
-        return jsonify({'total_owed': total['total_owed'] if total['total_owed'] else 0}), 200
+        conn = get_db()
+        total_owed = get_balance(customer_id, conn)
+        return jsonify({'total_owed': total_owed}), 200
     except Exception as e:
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
 
 @customers_bp.route('/api/customers/<int:customer_id>/tickets', methods=['GET'])
+@conditional(lambda customer_id: [('customer', customer_id)])
 def get_customer_tickets(customer_id):
+    # Bad paging parameters abort with 400 before the catch-all below
+    page_args = get_page_args(request.args)
+    where, params = ticket_filters(request.args, customer_id=customer_id)
     try:
-        conn = get_db_connection()
-
-        # Extract query parameters
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        status = request.args.get('status')
-        ticket_type_id = request.args.get('type')
-        page = max(1, int(request.args.get('page', 1)))
-        per_page = max(1, int(request.args.get('per_page', 10)))
-
-        # Base query
-        query = 'SELECT * FROM Tickets WHERE customer_id = ?'
-        params = [customer_id]
-
-        # Apply filters
-        if start_date:
-            query += ' AND date_created >= ?'
-            params.append(start_date)
-        if end_date:
-            query += ' AND date_created <= ?'
-            params.append(end_date)
-        if status:
-            query += ' AND delivery_status = ?'
-            params.append(status)
-        if ticket_type_id:
-            query += ' AND ticket_type_id = ?'
-            params.append(ticket_type_id)
-
-        # Add pagination
-        query += ' LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
-
-        tickets = conn.execute(query, params).fetchall()
-
-        # Fetch total count for pagination metadata
-        total_count_query = 'SELECT COUNT(*) FROM Tickets WHERE customer_id = ?'
-        total_count_params = [customer_id]
-
-        if start_date:
-            total_count_query += ' AND date_created >= ?'
-            total_count_params.append(start_date)
-        if end_date:
-            total_count_query += ' AND date_created <= ?'
-            total_count_params.append(end_date)
-        if status:
-            total_count_query += ' AND delivery_status = ?'
-            total_count_params.append(status)
-        if ticket_type_id:
-            total_count_query += ' AND ticket_type_id = ?'
-            total_count_params.append(ticket_type_id)
-
-        total_count = conn.execute(total_count_query, total_count_params).fetchone()[0]
-        conn.close()
+        conn = get_db()
+        tickets, pagination = keyset_page(conn, 'Tickets', where, params, page_args)
 
         return jsonify({
             'tickets': [dict(row) for row in tickets],
-            'pagination': {
-                'current_page': page,
-                'per_page': per_page,
-                'total_pages': (total_count + per_page - 1) // per_page,
-                'total_items': total_count
-            }
+            'pagination': pagination
         }), 200
     except Exception as e:
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import query_all, query_one, execute, commit
+from api.conditional import conditional
+from api import pubsub
 
 deliveries_bp = Blueprint('deliveries', __name__)
 
@@ -18,9 +20,8 @@ def request_delivery():
         if field not in data or not data[field]:
             abort(400, description=f"'{field}' is required")
 
-    conn = get_db_connection()
     try:
-        conn.execute(
+        execute(
             '''
             INSERT INTO Deliveries (customer_id, address, pickup_date, notes, status) 
             VALUES (?, ?, ?, ?, 'Pending')
@@ -32,11 +33,9 @@ def request_delivery():
                 data.get('notes', '')
             )
         )
-        conn.commit()
+        commit()
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error creating delivery request: {str(e)}")
-    conn.close()
     return jsonify({'message': 'Delivery request created successfully'}), 201
 
 # Update delivery status
@@ -53,9 +52,8 @@ def update_delivery_status():
         if field not in data or not data[field]:
             abort(400, description=f"'{field}' is required")
 
-    conn = get_db_connection()
     try:
-        result = conn.execute(
+        result = execute(
             '''
             UPDATE Deliveries 
             SET status = ? 
@@ -65,30 +63,30 @@ def update_delivery_status():
         )
         if result.rowcount == 0:
             abort(404, description="Delivery not found")
-        conn.commit()
+        commit()
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error updating delivery status: {str(e)}")
-    conn.close()
+    pubsub.publish(get_jwt_identity()['id'], 'delivery', {
+        'delivery_id': data['delivery_id'],
+        'status': data['status'],
+    })
     return jsonify({'message': 'Delivery status updated successfully'}), 200
 
 # Get current delivery status
 @deliveries_bp.route('/api/delivery/status', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [('customer', get_jwt_identity()['id'])])
 def get_delivery_status():
     """
     Fetch the latest delivery status for the user.
     """
-    conn = get_db_connection()
     try:
-        delivery = conn.execute(
+        delivery = query_one(
             'SELECT * FROM Deliveries WHERE customer_id = ? ORDER BY pickup_date DESC LIMIT 1',
             (get_jwt_identity()['id'],)
-        ).fetchone()
+        )
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching delivery status: {str(e)}")
-    conn.close()
     return jsonify(dict(delivery) if delivery else {'message': 'No delivery status available'}), 200
 
 # Check delivery range
@@ -102,16 +100,13 @@ def check_delivery_range():
     if not postal_code:
         abort(400, description="'postal_code' is required")
 
-    conn = get_db_connection()
     try:
-        in_range = conn.execute(
+        in_range = query_one(
             'SELECT * FROM DeliveryRanges WHERE postal_code = ?',
             (postal_code,)
-        ).fetchone()
+        )
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error checking delivery range: {str(e)}")
-    conn.close()
     return jsonify({'in_range': bool(in_range)}), 200
 
 # Cancel a delivery request
@@ -122,39 +117,34 @@ def cancel_delivery(delivery_id):
     Cancel a delivery request by ID if it's still pending.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        delivery = conn.execute(
+        delivery = query_one(
             'SELECT * FROM Deliveries WHERE id = ? AND customer_id = ? AND status = "Pending"',
             (delivery_id, user_id)
-        ).fetchone()
+        )
         if not delivery:
             abort(404, description="Delivery not found or already processed")
-        conn.execute('DELETE FROM Deliveries WHERE id = ?', (delivery_id,))
-        conn.commit()
+        execute('DELETE FROM Deliveries WHERE id = ?', (delivery_id,))
+        commit()
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error canceling delivery: {str(e)}")
-    conn.close()
     return jsonify({'message': 'Delivery request cancelled successfully'}), 200
 
 # Get saved delivery addresses
 @deliveries_bp.route('/api/delivery/addresses', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [('customer', get_jwt_identity()['id'])])
 def get_delivery_addresses():
     """
     Fetch all saved delivery addresses for the user.
     """
-    conn = get_db_connection()
     try:
-        addresses = conn.execute(
+        addresses = query_all(
             'SELECT * FROM DeliveryAddresses WHERE customer_id = ?',
             (get_jwt_identity()['id'],)
-        ).fetchall()
+        )
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching delivery addresses: {str(e)}")
-    conn.close()
     return jsonify([dict(row) for row in addresses]), 200
 
 # Save a new delivery address
@@ -171,9 +161,8 @@ def save_delivery_address():
         if field not in data or not data[field]:
             abort(400, description=f"'{field}' is required")
 
-    conn = get_db_connection()
     try:
-        conn.execute(
+        execute(
             '''
             INSERT INTO DeliveryAddresses (customer_id, address, city, state, postal_code) 
             VALUES (?, ?, ?, ?, ?)
@@ -186,9 +175,7 @@ def save_delivery_address():
                 data['postal_code']
             )
         )
-        conn.commit()
+        commit()
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error saving delivery address: {str(e)}")
-    conn.close()
     return jsonify({'message': 'Delivery address saved successfully'}), 201
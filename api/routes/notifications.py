@@ -1,27 +1,44 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, Response, jsonify, request, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import get_db, query_all, execute, commit
+from api.conditional import conditional
+from api import pubsub
+from models import outbox
 from datetime import datetime
+import queue
 
 notifications_bp = Blueprint('notifications', __name__)
 
+# Seconds between keepalive comments on an idle event stream.
+KEEPALIVE_SECONDS = 15
+RECONNECT_MILLISECONDS = 3000
+
 # Helper function to create notifications
 def create_notification(conn, customer_id, notification_type, message):
     """
-    Create a new notification in the database.
+    Create a new in-app notification and queue the matching push to the
+    customer's device, in one transaction. The push itself is sent by the
+    outbox dispatcher (models/outbox.py), not on the request thread.
     """
     conn.execute(
         '''
-        INSERT INTO Notifications (customer_id, type, message, created_at, is_read)
+        INSERT INTO Notifications (customer_id, type, message, sent_at, is_read)
         VALUES (?, ?, ?, ?, 0)
         ''',
         (customer_id, notification_type, message, datetime.now())
     )
+    outbox.enqueue_customer_push(conn, customer_id, notification_type, message)
     conn.commit()
+    outbox.wake()
+    pubsub.publish(customer_id, 'notification', {
+        'type': notification_type,
+        'message': message,
+    })
 
 # Retrieve all notifications for the logged-in user
 @notifications_bp.route('/api/notifications', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [('customer', get_jwt_identity()['id'])])
 def get_notifications():
     """
     Fetch notifications for the current user.
@@ -38,11 +55,9 @@ def get_notifications():
         query += ' AND is_read = ?'
         params.append(is_read)
 
-    query += ' ORDER BY created_at DESC'  # Sort by newest first
+    query += ' ORDER BY sent_at DESC'  # Sort by newest first
 
-    conn = get_db_connection()
-    notifications = conn.execute(query, params).fetchall()
-    conn.close()
+    notifications = query_all(query, params)
 
     return jsonify([dict(row) for row in notifications]), 200
 
@@ -54,10 +69,8 @@ def mark_notifications_read():
     Mark all notifications as read for the current user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
-    conn.execute('UPDATE Notifications SET is_read = 1 WHERE customer_id = ?', (user_id,))
-    conn.commit()
-    conn.close()
+    execute('UPDATE Notifications SET is_read = 1 WHERE customer_id = ?', (user_id,))
+    commit()
     return jsonify({'message': 'Notifications marked as read'}), 200
 
 # Create a new notification
@@ -73,79 +86,96 @@ def create_user_notification():
     if not data or 'type' not in data or 'message' not in data:
         abort(400, description="Missing 'type' or 'message' in the request body")
 
-    conn = get_db_connection()
+    conn = get_db()
     create_notification(conn, user_id, data['type'], data['message'])
-    conn.close()
 
     return jsonify({'message': 'Notification created successfully'}), 201
 
-# Real-time WebSocket notifications (Placeholder for WebSocket server)
+# Real-time notifications over server-sent events
 @notifications_bp.route('/api/notifications/realtime', methods=['GET'])
+@jwt_required()
 def realtime_notifications():
     """
-    WebSocket connection placeholder for real-time notifications.
-    To be implemented with a WebSocket server (e.g., Flask-SocketIO or similar).
-    """
-    return jsonify({'message': 'Real-time notifications require WebSocket connection'}), 501
+    Stream notification and delivery events for the logged-in user as
+    text/event-stream. A comment line is sent every KEEPALIVE_SECONDS so
+    proxies keep the connection open; after reconnecting, fetch
+    /api/changes to pick up anything sent while disconnected.
+    """
+    customer_id = get_jwt_identity()['id']
+    subscriber = pubsub.subscribe(customer_id)
+
+    # No database access in here: the stream can stay open for hours
+    def event_stream():
+        try:
+            yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            pubsub.unsubscribe(customer_id, subscriber)
+
+    return Response(event_stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
 
 # Specific notifications for events
 def notify_order_ready(customer_id):
     """
     Notify a customer that their order is ready for pickup.
     """
-    conn = get_db_connection()
+    conn = get_db()
     create_notification(
         conn,
         customer_id,
         'Order Ready',
         'Your order is ready for pickup!'
     )
-    conn.close()
 
 def notify_monthly_bill_ready(customer_id):
     """
     Notify a customer that their monthly bill is ready to be paid.
     """
-    conn = get_db_connection()
+    conn = get_db()
     create_notification(
         conn,
         customer_id,
         'Monthly Bill',
         'Your monthly bill is ready for payment.'
     )
-    conn.close()
 
 def notify_delivery_status(customer_id, status):
     """
     Notify a customer about delivery status updates.
     """
-    conn = get_db_connection()
+    conn = get_db()
     message = 'Your delivery is on its way!' if status == 'Out for Delivery' else 'Your delivery has been dropped off!'
     create_notification(conn, customer_id, 'Delivery Update', message)
-    conn.close()
 
 def notify_account_change(customer_id):
     """
     Notify a customer about changes to their account information.
     """
-    conn = get_db_connection()
+    conn = get_db()
     create_notification(
         conn,
         customer_id,
         'Account Update',
         'Your account information has been updated.'
     )
-    conn.close()
 
 def notify_new_message(customer_id):
     """
     Notify a customer about a new message from an employee.
     """
-    conn = get_db_connection()
+    conn = get_db()
     create_notification(
         conn,
         customer_id,
         'New Message',
         'You have a new message from our team.'
     )
-    conn.close()
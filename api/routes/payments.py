@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import get_db, query_all, query_one, execute, commit
+from models.ledger import get_balance as get_customer_balance
+from models.account import apply_payment
 import stripe
 
 stripe.api_key = "pk_test_51QEmC6F9q8Y1A3UES8uzimDczaKS3xMRUNr9QN4vhQN8wjktGMEONNrWWP7mFCJRrdYDmTPADDDVxn1GvS0mTkCw00XlEDwkSY"
@@ -18,22 +20,13 @@ def get_balance():
     if not customer_id:
         abort(400, description="'customer_id' is required")
 
-    conn = get_db_connection()
+    conn = get_db()
     try:
-        balance = conn.execute(
-            '''
-            SELECT COALESCE(SUM(total_price - payment), 0) AS outstanding_balance
-            FROM tickets
-            WHERE customer_id = ? AND pickedup = 0 AND total_price > payment
-            ''',
-            (customer_id,)
-        ).fetchone()
+        balance = get_customer_balance(customer_id, conn)
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching balance: {str(e)}")
-    conn.close()
 
-    return jsonify({'outstanding_balance': balance['outstanding_balance']}), 200
+    return jsonify({'outstanding_balance': balance}), 200
 
 
 # Make a payment
@@ -51,23 +44,13 @@ def make_payment():
     customer_id = data['customer_id']
     payment_amount = data['amount']
 
-    conn = get_db_connection()
+    conn = get_db()
     try:
         # Apply payment to unpaid tickets in order of ticket creation
-        conn.execute(
-            '''
-            UPDATE Tickets
-            SET payment = MIN(total_price, payment + ?)
-            WHERE customer_id = ? AND pickedup = 0 AND total_price > payment
-            ''',
-            (payment_amount, customer_id)
-        )
-        conn.commit()
+        applied = apply_payment(customer_id, payment_amount, conn)
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error processing payment: {str(e)}")
-    conn.close()
-    return jsonify({'message': 'Payment successful'}), 200
+    return jsonify({'message': 'Payment successful', 'applied': applied}), 200
 
 # Pay a specific bill
 @payments_bp.route('/api/bills', methods=['POST'])
@@ -81,23 +64,20 @@ def pay_bill():
         abort(400, description="'ticket_id' is required")
 
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        result = conn.execute(
+        result = execute(
             '''
             UPDATE Tickets 
-            SET payment = total_price 
+            SET payment = 1, amount_paid = total_price 
             WHERE id = ? AND customer_id = ? AND pickedup = 0
             ''',
             (data['ticket_id'], user_id)
         )
         if result.rowcount == 0:
             abort(404, description="Ticket not found or already paid")
-        conn.commit()
+        commit()
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error paying bill: {str(e)}")
-    conn.close()
     return jsonify({'message': 'Bill paid successfully'}), 200
 
 # Retrieve billing statements
@@ -108,21 +88,18 @@ def get_billing_statements():
     Fetch all billing statements with payments for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        statements = conn.execute(
+        statements = query_all(
             '''
             SELECT * 
             FROM Tickets 
-            WHERE customer_id = ? AND payment > 0
+            WHERE customer_id = ? AND (payment > 0 OR amount_paid > 0)
             ORDER BY date_created DESC
             ''',
             (user_id,)
-        ).fetchall()
+        )
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching billing statements: {str(e)}")
-    conn.close()
     return jsonify([dict(row) for row in statements]), 200
 
 # Fetch payment history
@@ -133,16 +110,13 @@ def get_payment_history():
     Fetch payment history for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        payments = conn.execute(
+        payments = query_all(
             'SELECT * FROM Payments WHERE customer_id = ? ORDER BY payment_date DESC',
             (user_id,)
-        ).fetchall()
+        )
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching payment history: {str(e)}")
-    conn.close()
     return jsonify([dict(row) for row in payments]), 200
 
 # Fetch a payment receipt
@@ -153,18 +127,15 @@ def get_payment_receipt(payment_id):
     Fetch a specific payment receipt by payment ID.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
     try:
-        receipt = conn.execute(
+        receipt = query_one(
             'SELECT * FROM Payments WHERE id = ? AND customer_id = ?',
             (payment_id, user_id)
-        ).fetchone()
+        )
         if not receipt:
             abort(404, description="Receipt not found")
     except Exception as e:
-        conn.close()
         abort(500, description=f"Error fetching receipt: {str(e)}")
-    conn.close()
     return jsonify(dict(receipt)), 200
 
 @payments_bp.route('/api/save-card', methods=['POST'])
@@ -181,12 +152,11 @@ def save_card():
     user_id = get_jwt_identity()['id']
 
     # Retrieve or create Stripe customer
-    conn = get_db_connection()
-    customer = conn.execute('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,)).fetchone()
+    customer = query_one('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,))
     if not customer or not customer['stripe_customer_id']:
         stripe_customer = stripe.Customer.create()
-        conn.execute('UPDATE Users SET stripe_customer_id = ? WHERE id = ?', (stripe_customer['id'], user_id))
-        conn.commit()
+        execute('UPDATE Users SET stripe_customer_id = ? WHERE id = ?', (stripe_customer['id'], user_id))
+        commit()
         stripe_customer_id = stripe_customer['id']
     else:
         stripe_customer_id = customer['stripe_customer_id']
@@ -214,8 +184,7 @@ def get_saved_cards():
     Retrieve saved cards for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
-    customer = conn.execute('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,)).fetchone()
+    customer = query_one('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,))
     if not customer or not customer['stripe_customer_id']:
         return jsonify([]), 200
 
@@ -247,8 +216,7 @@ def delete_card(card_id):
     Deletes a saved card for the authenticated user.
     """
     user_id = get_jwt_identity()['id']
-    conn = get_db_connection()
-    customer = conn.execute('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,)).fetchone()
+    customer = query_one('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,))
     if not customer or not customer['stripe_customer_id']:
         abort(400, description="No Stripe customer associated with this user")
 
@@ -274,13 +242,12 @@ def create_payment_intent():
     user_id = get_jwt_identity()['id']
 
     # Retrieve or create Stripe customer
-    conn = get_db_connection()
-    customer = conn.execute('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,)).fetchone()
+    customer = query_one('SELECT stripe_customer_id FROM Users WHERE id = ?', (user_id,))
     if not customer or not customer['stripe_customer_id']:
         # Create a new Stripe customer if none exists
         stripe_customer = stripe.Customer.create()
-        conn.execute('UPDATE Users SET stripe_customer_id = ? WHERE id = ?', (stripe_customer['id'], user_id))
-        conn.commit()
+        execute('UPDATE Users SET stripe_customer_id = ? WHERE id = ?', (stripe_customer['id'], user_id))
+        commit()
         stripe_customer_id = stripe_customer['id']
     else:
         stripe_customer_id = customer['stripe_customer_id']
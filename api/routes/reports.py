@@ -1,11 +1,103 @@
-from flask import Blueprint, send_file, abort
+from flask import Blueprint, Response, abort, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import get_db_connection
+from api.db import query_all, query_iter
 import csv
 import io
+import sqlite3
+import zlib
 
 reports_bp = Blueprint('reports', __name__)
 
+# Rows written to the CSV buffer before it is handed to the client.
+CSV_CHUNK_ROWS = 500
+
+
+def report_columns(columns_arg):
+    """Columns for ?columns=a,b,c (every Tickets column if not given). Unknown names abort with 400."""
+    existing = [row['name'] for row in query_all('PRAGMA table_info(Tickets)')]
+    if not columns_arg:
+        return existing
+    columns = [column.strip() for column in columns_arg.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in existing]
+    if unknown:
+        abort(400, description=f"Unknown column(s): {', '.join(unknown)}")
+    return columns
+
+
+def date_range_filter(args):
+    """SQL and params for ?start_date=&end_date= on date_created (both inclusive)."""
+    sql, params = '', []
+    if args.get('start_date'):
+        sql += ' AND date_created >= ?'
+        params.append(args['start_date'])
+    if args.get('end_date'):
+        sql += ' AND date_created <= ?'
+        params.append(args['end_date'])
+    return sql, params
+
+
+def csv_chunks(cursor, first_row, columns):
+    """Yield the CSV a few hundred rows at a time straight off the cursor."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerow(first_row)
+    rows = 1
+    for row in cursor:
+        writer.writerow(row)
+        rows += 1
+        if rows % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte chunks into one gzip file."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_report(where, params, filename, not_found):
+    """
+    Stream the caller's Tickets matching `where` as a CSV download.
+
+    Supports ?columns=, ?start_date=, ?end_date= and ?gzip=1. Only the current
+    chunk is held in memory, however long the customer's history is. The
+    request's connection stays checked out until the stream ends.
+    """
+    try:
+        columns = report_columns(request.args.get('columns'))
+        date_sql, date_params = date_range_filter(request.args)
+        column_sql = ', '.join(f'"{column}"' for column in columns)
+        cursor = query_iter(
+            f'SELECT {column_sql} FROM Tickets WHERE {where}{date_sql} ORDER BY date_created, id',
+            [*params, *date_params]
+        )
+        first_row = cursor.fetchone()
+    except sqlite3.Error as e:
+        abort(500, description=f"Error fetching report: {str(e)}")
+    if first_row is None:
+        abort(404, description=not_found)
+
+    chunks = csv_chunks(cursor, first_row, columns)
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks, mimetype, filename = gzip_chunks(chunks), 'application/gzip', f'{filename}.gz'
+    else:
+        mimetype = 'text/csv'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 # Export order history as a CSV
 @reports_bp.route('/api/reports/orders', methods=['GET'])
 @jwt_required()
@@ -13,30 +105,9 @@ def export_order_history():
     """
     Export the user's order history as a CSV file.
     """
-    conn = get_db_connection()
-    try:
-        orders = conn.execute(
-            'SELECT * FROM Tickets WHERE customer_id = ?',
-            (get_jwt_identity()['id'],)
-        ).fetchall()
-        if not orders:
-            abort(404, description="No orders found")
-    except Exception as e:
-        conn.close()
-        abort(500, description=f"Error fetching orders: {str(e)}")
-    conn.close()
-
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=orders[0].keys())
-    writer.writeheader()
-    writer.writerows([dict(row) for row in orders])
-
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name='order_history.csv'
+    return stream_report(
+        'customer_id = ?', [get_jwt_identity()['id']],
+        'order_history.csv', "No orders found"
     )
 
 # Export billing history as a CSV
@@ -46,28 +117,7 @@ def export_billing_history():
     """
     Export the user's billing history as a CSV file.
     """
-    conn = get_db_connection()
-    try:
-        bills = conn.execute(
-            'SELECT * FROM Tickets WHERE customer_id = ? AND payment > 0',
-            (get_jwt_identity()['id'],)
-        ).fetchall()
-        if not bills:
-            abort(404, description="No billing history found")
-    except Exception as e:
-        conn.close()
-        abort(500, description=f"Error fetching billing history: {str(e)}")
-    conn.close()
-
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=bills[0].keys())
-    writer.writeheader()
-    writer.writerows([dict(row) for row in bills])
-
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name='billing_history.csv'
+    return stream_report(
+        'customer_id = ? AND (payment > 0 OR amount_paid > 0)', [get_jwt_identity()['id']],
+        'billing_history.csv', "No billing history found"
     )
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, abort
-from api.models import get_db_connection
+from api.db import get_db, query_one, execute, commit
+from api.conditional import conditional
+from api import pubsub
+from api.pagination import get_page_args, keyset_page, ticket_filters
 
 tickets_bp = Blueprint('tickets', __name__)
 
@@ -21,74 +24,33 @@ def validate_ticket_data(data, required_fields=None):
 
 # Get all tickets with optional filters and pagination
 @tickets_bp.route('/api/tickets', methods=['GET'])
+@conditional(lambda: [('tickets', 0)])
 def get_tickets():
     """
-    Fetch all tickets with optional filters and pagination.
+    Fetch tickets with optional filters, newest first.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page.
+    `count` is exact, estimate, cached or none (see api/pagination.py).
     """
-    conn = get_db_connection()
-
-    # Extract query parameters
-    customer_id = request.args.get('customer_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    status = request.args.get('status')
-    ticket_type_id = request.args.get('type')
-    page = max(1, int(request.args.get('page', 1)))
-    per_page = max(1, int(request.args.get('per_page', 10)))
-
-    # Base query
-    query = 'SELECT * FROM Tickets WHERE 1=1'
-    params = []
-
-    # Apply filters
-    if customer_id:
-        query += ' AND customer_id = ?'
-        params.append(customer_id)
-    if start_date:
-        query += ' AND date_created >= ?'
-        params.append(start_date)
-    if end_date:
-        query += ' AND date_created <= ?'
-        params.append(end_date)
-    if status:
-        query += ' AND delivery_status = ?'
-        params.append(status)
-    if ticket_type_id:
-        query += ' AND ticket_type_id = ?'
-        params.append(ticket_type_id)
-
-    # Add pagination
-    query += ' LIMIT ? OFFSET ?'
-    params.extend([per_page, (page - 1) * per_page])
-
-    tickets = conn.execute(query, params).fetchall()
-
-    # Fetch total count for pagination metadata
-    total_count_query = 'SELECT COUNT(*) FROM Tickets WHERE 1=1'
-    total_count_params = params[:-2]  # Exclude pagination params
-    total_count = conn.execute(total_count_query, total_count_params).fetchone()[0]
-    conn.close()
+    page_args = get_page_args(request.args)
+    where, params = ticket_filters(request.args)
+
+    tickets, pagination = keyset_page(get_db(), 'Tickets', where, params, page_args)
 
     return jsonify({
         'tickets': [dict(row) for row in tickets],
-        'pagination': {
-            'current_page': page,
-            'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page,
-            'total_items': total_count
-        }
+        'pagination': pagination
     }), 200
 
 
 # Get a specific ticket by ID
 @tickets_bp.route('/api/tickets/<int:ticket_id>', methods=['GET'])
+@conditional(lambda ticket_id: [('tickets', 0)])
 def get_ticket(ticket_id):
     """
     Fetch detailed information for a specific ticket.
     """
-    conn = get_db_connection()
-    ticket = conn.execute('SELECT * FROM Tickets WHERE id = ?', (ticket_id,)).fetchone()
-    conn.close()
+    ticket = query_one('SELECT * FROM Tickets WHERE id = ?', (ticket_id,))
     if not ticket:
         abort(404, description="Ticket not found")
     return jsonify(dict(ticket)), 200
@@ -103,8 +65,7 @@ def add_ticket():
     data = request.get_json()
     validate_ticket_data(data)
 
-    conn = get_db_connection()
-    conn.execute(
+    execute(
         '''
         INSERT INTO Tickets 
         (customer_id, ticket_type_id, employee_id, ticket_number, total_price,
@@ -122,8 +83,7 @@ def add_ticket():
             data.get('delivery_status', 'Pending')
         )
     )
-    conn.commit()
-    conn.close()
+    commit()
     return jsonify({'message': 'Ticket added successfully'}), 201
 
 
@@ -139,8 +99,7 @@ def update_ticket(ticket_id):
         'ticket_number', 'total_price', 'date_due'
     ])
 
-    conn = get_db_connection()
-    conn.execute(
+    execute(
         '''
         UPDATE Tickets 
         SET customer_id = ?, ticket_type_id = ?, employee_id = ?, ticket_number = ?, 
@@ -154,8 +113,7 @@ def update_ticket(ticket_id):
             data.get('delivery_status', 'Pending'), ticket_id
         )
     )
-    conn.commit()
-    conn.close()
+    commit()
     return jsonify({'message': 'Ticket updated successfully'}), 200
 
 
@@ -165,25 +123,22 @@ def delete_ticket(ticket_id):
     """
     Delete a ticket by ID.
     """
-    conn = get_db_connection()
-    conn.execute('DELETE FROM Tickets WHERE id = ?', (ticket_id,))
-    conn.commit()
-    conn.close()
+    execute('DELETE FROM Tickets WHERE id = ?', (ticket_id,))
+    commit()
     return jsonify({'message': 'Ticket deleted successfully'}), 200
 
 
 # Get the current delivery status of a specific ticket
 @tickets_bp.route('/api/tickets/<int:ticket_id>/delivery_status', methods=['GET'])
+@conditional(lambda ticket_id: [('tickets', 0)])
 def get_ticket_delivery_status(ticket_id):
     """
     Fetch the delivery status of a specific ticket.
     """
-    conn = get_db_connection()
-    status = conn.execute(
+    status = query_one(
         'SELECT delivery_status FROM Tickets WHERE id = ?',
         (ticket_id,)
-    ).fetchone()
-    conn.close()
+    )
     if not status:
         abort(404, description="Ticket not found")
     return jsonify({'ticket_id': ticket_id, 'delivery_status': status['delivery_status']}), 200
@@ -196,11 +151,19 @@ def update_ticket_delivery_status(ticket_id):
     if 'delivery_status' not in data:
         abort(400, description="Missing required field: delivery_status")
 
-    conn = get_db_connection()
-    conn.execute(
+    execute(
         'UPDATE Tickets SET delivery_status = ? WHERE id = ?',
         (data['delivery_status'], ticket_id)
     )
-    conn.commit()
-    conn.close()
+    commit()
+
+    ticket = query_one(
+        'SELECT customer_id, ticket_number FROM Tickets WHERE id = ?', (ticket_id,)
+    )
+    if ticket:
+        pubsub.publish(ticket['customer_id'], 'ticket_delivery_status', {
+            'ticket_id': ticket_id,
+            'ticket_number': ticket['ticket_number'],
+            'delivery_status': data['delivery_status'],
+        })
     return jsonify({'message': 'Delivery status updated successfully'}), 200
@@ -3,8 +3,7 @@ import stripe
 from views.ccinfo import Ui_cc_info_dialog
 from views.utils import get_db_connection
 from controllers.config import STRIPE_SECRET_KEY
-import firebase_admin
-from firebase_admin import messaging
+from models import outbox
 
 
 class CreditCardEntryDialog(QDialog):
@@ -90,46 +89,19 @@ class CreditCardEntryDialog(QDialog):
                 """,
                 (self.customer_id, payment_method.card["brand"], payment_method.card["last4"], f"{exp_month}/{exp_year}", payment_method.id, 1),
             )
+            # Confirmation push goes out with the card row, or not at all
+            outbox.enqueue_customer_push(
+                conn,
+                self.customer_id,
+                "Payment Method Added",
+                "Your credit card has been securely added to your account.",
+                dedupe_key=f"card-added:{payment_method.id}",
+            )
             conn.commit()
-            conn.close()
+            outbox.wake()
 
             QMessageBox.information(self, "Success", "Credit card saved successfully!")
-            self.send_firebase_notification()
             self.accept()
 
         except stripe.error.StripeError as e:
             QMessageBox.critical(self, "Stripe Error", f"Failed to store card: {e.user_message}")
-
-    def send_firebase_notification(self):
-        """Send a confirmation notification using Firebase Cloud Messaging"""
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT fcm_token FROM customers WHERE id = ?", (self.customer_id,))
-            result = cursor.fetchone()
-            conn.close()
-
-            customer_fcm_token = result[0] if result else None
-            if not customer_fcm_token:
-                print("❌ No FCM token found for customer.")
-                return False
-
-            if not firebase_admin._apps:
-                print("❌ Firebase app is not initialized.")
-                return False
-
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title="Payment Method Added",
-                    body="Your credit card has been securely added to your account.",
-                ),
-                token=customer_fcm_token,
-            )
-
-            response = messaging.send(message)
-            print(f"✅ Firebase Notification Sent: {response}")
-            return True
-
-        except Exception as e:
-            print(f"❌ Firebase Notification Failed: {e}")
-            return False
@@ -1,15 +1,15 @@
-import sqlite3
-import os
-from PySide6.QtGui import QBrush, QColor
-from PySide6.QtWidgets import QMainWindow, QPushButton, QTableWidgetItem, QMessageBox, QHeaderView
+from PySide6.QtWidgets import QMainWindow, QPushButton, QMessageBox, QHeaderView, QAbstractItemView
 from PySide6.QtCore import QEvent, Qt, Signal
 from views.customeraccountui import Ui_CustomerAccount2
+from views.tickettable import TicketTableModel, TicketStatusDelegate, STATUS_COLUMN
 from controllers.customersearch import CustomerSearch
 from controllers.quickticket import QuickTicketWindow
 from controllers.detailedticket import DetailedTicketWindow
 from controllers.payment import PaymentWindow
 from controllers.moreinfo import MoreInfoDialog
-from controllers.config import get_db_path
+from models.database import get_connection
+from models import catalog
+from models.account import load_account_tickets, get_total_owed, apply_ticket_changes
 from views.utils import get_db_connection
 
 
@@ -28,8 +28,6 @@ class CustomerAccountWindow(QMainWindow):
         
         self.employee_id = employee_id
         
-        self.update_total_owed()
-        
         self.selected_tickets = set()
 
         self.detailed_ticket_window = None
@@ -59,21 +57,18 @@ class CustomerAccountWindow(QMainWindow):
         self.ui.PhoneNumberInput_2.editingFinished.connect(lambda: self.save_customer_data(2))
         self.ui.NotesInput_2.focusOutEvent = self.create_save_event(self.ui.NotesInput_2, lambda: self.save_customer_data(2))
 
-        if self.customer_id1:
-            self.load_tickets(self.customer_id1, self.ui.ctlist)
-        if self.customer_id2:
-            self.load_tickets(self.customer_id2, self.ui.ctlist_2)
-            
-        self.ui.ctlist.itemClicked.connect(lambda item: self.toggle_ticket_selection(item, 1))
-        self.ui.ctlist_2.itemClicked.connect(lambda item: self.toggle_ticket_selection(item, 2))
+        self.setup_ticket_list(self.ui.ctlist)
+        self.setup_ticket_list(self.ui.ctlist_2)
+        self.ui.ctlist.clicked.connect(lambda index: self.toggle_ticket_selection(index, 1))
+        self.ui.ctlist_2.clicked.connect(lambda index: self.toggle_ticket_selection(index, 2))
 
         self.ui.more_info_button_2.clicked.connect(self.open_more_info_dialog)
         self.ui.more_info_button.clicked.connect(self.open_more_info_dialog)
 
-        self.ui.ctlist.itemDoubleClicked.connect(
+        self.ui.ctlist.doubleClicked.connect(
             lambda: self.convert_selected_quick_ticket(self.ui.ctlist, self.customer_id1)
         )
-        self.ui.ctlist_2.itemDoubleClicked.connect(
+        self.ui.ctlist_2.doubleClicked.connect(
             lambda: self.convert_selected_quick_ticket(self.ui.ctlist_2, self.customer_id2)
         )
 
@@ -88,36 +83,60 @@ class CustomerAccountWindow(QMainWindow):
         self.ui.puandpbutton.clicked.connect(lambda: self.initiate_payment(mark_as_picked_up=True))
         self.ui.paybutton_2.clicked.connect(lambda: self.initiate_payment(mark_as_picked_up=False))
         self.ui.puandpbutton_2.clicked.connect(lambda: self.initiate_payment(mark_as_picked_up=True))
-        
-        if self.customer_id1:
-            self.load_tickets(self.customer_id1, self.ui.ctlist)
-            self.update_total_owed()
-        if self.customer_id2:
-            self.load_tickets(self.customer_id2, self.ui.ctlist_2)
-            self.update_total_owed()
             
+    def setup_ticket_list(self, ctlist):
+        """Attach a TicketTableModel and the Picked/Paid delegate to a ticket list view."""
+        ctlist.setModel(TicketTableModel(ctlist))
+        ctlist.setItemDelegateForColumn(STATUS_COLUMN, TicketStatusDelegate(ctlist))
+        ctlist.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        ctlist.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+    def ticket_model(self, page):
+        return (self.ui.ctlist if page == 1 else self.ui.ctlist_2).model()
+
     def get_current_customer_id(self):
         """Returns the active customer's ID based on the current page."""
         current_page = self.ui.pageswidget.currentIndex()
         return self.customer_id1 if current_page == 0 else self.customer_id2
             
     def mark_tickets_as_picked_up(self, customer_id, selected_ticket_data):
-        """Marks selected tickets as picked up in the database and refreshes the UI immediately."""
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
+        """Marks selected tickets as picked up in the database and patches just those rows."""
         try:
-            for ticket_number, _ in selected_ticket_data:
-                cursor.execute("UPDATE Tickets SET pickedup = 1 WHERE ticket_number = ?", (ticket_number,))
-            conn.commit()
+            change = apply_ticket_changes(
+                customer_id, [ticket_number for ticket_number, _ in selected_ticket_data], picked_up=True
+            )
         except Exception as e:
             QMessageBox.critical(self, "Database Error", f"Failed to update tickets as picked up: {e}")
-        finally:
-            conn.close()
+            return
+
+        self.apply_account_change(change)
+
+    def apply_account_change(self, change):
+        """Patch the changed ticket rows and the balance of one customer page (no reload)."""
+        if change.customer_id == self.customer_id1:
+            page, total_owed_display = 1, self.ui.totalowed
+        elif change.customer_id == self.customer_id2:
+            page, total_owed_display = 2, self.ui.totalowed_2
+        else:
+            return
 
-        # ✅ Refresh the UI immediately after marking as picked up
-        self.refresh_customer_account(customer_id)
+        model = self.ticket_model(page)
+        for ticket in change.tickets:
+            ticket_number = str(ticket["ticket_number"])
+            model.update_ticket(ticket_number, payment=ticket["payment"] or 0, pickedup=ticket["pickedup"] or 0)
+            model.set_selected(ticket_number, False)
+            self.selected_tickets.discard((page, ticket_number))
+
+        total_owed_display.setText(f"${change.total_owed:.2f}")
+
+    def selected_tickets_by_customer(self):
+        """Group the selected ticket numbers by the customer id of their page."""
+        grouped = {}
+        for page, ticket_number in self.selected_tickets:
+            customer_id = self.customer_id1 if page == 1 else self.customer_id2
+            if customer_id:
+                grouped.setdefault(customer_id, []).append(ticket_number)
+        return grouped
 
     def refresh_customer_account(self, customer_id):
         """Reloads the correct customer's ticket list immediately after payment or pickup."""
@@ -132,26 +151,28 @@ class CustomerAccountWindow(QMainWindow):
 
     def mark_tickets_as_paid_in_ui(self):
         """ Update UI after payment. """
+        ticket_numbers = [ticket_number for _, ticket_number in self.selected_tickets]
+        if not ticket_numbers:
+            return
+
+        # Fetch payment status for all selected tickets at once
+        conn = get_connection()
+        placeholders = ", ".join("?" for _ in ticket_numbers)
+        statuses = {
+            str(row["ticket_number"]): row
+            for row in conn.execute(f"""
+                SELECT ticket_number, CAST(payment AS INTEGER) AS payment, CAST(pickedup AS INTEGER) AS pickedup
+                FROM Tickets
+                WHERE ticket_number IN ({placeholders})
+            """, ticket_numbers)
+        }
+
         for page, ticket_number in self.selected_tickets:
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:
-                    # Fetch payment status from database
-                    db_path = get_db_path()
-                    conn = sqlite3.connect(db_path)
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT payment, pickedup FROM Tickets WHERE ticket_number = ?", (ticket_number,))
-                    payment, pickedup = cursor.fetchone()
-                    conn.close()
-
-                    # Update Picked/Paid Column
-                    status_text = ""
-                    if payment:
-                        status_text += "✓"  # Paid
-                    if pickedup:
-                        status_text += " ◯" if status_text else "◯"  # Picked Up
-
-                    ctlist.setItem(row, 0, QTableWidgetItem(status_text.strip()))
+            status = statuses.get(str(ticket_number))
+            if status:
+                self.ticket_model(page).update_ticket(
+                    ticket_number, payment=status["payment"] or 0, pickedup=status["pickedup"] or 0
+                )
 
 
     def mark_ticket_as_picked_up(self):
@@ -160,71 +181,19 @@ class CustomerAccountWindow(QMainWindow):
             QMessageBox.warning(self, "No Tickets Selected", "Select at least one ticket to mark as picked up.")
             return
 
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        for page, ticket_number in self.selected_tickets:
-            cursor.execute("UPDATE Tickets SET pickedup = 1 WHERE ticket_number = ?", (ticket_number,))
-
-            # Update UI
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:
-                    # Fetch updated payment status
-                    cursor.execute("SELECT payment FROM Tickets WHERE ticket_number = ?", (ticket_number,))
-                    payment = cursor.fetchone()[0]
-
-                    # Update Picked/Paid column
-                    status_text = "✓" if payment else ""
-                    status_text += " ◯" if status_text else "◯"  # Add the circle for picked up status
-
-                    ctlist.setItem(row, 0, QTableWidgetItem(status_text.strip()))
-
-        conn.commit()
-        conn.close()
+        for customer_id, ticket_numbers in self.selected_tickets_by_customer().items():
+            self.apply_account_change(apply_ticket_changes(customer_id, ticket_numbers, picked_up=True))
 
             
         
     def update_total_owed(self):
-        """Update the total amount owed and refresh ticket lists immediately."""
-        total_owed_page1 = 0.0
-        total_owed_page2 = 0.0
-
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        if self.customer_id1:
-            cursor.execute("""
-                SELECT SUM(total_price) 
-                FROM Tickets 
-                WHERE customer_id = ? AND payment = 0 
-            """, (self.customer_id1,))
-            result = cursor.fetchone()
-            total_owed_page1 = result[0] if result[0] is not None else 0.0
-
-        if self.customer_id2:
-            cursor.execute("""
-                SELECT SUM(total_price) 
-                FROM Tickets 
-                WHERE customer_id = ? AND payment = 0 
-            """, (self.customer_id2,))
-            result = cursor.fetchone()
-            total_owed_page2 = result[0] if result[0] is not None else 0.0
-
-        conn.close()
+        """Update the total amount owed for both pages (ticket lists are reloaded separately)."""
+        total_owed_page1 = get_total_owed(self.customer_id1) if self.customer_id1 else 0.0
+        total_owed_page2 = get_total_owed(self.customer_id2) if self.customer_id2 else 0.0
 
-        # ✅ Update the total owed immediately
         self.ui.totalowed.setText(f"${total_owed_page1:.2f}")
         self.ui.totalowed_2.setText(f"${total_owed_page2:.2f}")
 
-        # ✅ Refresh tickets immediately
-        if self.customer_id1:
-            self.load_tickets(self.customer_id1, self.ui.ctlist)
-        if self.customer_id2:
-            self.load_tickets(self.customer_id2, self.ui.ctlist_2)
-
 
     def get_customer_full_name(self, customer_id):
         """Retrieve the full name of the customer from the database."""
@@ -232,7 +201,6 @@ class CustomerAccountWindow(QMainWindow):
         cursor = conn.cursor()
         cursor.execute("SELECT first_name, last_name FROM customers WHERE id = ?", (customer_id,))
         result = cursor.fetchone()
-        conn.close()
         
         if result:
             return f"{result[0]} {result[1]}"  # Combine first and last name
@@ -250,35 +218,11 @@ class CustomerAccountWindow(QMainWindow):
             QMessageBox.warning(self, "No Payment Method", "Please select a payment method.")
             return
 
-        # Mark tickets as paid
-        for page, ticket_number in self.selected_tickets:
-            # Update the database to mark the ticket as paid (setting the payment status to 1)
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            db_path = os.path.join(project_root, 'models', 'pos_system.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("UPDATE Tickets SET payment = 1 WHERE ticket_number = ?", (ticket_number,))
-            
-            conn.commit()
-            conn.close()
-
-            # Update the ctlist to reflect the payment (Page 1 or Page 2)
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:  # Assuming column 4 has the ticket number
-                    # Mark payment as complete by coloring the row
-                    for col in range(ctlist.columnCount()):
-                        ctlist.item(row, col).setBackground(QBrush(QColor("#00002b")))  # Dark blue for paid
-                    # Set payment status to 1 (or some visual confirmation)
-                    ctlist.setItem(row, 8, QTableWidgetItem('1'))  # Assuming column 8 holds payment status
-                    break
-
-       
-        self.clear_selected_tickets()
+        # Mark tickets as paid (setting the payment status to 1)
+        for customer_id, ticket_numbers in self.selected_tickets_by_customer().items():
+            self.apply_account_change(apply_ticket_changes(customer_id, ticket_numbers, paid=True))
 
-        
-        self.update_total_owed()
+        self.clear_selected_tickets()
 
         QMessageBox.information(self, "Payment", "Payment has been processed successfully!")
         
@@ -293,15 +237,11 @@ class CustomerAccountWindow(QMainWindow):
         selected_ticket_data = []
 
         for page, ticket_number in self.selected_tickets:
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:
-                    ticket_cost = float(ctlist.item(row, 7).text().replace('$', ''))
-                    total_cost += ticket_cost
-                    selected_ticket_data.append((ticket_number, ticket_cost))
-                    break
-
-        self.update_total_owed()
+            ticket = self.ticket_model(page).ticket(ticket_number)
+            if ticket:
+                ticket_cost = float(ticket.total_price or 0)
+                total_cost += ticket_cost
+                selected_ticket_data.append((ticket_number, ticket_cost))
 
         # Open Payment Window with pickup flag
         self.payment_window = PaymentWindow(selected_ticket_data, total_cost, mark_as_picked_up=True, parent=self)
@@ -311,36 +251,24 @@ class CustomerAccountWindow(QMainWindow):
 
     def clear_selected_tickets(self):
         """ Clears selected tickets and unhighlights them. """
-        for page, ticket_number in self.selected_tickets:
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:
-                    # Unhighlight ticket
-                    for col in range(ctlist.columnCount()):
-                        ctlist.item(row, col).setBackground(QBrush(QColor(255, 255, 255)))  # Reset to default color
-
-
-                    break
-        # Clear the selection
+        self.ui.ctlist.model().clear_selection()
+        self.ui.ctlist_2.model().clear_selection()
         self.selected_tickets.clear()
         
 
-    def toggle_ticket_selection(self, item, page):
+    def toggle_ticket_selection(self, index, page):
         """ Toggle the selection of a ticket (highlight/unhighlight and add/remove from selected list). """
-        row = item.row()
-        ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-        ticket_number = ctlist.item(row, 4).text()  # Assuming ticket number is in column 4
+        ticket = self.ticket_model(page).ticket_at(index.row())
+        if ticket is None:
+            return
+        ticket_number = ticket.ticket_number
 
         if (page, ticket_number) in self.selected_tickets:
-            # Deselect ticket: remove from selected list and unhighlight
             self.selected_tickets.remove((page, ticket_number))
-            for column in range(ctlist.columnCount()):
-                ctlist.item(row, column).setBackground(QBrush(QColor(0, 0, 0)))  # Reset to black
+            self.ticket_model(page).set_selected(ticket_number, False)
         else:
-            # Select ticket: add to selected list and highlight
             self.selected_tickets.add((page, ticket_number))
-            for column in range(ctlist.columnCount()):
-                ctlist.item(row, column).setBackground(QBrush(QColor(255, 0, 0)))  # Highlight in red
+            self.ticket_model(page).set_selected(ticket_number, True)
         
     def initiate_payment(self, mark_as_picked_up=False):
         """Initiate payment for selected tickets, handling both 'Pay' and 'Pick Up & Pay' buttons."""
@@ -352,28 +280,22 @@ class CustomerAccountWindow(QMainWindow):
         total_cost = 0
         selected_ticket_data = []
 
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        
         for page, ticket_number in self.selected_tickets:
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:  # Column 4 contains ticket number
-                    cursor.execute("SELECT payment FROM Tickets WHERE ticket_number = ?", (ticket_number,))
-                    is_paid = cursor.fetchone()[0]
+            ticket = self.ticket_model(page).ticket(ticket_number)
+            if ticket is None:
+                continue
 
-                    if is_paid:
-                        QMessageBox.warning(self, "Already Paid", f"Ticket {ticket_number} has already been paid.")
-                        continue  # Skip already paid tickets
+            if ticket.is_quick:
+                QMessageBox.warning(self, "Quick Ticket", f"Ticket {ticket_number} is a quick ticket and has no price yet.")
+                continue
 
-                    ticket_cost = float(ctlist.item(row, 7).text().replace('$', ''))  # Column 7 contains total cost
-                    total_cost += ticket_cost
-                    selected_ticket_data.append((ticket_number, ticket_cost))
-                    break
+            if ticket.payment:
+                QMessageBox.warning(self, "Already Paid", f"Ticket {ticket_number} has already been paid.")
+                continue  # Skip already paid tickets
 
-        conn.close()
+            ticket_cost = float(ticket.total_price or 0)
+            total_cost += ticket_cost
+            selected_ticket_data.append((ticket_number, ticket_cost))
 
         if not selected_ticket_data:
             QMessageBox.warning(self, "No Valid Tickets", "All selected tickets are already paid.")
@@ -393,35 +315,19 @@ class CustomerAccountWindow(QMainWindow):
         :param ticket_number: The number of the ticket to update.
         :param status: The new status of the ticket (e.g., 'Paid', 'Picked Up').
         """
-        # Look for the ticket in both Page 1 and Page 2's ticket lists
+        changes = {"location": status}
+        if status == 'Paid':
+            changes["payment"] = 1
+        elif status == 'Picked Up':
+            changes["pickedup"] = 1
+
         for ctlist in [self.ui.ctlist, self.ui.ctlist_2]:
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == str(ticket_number):  # Assuming ticket number is in column 4
-                    # Update the status in column 5 (or whichever column represents the status)
-                    ctlist.setItem(row, 5, QTableWidgetItem(status))
-                    
-                    # Optionally, change the background color or provide some other visual indication
-                    if status == 'Paid':
-                        for col in range(ctlist.columnCount()):
-                            ctlist.item(row, col).setBackground(QBrush(QColor("#00002b")))  # Dark blue for paid
-
-
-                    elif status == 'Picked Up':
-                        ctlist.setItem(row, 0, QTableWidgetItem('✓'))  # Add checkmark for picked up
-                    break
+            ctlist.model().update_ticket(ticket_number, **changes)
                 
     def cancel_selection(self):
         """ Cancel all ticket selections and reset highlights. """
-        for page, ticket_number in self.selected_tickets:
-            ctlist = self.ui.ctlist if page == 1 else self.ui.ctlist_2
-            for row in range(ctlist.rowCount()):
-                if ctlist.item(row, 4).text() == ticket_number:
-                    for column in range(ctlist.columnCount()):
-                        ctlist.item(row, column).setBackground(QBrush(QColor(0, 0, 0)))  # Reset to black
-
-
-        self.selected_tickets.clear()
-        self.update_total_owed()  # Call this after relevant events such as payment or ticket pickup
+        self.clear_selected_tickets()
+        self.update_total_owed()
 
 
     def keyPressEvent(self, event):
@@ -435,98 +341,7 @@ class CustomerAccountWindow(QMainWindow):
     def load_tickets(self, customer_id, ctlist):
         if not customer_id:
             return
-
-        def create_item(text):
-            item = QTableWidgetItem(text)
-            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            return item
-
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT ticket_number, ticket_type_id, date_created, date_due, total_price, pieces, payment, pickedup
-            FROM Tickets
-            WHERE customer_id = ?
-        """, (customer_id,))
-        detailed_tickets = cursor.fetchall()
-
-        cursor.execute("""
-            SELECT ticket_number, ticket_type_id1, date_created, due_date1, pieces1, pieces2, pieces3, converted
-            FROM quick_tickets
-            WHERE customer_id = ? AND converted = 0
-        """, (customer_id,))
-        quick_tickets = cursor.fetchall()
-
-        conn.close()
-
-        ctlist.setRowCount(0)
-
-        for ticket in detailed_tickets:
-            ticket_number, ticket_type_id, date_created, date_due, total_price, pieces, payment, pickedup = ticket
-            row_position = ctlist.rowCount()
-            ctlist.insertRow(row_position)
-
-            status_text = ""
-            if payment:
-                status_text += "✓"
-            if pickedup:
-                status_text += " ◯" if status_text else "◯"
-
-            ctlist.setItem(row_position, 0, create_item(status_text.strip()))
-            ctlist.setItem(row_position, 1, create_item(self.get_ticket_type_name(ticket_type_id) if ticket_type_id else "Unknown"))
-            ctlist.setItem(row_position, 2, create_item(date_created))
-            ctlist.setItem(row_position, 3, create_item(date_due))
-            ctlist.setItem(row_position, 4, create_item(str(ticket_number)))
-            ctlist.setItem(row_position, 5, create_item("N/A"))
-            ctlist.setItem(row_position, 6, create_item(str(pieces)))
-            ctlist.setItem(row_position, 7, create_item(f"${total_price:.2f}"))
-
-            if payment:
-                for col in range(ctlist.columnCount()):
-                    ctlist.item(row_position, col).setBackground(QBrush(QColor("#00002b")))
-
-        for ticket in quick_tickets:
-            ticket_number, ticket_type_id, date_created, due_date, pieces1, pieces2, pieces3, converted = ticket
-            estimated_pieces = sum(filter(None, [pieces1, pieces2, pieces3]))
-            row_position = ctlist.rowCount()
-            ctlist.insertRow(row_position)
-
-            # Create a QTableWidgetItem for the first column and attach ticket data to it.
-            item = create_item("")
-            # Create a dictionary of the ticket data so you can reference it later.
-            ticket_data = {
-                "ticket_number": ticket_number,
-                "ticket_type_id1": ticket_type_id,
-                "date_created": date_created,
-                "due_date1": due_date,
-                "pieces1": pieces1,
-                "pieces2": pieces2,
-                "pieces3": pieces3,
-                "converted": converted,
-            }
-            item.setData(Qt.UserRole, ticket_data)
-            ctlist.setItem(row_position, 0, item)
-
-            ctlist.setItem(row_position, 1, create_item("Quick Ticket"))
-            ctlist.setItem(row_position, 2, create_item(date_created))
-            ctlist.setItem(row_position, 3, create_item(due_date))
-            ctlist.setItem(row_position, 4, create_item(str(ticket_number)))
-            ctlist.setItem(row_position, 5, create_item("N/A"))
-            ctlist.setItem(row_position, 6, create_item(str(estimated_pieces)))
-            ctlist.setItem(row_position, 7, create_item(""))
-
-            # If the ticket has been converted, shade the row.
-            if converted:
-                for col in range(ctlist.columnCount()):
-                    ctlist.item(row_position, col).setBackground(QBrush(QColor("#CCCCCC")))
-
-            header = ctlist.horizontalHeader()
-            for col in range(ctlist.columnCount()):
-                header.setSectionResizeMode(col, QHeaderView.Stretch)
-
-            ctlist.resizeRowsToContents()
+        ctlist.model().set_tickets(load_account_tickets(customer_id))
 
         
     def load_customer_tickets(self, customer_id1=None, customer_id2=None, ctlist1=None, ctlist2=None):
@@ -534,28 +349,16 @@ class CustomerAccountWindow(QMainWindow):
         if customer_id1 and ctlist1:
             self.load_tickets(customer_id1, ctlist1)
         elif ctlist1:
-            ctlist1.setRowCount(0)  # Clear if no valid customer_id1
+            ctlist1.model().clear()  # Clear if no valid customer_id1
 
         if customer_id2 and ctlist2:
             self.load_tickets(customer_id2, ctlist2)
         elif ctlist2:
-            ctlist2.setRowCount(0)  # Clear if no valid customer_id2
-
-        # Force UI update to reflect changes immediately
-        if ctlist1:
-            ctlist1.viewport().update()
-        if ctlist2:
-            ctlist2.viewport().update()
+            ctlist2.model().clear()  # Clear if no valid customer_id2
 
 
     def populate_ticket_type_buttons(self):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, name FROM TicketTypes")
-        ticket_types = cursor.fetchall()
+        ticket_types = [(row["id"], row["name"]) for row in catalog.ticket_types()]
 
         layout1 = self.ui.tickettypebuttongrid
         layout2 = self.ui.tickettypebuttongrid_2
@@ -582,8 +385,6 @@ class CustomerAccountWindow(QMainWindow):
                 col2 = 0
                 row2 += 1
 
-        conn.close()
-
     def create_save_event(self, widget, save_function):
         original_focus_out_event = widget.focusOutEvent
 
@@ -634,7 +435,7 @@ class CustomerAccountWindow(QMainWindow):
         self.ui.NotesInput.clear()
         self.customer_id1 = None
         self.customer_data1 = {}
-        self.ui.ctlist.setRowCount(0)
+        self.ui.ctlist.model().clear()
 
 
     def clear_customer_data_page2(self):
@@ -644,12 +445,10 @@ class CustomerAccountWindow(QMainWindow):
         self.ui.NotesInput_2.clear()
         self.customer_id2 = None
         self.customer_data2 = {}
-        self.ui.ctlist_2.setRowCount(0)
+        self.ui.ctlist_2.model().clear()
 
     def save_customer_data(self, page):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
+        conn = get_connection()
         cursor = conn.cursor()
 
         customer_id = getattr(self, f'customer_id{page}')
@@ -690,7 +489,6 @@ class CustomerAccountWindow(QMainWindow):
             setattr(self, f'customer_id{page}', cursor.lastrowid)
 
         conn.commit()
-        conn.close()
 
     def show_page1(self):
         self.ui.pageswidget.setCurrentIndex(0)
@@ -758,32 +556,15 @@ class CustomerAccountWindow(QMainWindow):
 
 
     def get_ticket_type_name(self, ticket_type_id):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute("SELECT name FROM TicketTypes WHERE id = ?", (ticket_type_id,))
-            result = cursor.fetchone()
-
-            if result:
-                return result[0]
-            else:
-                return None
-        except Exception as e:
-            print(f"Error retrieving ticket type name: {e}")
-            return None
-        finally:
-            conn.close()
+        return catalog.ticket_types().name(ticket_type_id)
 
     def convert_selected_quick_ticket(self, ctlist, customer_id):
-        selected_row = ctlist.currentRow()
-        if selected_row < 0:
+        index = ctlist.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "No Selection", "Please select a quick ticket to convert.")
             return
 
-        ticket_data = ctlist.item(selected_row, 0).data(Qt.UserRole)
+        ticket_data = ctlist.model().ticket_at(index.row()).quick_data
         if not ticket_data:
             QMessageBox.warning(self, "Invalid Selection", "The selected item is not a valid quick ticket.")
             return
@@ -794,11 +575,8 @@ class CustomerAccountWindow(QMainWindow):
             return
 
         quick_ticket_number = ticket_data.get('ticket_number')
-        
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
 
-        with sqlite3.connect(db_path) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute("""
@@ -845,16 +623,7 @@ class CustomerAccountWindow(QMainWindow):
             QMessageBox.warning(self, "Data Error", f"Missing key in ticket data: {e}")
 
     def get_ticket_type_id(self, ticket_type_name):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id FROM TicketTypes WHERE name = ?", (ticket_type_name,))
-        result = cursor.fetchone()
-        conn.close()
-
-        return result[0] if result else None
+        return catalog.ticket_types().id_for(ticket_type_name)
 
     def on_ticket_completed(self, customer_id):
         if customer_id == self.customer_id1:
@@ -1,9 +1,9 @@
 import sys
-import sqlite3
-import os
 from PySide6.QtWidgets import QApplication, QDialog, QTreeWidgetItem, QAbstractItemView
 from PySide6.QtCore import Signal, Slot, Qt
 from views.customersearchui import Ui_CustomerSearch
+from models.database import get_connection
+from models.customer_search import search_customers
 
 class CustomerSearch(QDialog, Ui_CustomerSearch):
     customer_selected = Signal(dict)
@@ -36,21 +36,8 @@ class CustomerSearch(QDialog, Ui_CustomerSearch):
 
     @Slot()
     def search_customers(self):
-        # Fetch search results from the database
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        query = """
-        SELECT id, first_name, last_name, phone_number, notes
-        FROM customers
-        WHERE first_name LIKE ? OR last_name LIKE ? OR phone_number LIKE ?
-        """
-        
-        search_term = f"%{self.searchinput.text()}%"
-        cursor.execute(query, (search_term, search_term, search_term))
-        search_results = cursor.fetchall()
+        # Fetch ranked matches from the customer full-text index
+        search_results = search_customers(get_connection(), self.searchinput.text())
         
         self.resultslist.clear()
         for result in search_results:
@@ -63,8 +50,6 @@ class CustomerSearch(QDialog, Ui_CustomerSearch):
                 "notes": result[4]
             })
             self.resultslist.addTopLevelItem(item)
-        
-        conn.close()
 
     @Slot(QTreeWidgetItem, int)
     def select_customer(self, item, column):
@@ -2,6 +2,7 @@ from PySide6.QtWidgets import QDialog, QListWidgetItem, QMessageBox, QCheckBox
 from PySide6.QtGui import Qt
 from views.employeecreationui import Ui_Employee_Creation
 from views.utils import hash_password, get_db_connection
+from models import permissions
 
 
 class EmployeeCreationDialog(QDialog):
@@ -43,7 +44,6 @@ class EmployeeCreationDialog(QDialog):
             item.setCheckState(Qt.Unchecked)
             self.ui.roleslist.addItem(item)
         self.ui.roleslist.itemClicked.connect(self.update_permissions_based_on_role)
-        conn.close()
 
     def load_permissions(self):
         while self.ui.permissions_layout.count():
@@ -60,7 +60,6 @@ class EmployeeCreationDialog(QDialog):
             checkbox.setProperty("permission_id", permission_id)
             checkbox.stateChanged.connect(self.handle_custom_role)
             self.ui.permissions_layout.addWidget(checkbox)
-        conn.close()
 
     def update_permissions_based_on_role(self, item):
         """Auto-check permissions based on the selected role."""
@@ -82,7 +81,6 @@ class EmployeeCreationDialog(QDialog):
                 WHERE r.name = ?
             """, (item.text(),))
             role_permissions = {perm[0] for perm in cursor.fetchall()}
-            conn.close()
 
             # Auto-check permissions for the role
             for i in range(self.ui.permissions_layout.count()):
@@ -119,7 +117,6 @@ class EmployeeCreationDialog(QDialog):
                 WHERE r.name = ?
             """, (selected_role,))
             role_permissions = {perm[0] for perm in cursor.fetchall()}
-            conn.close()
 
             for i in range(self.ui.permissions_layout.count()):
                 widget = self.ui.permissions_layout.itemAt(i).widget()
@@ -168,7 +165,6 @@ class EmployeeCreationDialog(QDialog):
                 if isinstance(widget, QCheckBox):
                     widget.setChecked(widget.property("permission_id") in permissions)
 
-        conn.close()
 
     def save_employee(self):
         display_name = self.ui.empdisplayname.text()
@@ -238,7 +234,8 @@ class EmployeeCreationDialog(QDialog):
             """, (self.employee_id, permission_id))
 
         conn.commit()
-        conn.close()
+        # The triggers already bumped the version; this makes the change visible here at once
+        permissions.invalidate()
 
         QMessageBox.information(self, "Success", "Employee saved successfully!")
         self.accept()
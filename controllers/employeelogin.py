@@ -5,7 +5,9 @@ from PySide6.QtWidgets import QDialog, QMessageBox
 from views.employeeloginui import Ui_EmployeeLogin
 from controllers.customeraccount import CustomerAccountWindow
 from PySide6.QtWidgets import QApplication
-from views.utils import check_password, get_employee_permissions
+from PySide6.QtCore import Qt, Signal
+from views.utils import get_employee_permissions
+from models.passwords import submit_check, PasswordPoolBusy
 
 # Database connection
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -14,6 +16,9 @@ conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
 
 class EmployeeLogin(QDialog):
+    # Carries the finished password check from the pool thread back to the UI thread
+    _password_checked = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.ui = Ui_EmployeeLogin()
@@ -28,6 +33,10 @@ class EmployeeLogin(QDialog):
         self.logged_in_employee_id = None  
         self.logged_in_permissions = set()  
 
+        self._pending_login = None
+        self._login_button_text = self.ui.LoginButton.text()
+        self._password_checked.connect(self.finish_login)
+
     def login(self):
         employee_name = self.ui.EmployeeNameLogin.text()
         password = self.ui.EmployeePassword.text()
@@ -44,16 +53,54 @@ class EmployeeLogin(QDialog):
             cursor.execute("SELECT employee_id, password_hash FROM Employees WHERE employee_name=?", (employee_name,))
             result = cursor.fetchone()
 
-            if result and check_password(password, result[1]):
-                self.logged_in_employee_id = result[0]  # Store employee ID
-                self.logged_in_permissions = get_employee_permissions(self.logged_in_employee_id)
-                QMessageBox.information(self, "Login Successful", f"Welcome, {employee_name}!")
-                self.accept() 
-            else:
+            if not result:
                 QMessageBox.warning(self, "Login Failed", "Invalid employee name or password.")
-        
+                return
+
+            # bcrypt takes a while; verify on the password pool and keep the dialog
+            # responsive. wait=0: if the pool is full, say so instead of blocking the UI
+            future = submit_check(password, result[1], wait=0)
+        except PasswordPoolBusy as e:
+            QMessageBox.warning(self, "Login Busy", str(e))
+            return
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred during login: {e}")
+            return
+
+        self._pending_login = (result[0], employee_name)
+        self.set_busy(True)
+        future.add_done_callback(self._password_checked.emit)
+
+    def set_busy(self, busy):
+        """Show that a login is being verified and block a second click meanwhile."""
+        self.ui.LoginButton.setEnabled(not busy)
+        self.ui.LoginButton.setText("Signing in..." if busy else self._login_button_text)
+        self.ui.EmployeeNameLogin.setEnabled(not busy)
+        self.ui.EmployeePassword.setEnabled(not busy)
+        if busy:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+
+    def finish_login(self, future):
+        """Runs on the UI thread once the password pool has an answer."""
+        self.set_busy(False)
+        employee_id, employee_name = self._pending_login
+        self._pending_login = None
+
+        try:
+            valid = future.result()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"An error occurred during login: {e}")
+            return
+
+        if valid:
+            self.logged_in_employee_id = employee_id  # Store employee ID
+            self.logged_in_permissions = get_employee_permissions(self.logged_in_employee_id)
+            QMessageBox.information(self, "Login Successful", f"Welcome, {employee_name}!")
+            self.accept()
+        else:
+            QMessageBox.warning(self, "Login Failed", "Invalid employee name or password.")
 
     def logout(self):
         if self.logged_in_employee_id is not None:
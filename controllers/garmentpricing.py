@@ -1,74 +1,82 @@
-import sqlite3
-import os
-from PySide6.QtWidgets import QMainWindow, QTreeWidgetItem, QApplication, QMessageBox
+from collections import defaultdict
+
+from PySide6.QtWidgets import QMainWindow, QTreeWidgetItem, QApplication, QMessageBox, QPushButton
 from views.garmentpricingui import Ui_garmentpricing  
-from PySide6.QtCore import Qt
+from models import catalog, pricing
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QFont
+
+# Current saved price of a variant item; garment items hold None
+PRICE_ROLE = Qt.UserRole + 1
 
 class GarmentPricingWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.ui = Ui_garmentpricing()
         self.ui.setupUi(self)
+
+        # Bulk edit: Set Price only stages prices and Save All writes them together
+        self.bulk_edit = QPushButton("Bulk Edit", self.ui.centralwidget)
+        self.bulk_edit.setGeometry(QRect(480, 430, 121, 41))
+        self.bulk_edit.setCheckable(True)
+        self.save_all = QPushButton("Save All", self.ui.centralwidget)
+        self.save_all.setGeometry(QRect(480, 490, 121, 41))
+        self.save_all.setEnabled(False)
         
         self.ui.setprice.clicked.connect(self.set_price)
         self.ui.garmentvariationlist.itemClicked.connect(self.on_item_clicked)
+        self.bulk_edit.toggled.connect(self.on_bulk_edit_toggled)
+        self.save_all.clicked.connect(self.save_pending)
         
         self.selected_item = None
+        self.variant_items = {}
+        self.pending = {}
         self.load_garments_and_variations()
 
     def load_garments_and_variations(self):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT g.id, g.name, g.image_path
-            FROM Garments g
-        """)
-        
-        garments = cursor.fetchall()
-        for garment in garments:
-            garment_id, garment_name, garment_image_path = garment
-            garment_item = QTreeWidgetItem([f"{garment_name}"])
-            garment_item.setData(0, Qt.UserRole, (garment_id, None))
-            self.ui.garmentvariationlist.addTopLevelItem(garment_item)
-
-            cursor.execute("""
-                SELECT v.id, v.name, v.price
-                FROM GarmentVariants v
-                WHERE v.garment_id = ?
-            """, (garment_id,))
-            
-            variations = cursor.fetchall()
-            for variation in variations:
-                variation_id, variation_name, variation_price = variation
-                variation_item = QTreeWidgetItem([f"{variation_name} - ${variation_price:.2f}"])
-                variation_item.setData(0, Qt.UserRole, (garment_id, variation_id))
+        """Build the garment/variant tree from the shared catalog cache."""
+        variants_by_garment = defaultdict(list)
+        for variant in catalog.garment_variants():
+            variants_by_garment[variant["garment_id"]].append(variant)
+
+        tree = self.ui.garmentvariationlist
+        tree.clear()
+        self.variant_items = {}
+        for garment in catalog.garments():
+            garment_item = QTreeWidgetItem([f"{garment['name']}"])
+            garment_item.setData(0, Qt.UserRole, (garment["id"], None))
+            garment_item.setData(0, PRICE_ROLE, None)
+            tree.addTopLevelItem(garment_item)
+
+            for variant in variants_by_garment[garment["id"]]:
+                variation_item = QTreeWidgetItem()
+                variation_item.setData(0, Qt.UserRole, (garment["id"], variant["id"]))
+                variation_item.setData(0, PRICE_ROLE, variant["price"])
                 garment_item.addChild(variation_item)
+                self.variant_items[variant["id"]] = variation_item
+                self.render_variant(variation_item)
 
-        conn.close()
+    def render_variant(self, item):
+        """Show a variant's saved price, or its staged price in bold with a *."""
+        _, variant_id = item.data(0, Qt.UserRole)
+        name = catalog.garment_variants().name(variant_id, "")
+        if variant_id in self.pending:
+            item.setText(0, f"{name} - ${self.pending[variant_id]:.2f} *")
+        else:
+            item.setText(0, f"{name} - ${item.data(0, PRICE_ROLE):.2f}")
+        font = QFont(item.font(0))
+        font.setBold(variant_id in self.pending)
+        item.setFont(0, font)
 
     def on_item_clicked(self, item):
         self.selected_item = item
-        garment_id, variant_id = item.data(0, Qt.UserRole)
-        
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        _, variant_id = item.data(0, Qt.UserRole)
 
         if variant_id is None:
             self.ui.price.setText("0.00")
         else:
-            cursor.execute("SELECT price FROM GarmentVariants WHERE id = ?", (variant_id,))
-            result = cursor.fetchone()
-            if result:
-                self.ui.price.setText(f"{result[0]:.2f}")
-            else:
-                self.ui.price.setText("0.00")
-        
-        conn.close()
+            price = self.pending.get(variant_id, item.data(0, PRICE_ROLE))
+            self.ui.price.setText(f"{price:.2f}")
 
     def set_price(self):
         if self.selected_item is None:
@@ -77,26 +85,118 @@ class GarmentPricingWindow(QMainWindow):
         
         garment_id, variant_id = self.selected_item.data(0, Qt.UserRole)
         try:
-            new_price = float(self.ui.price.text())
+            new_price = round(float(self.ui.price.text()), 2)
         except ValueError:
             QMessageBox.warning(self, "Invalid Price", "Please enter a valid price.")
             return
+        if new_price < 0:
+            QMessageBox.warning(self, "Invalid Price", "Prices cannot be negative.")
+            return
 
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        if self.bulk_edit.isChecked():
+            # A garment stages the price for every one of its variations
+            if variant_id is None:
+                items = [self.selected_item.child(i) for i in range(self.selected_item.childCount())]
+            else:
+                items = [self.selected_item]
+            for item in items:
+                self.stage_price(item, new_price)
+            self.save_all.setEnabled(bool(self.pending))
+            return
 
         if variant_id is None:
             QMessageBox.warning(self, "Invalid Selection", "Please select a variation to set the price.")
             return
+
+        changes = pricing.plan_price_changes(prices={variant_id: new_price})
+        if changes and not self.confirm_and_apply(changes):
+            return
+
+        self.selected_item.setData(0, PRICE_ROLE, new_price)
+        self.render_variant(self.selected_item)
+
+    def stage_price(self, item, new_price):
+        """Remember a bulk-edit price for a variant item; staging its saved price unstages it."""
+        _, variant_id = item.data(0, Qt.UserRole)
+        if new_price == item.data(0, PRICE_ROLE):
+            self.pending.pop(variant_id, None)
         else:
-            cursor.execute("UPDATE GarmentVariants SET price = ? WHERE id = ?", (new_price, variant_id))
-        
-        conn.commit()
-        conn.close()
+            self.pending[variant_id] = new_price
+        self.render_variant(item)
+
+    def save_pending(self):
+        """Write every staged price in one transaction."""
+        if not self.pending:
+            return
+        try:
+            changes = pricing.plan_price_changes(prices=self.pending)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Price", str(e))
+            return
+        if changes and not self.confirm_and_apply(changes):
+            return
 
-        self.selected_item.setText(0, f"{self.selected_item.text(0).split(' - ')[0]} - ${new_price:.2f}")
+        saved = self.pending
+        self.pending = {}
+        for variant_id, new_price in saved.items():
+            item = self.variant_items.get(variant_id)
+            if item is not None:
+                item.setData(0, PRICE_ROLE, new_price)
+                self.render_variant(item)
+        self.save_all.setEnabled(False)
+        QMessageBox.information(self, "Prices Saved", f"Saved {len(changes)} price change(s).")
+
+    def on_bulk_edit_toggled(self, checked):
+        self.ui.setprice.setText("Stage Price" if checked else "Set Price")
+        if checked or not self.pending:
+            return
+
+        reply = QMessageBox.question(
+            self, "Unsaved Prices",
+            f"{len(self.pending)} staged price(s) have not been saved. Save them now?",
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Save,
+        )
+        if reply == QMessageBox.Save:
+            self.save_pending()
+        if reply == QMessageBox.Cancel or self.pending and reply == QMessageBox.Save:
+            # Stay in bulk edit; nothing was lost
+            self.bulk_edit.blockSignals(True)
+            self.bulk_edit.setChecked(True)
+            self.bulk_edit.blockSignals(False)
+            self.ui.setprice.setText("Stage Price")
+            return
+
+        discarded = list(self.pending)
+        self.pending = {}
+        for variant_id in discarded:
+            self.render_variant(self.variant_items[variant_id])
+        self.save_all.setEnabled(False)
+
+    def confirm_and_apply(self, changes):
+        """
+        Save price changes. If open tickets contain the variants, show the
+        dry-run diff and let the user choose whether those tickets are repriced.
+        Returns False if the user cancelled.
+        """
+        try:
+            diffs = pricing.change_prices(changes, dry_run=True)
+            reprice = False
+            if diffs:
+                reply = QMessageBox.question(
+                    self, "Update Open Tickets",
+                    f"{len(diffs)} open ticket(s) contain these garments.\n"
+                    f"Reprice them too? Their totals change by "
+                    f"${sum(d.new_total - (d.old_total or 0) for d in diffs):+.2f} in all.",
+                    QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.No,
+                )
+                if reply == QMessageBox.Cancel:
+                    return False
+                reprice = reply == QMessageBox.Yes
+            pricing.change_prices(changes, reprice_tickets=reprice)
+        except Exception as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to save prices: {e}")
+            return False
+        return True
 
 if __name__ == "__main__":
     import sys
@@ -4,6 +4,7 @@ from PySide6.QtWidgets import QMainWindow, QColorDialog, QFileDialog, QListWidge
 from PySide6.QtGui import QPixmap, QIcon, QColor
 from PySide6.QtCore import Qt
 from views.garmentscolorsui import  Ui_GarmentandColorCreation
+from models import catalog
 
 class GarmentsColorsWindow(QMainWindow):
     def __init__(self):
@@ -84,6 +85,7 @@ class GarmentsColorsWindow(QMainWindow):
         try:
             cursor.execute("INSERT INTO Colors (name, value) VALUES (?, ?)", (color_name, self.selected_color))
             conn.commit()
+            catalog.invalidate("colors")
 
             item = QListWidgetItem(color_name)
             item.setBackground(QColor(self.selected_color))
@@ -140,6 +142,7 @@ class GarmentsColorsWindow(QMainWindow):
                 cursor.execute("INSERT INTO GarmentVariants (garment_id, name, price) VALUES (?, ?, 0)", (garment_id, variation))
 
             conn.commit()
+            catalog.invalidate("garments", "garment_variants")
 
             garment_item = QListWidgetItem(garment_name)
             garment_item.setIcon(QIcon(QPixmap(self.selected_image)))
@@ -206,6 +209,7 @@ class GarmentsColorsWindow(QMainWindow):
         cursor.execute("DELETE FROM GarmentVariants WHERE garment_id = ?", (garment_id,))
         
         conn.commit()
+        catalog.invalidate("garments", "garment_variants")
         conn.close()
         
         self.ui.sglist.takeItem(self.ui.sglist.row(selected_item))
@@ -225,6 +229,7 @@ class GarmentsColorsWindow(QMainWindow):
         cursor.execute("DELETE FROM Colors WHERE id = ?", (color_id,))
         
         conn.commit()
+        catalog.invalidate("colors")
         conn.close()
         
         self.ui.sclist.takeItem(self.ui.sclist.row(selected_item))
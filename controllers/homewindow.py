@@ -12,6 +12,7 @@ from controllers.customeraccount import CustomerAccountWindow
 from controllers.garmentpricing import GarmentPricingWindow
 from controllers.quickticket import QuickTicketWindow
 from controllers.employeelist import EmployeeListWindow
+from models import catalog
 
 
 class MainWindow(QMainWindow):
@@ -162,16 +163,7 @@ class MainWindow(QMainWindow):
         Returns:
             int: The ID of the ticket type, or None if not found.
         """
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id FROM TicketTypes WHERE name = ?", (ticket_type_name,))
-        result = cursor.fetchone()
-        conn.close()
-
-        return result[0] if result else None
+        return catalog.ticket_types().id_for(ticket_type_name)
 
     def on_ticket_completed(self, customer_id):
         """
@@ -8,11 +8,19 @@ sys.path.append(project_root)
 
 from controllers.homewindow import MainWindow
 from controllers.employeelogin import EmployeeLogin  # Import the EmployeeLogin
+from models.migrations import run_migrations
+from models import outbox
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
+    # Bring the database schema up to date before any window touches it
+    run_migrations()
+
+    # Customer emails and pushes are queued by the windows and sent in the background
+    outbox.start_dispatcher()
+
     # Initialize and show the employee login window
     login_window = EmployeeLogin()
     if login_window.exec() == QDialog.Accepted:
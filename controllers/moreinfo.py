@@ -1,11 +1,10 @@
 import sqlite3
 import stripe
 from PySide6.QtWidgets import QDialog, QMessageBox
-from firebase_admin import messaging
 from views.moreinfoui import Ui_MoreInfoDialog  
 from api.models import get_db_connection
 from controllers.config import STRIPE_SECRET_KEY
-from views.utils import send_email  
+from views.utils import send_email, send_firebase_notification
 
 stripe.api_key = STRIPE_SECRET_KEY
 
@@ -250,9 +249,9 @@ class MoreInfoDialog(QDialog):
         email, _ = self.get_customer_details()
         if email:
             if send_email(email, "Subject: Customer Notification", "This is a test message."):
-                QMessageBox.information(self, "Email Sent", f"Email sent to {email}.")
+                QMessageBox.information(self, "Email Queued", f"Email to {email} will be sent shortly.")
             else:
-                QMessageBox.warning(self, "Email Failed", "Failed to send email. Check configuration.")
+                QMessageBox.warning(self, "Email Failed", "Failed to queue email.")
         else:
             QMessageBox.warning(self, "No Email", "Customer does not have an email on file.")
 
@@ -269,16 +268,9 @@ class MoreInfoDialog(QDialog):
                 return
 
             fcm_token = result[0]
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title="Order Update",
-                    body="Your order is ready for pickup."
-                ),
-                token=fcm_token
-            )
-            response = messaging.send(message)
+            send_firebase_notification(fcm_token, "Order Update", "Your order is ready for pickup.")
 
-            QMessageBox.information(self, "Notification Sent", f"Notification sent successfully: {response}")
+            QMessageBox.information(self, "Notification Queued", "The notification will be sent to the customer's device shortly.")
 
         except Exception as e:
             QMessageBox.critical(self, "Firebase Error", f"Failed to send notification: {e}")
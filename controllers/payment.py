@@ -1,10 +1,11 @@
-import sqlite3
 import stripe
 import webbrowser
 from PySide6.QtWidgets import QDialog, QMessageBox
-from views.utils import get_db_path, get_stripe_customer_id_and_email,\
+from views.utils import get_stripe_customer_id_and_email,\
     get_db_connection, create_stripe_customer
 from views.paymentui import Ui_payment
+from models.account import apply_ticket_changes
+from models import catalog, pricing
 
 stripe.api_key = "YOUR_STRIPE_SECRET_KEY"  
 
@@ -23,7 +24,7 @@ class PaymentWindow(QDialog):
         self.ui.taxes_display.setText("0")
         self.ui.total_cost_display.setText(f"${self.total_cost:.2f}")
 
-        # Populate placeholder coupon list
+        # Populate the coupon list from the discounts table
         self.populate_coupon_list()
 
         # Connect UI elements
@@ -37,21 +38,26 @@ class PaymentWindow(QDialog):
 
         # Tax and Coupon updates
         self.ui.taxes_display.textChanged.connect(self.calculate_total_cost)
-        self.ui.coupons.currentIndexChanged.connect(self.calculate_total_cost)  # Placeholder handling
+        self.ui.coupons.currentIndexChanged.connect(self.calculate_total_cost)
 
     def populate_coupon_list(self):
-        """ Populate placeholder coupons for now. """
+        """ Populate the coupons from the discounts table; the item data is the discount id. """
         self.ui.coupons.clear()
-        self.ui.coupons.addItem("No Coupon", 0)
-        self.ui.coupons.addItem("$5 Off", 5)
-        self.ui.coupons.addItem("$10 Off", 10)
+        self.ui.coupons.addItem("No Coupon", None)
+        for discount in catalog.discounts():
+            if discount["percent"]:
+                label = f"{discount['name']} ({discount['percent']:g}% Off)"
+            else:
+                label = f"{discount['name']} (${discount['amount'] or 0:.2f} Off)"
+            self.ui.coupons.addItem(label, discount["id"])
 
     def calculate_total_cost(self):
         """ Calculate the final cost including taxes and coupon discounts. """
         try:
             initial_cost = float(self.ui.initial_cost_display.text())
             taxes = float(self.ui.taxes_display.text())
-            coupon_value = self.ui.coupons.currentData()  # Gets value from dropdown
+            discount_id = self.ui.coupons.currentData()  # Gets the discount id from the dropdown
+            coupon_value = pricing.discount_amount(initial_cost, [discount_id] if discount_id else [])
 
             total_cost = initial_cost + taxes - coupon_value
             self.ui.total_cost_display.setText(f"${max(total_cost, 0):.2f}")  # Ensure no negative total
@@ -90,32 +96,31 @@ class PaymentWindow(QDialog):
         total_cost = float(self.ui.total_cost_display.text().replace('$', ''))
         customer_id = self.parent().get_current_customer_id()
 
+        # The account view is patched from the returned change set instead of reloading
+        change = None
+        pickup_only = payment_method == "Unable To Pay"
+
         if payment_method == "Cash":
             cash_received = float(self.ui.cash_received_input.text()) if self.ui.cash_received_input.text() else 0.0
             if cash_received < total_cost:
                 QMessageBox.warning(self, "Insufficient Payment", "Cash received is less than total cost.")
                 return
             change_due = cash_received - total_cost
-            self.record_payment_in_db(customer_id, "Cash", total_cost)
+            change = self.record_payment_in_db(customer_id, "Cash", total_cost)
             QMessageBox.information(self, "Payment Successful", f"Cash payment recorded.\nChange Due: ${change_due:.2f}")
 
         elif payment_method in ["Check", "Other"]:
-            self.record_payment_in_db(customer_id, payment_method, total_cost)
-
-        elif payment_method == "Unable To Pay":
-            self.parent().mark_tickets_as_picked_up(customer_id)
+            change = self.record_payment_in_db(customer_id, payment_method, total_cost)
 
-        else:
-            self.process_card_payment(customer_id, total_cost)
+        elif not pickup_only:
+            change = self.process_card_payment(customer_id, total_cost)
 
-        if self.mark_as_picked_up:
+        if change is not None:
+            self.parent().apply_account_change(change)
+        elif self.mark_as_picked_up or pickup_only:
+            # No payment was recorded, but the garments still go home with the customer
             self.parent().mark_tickets_as_picked_up(customer_id, self.selected_ticket_data)
 
-        
-        self.parent().update_total_owed() 
-        self.parent().load_tickets(customer_id, self.parent().ui.ctlist) 
-        self.parent().refresh_customer_account(customer_id)
-
         self.accept() 
 
 
@@ -144,7 +149,6 @@ class PaymentWindow(QDialog):
             cursor = conn.cursor()
             cursor.execute("UPDATE customers SET stripe_customer_id = ? WHERE id = ?", (stripe_customer_id, customer_id))
             conn.commit()
-            conn.close()
 
         # ✅ Fetch saved payment methods for the customer
         try:
@@ -179,8 +183,9 @@ class PaymentWindow(QDialog):
             return
 
         # ✅ Store payment in the database
-        self.record_payment_in_db(customer_id, "Credit Card", total_cost, charge["id"])
+        change = self.record_payment_in_db(customer_id, "Credit Card", total_cost, charge["id"])
         QMessageBox.information(self, "Payment Successful", "The payment was processed successfully!")
+        return change
 
 
     def open_add_card_window(self, stripe_customer_id):
@@ -201,23 +206,22 @@ class PaymentWindow(QDialog):
             QMessageBox.critical(self, "Stripe Error", f"Failed to generate add-card link: {e.user_message}")
 
     def record_payment_in_db(self, customer_id, payment_method, total_cost, stripe_charge_id=None):
-        """ Record payment in database and update ticket statuses. """
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
+        """ Record payment and ticket statuses (and pickup, if requested) in one transaction. Returns an AccountChange. """
         try:
-            for ticket_number, _ in self.selected_ticket_data:
-                cursor.execute("UPDATE Tickets SET payment = 1 WHERE ticket_number = ?", (ticket_number,))
-                cursor.execute(
-                    "INSERT INTO Payments (customer_id, ticket_number, payment_method, amount, stripe_charge_id) VALUES (?, ?, ?, ?, ?)",
-                    (customer_id, ticket_number, payment_method, total_cost, stripe_charge_id),
-                )
-            conn.commit()
+            return apply_ticket_changes(
+                customer_id,
+                [ticket_number for ticket_number, _ in self.selected_ticket_data],
+                paid=True,
+                picked_up=self.mark_as_picked_up,
+                payment={
+                    "payment_method": payment_method,
+                    "amount": total_cost,
+                    "stripe_charge_id": stripe_charge_id,
+                },
+            )
         except Exception as e:
             QMessageBox.critical(self, "Database Error", f"Error recording payment: {e}")
-        finally:
-            conn.close()
+            return None
 
     def clear_fields(self):
         """ Clears all input fields in the payment window. """
@@ -1,8 +1,9 @@
-import sqlite3
 from escpos.printer import Usb
 #from views.utils.escpos_utils import format_receipt_header, format_receipt_items, format_receipt_totals
 import os
 from PIL import Image
+from models.database import get_connection
+from models import catalog
 
 class ReceiptPrinter:
     def __init__(self, vendor_id, product_id, db_path):
@@ -21,7 +22,7 @@ class ReceiptPrinter:
 
     def fetch_quick_ticket_data(self, ticket_id):
         """Fetches quick ticket details from the database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
 
         query = """
@@ -42,11 +43,8 @@ class ReceiptPrinter:
 
         if not result:
             print(f"No quick ticket found for ID {ticket_id}")
-            conn.close()
             return None
 
-        conn.close()
-
         # Correctly format the dictionary with the expected keys
         return {
             "ticket_number": result[0],
@@ -74,7 +72,7 @@ class ReceiptPrinter:
 
     def fetch_detailed_ticket_data(self, ticket_id):
         """Fetch detailed ticket information from the database, including garments, quantities, and prices."""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
 
         query = """
@@ -91,7 +89,6 @@ class ReceiptPrinter:
         result = cursor.fetchone()
 
         if not result:
-            conn.close()
             print(f"No detailed ticket found for ID {ticket_id}")
             return None
 
@@ -104,8 +101,6 @@ class ReceiptPrinter:
         """, (ticket_id,))
         garments = [{"name": row[0], "pcs": row[1], "total": row[2]} for row in cursor.fetchall()]
 
-        conn.close()
-
         return {
             "ticket_number": result[0],
             "customer_name": result[1],
@@ -125,7 +120,7 @@ class ReceiptPrinter:
 
     def fetch_receipt_data(self, receipt_id):
         """Fetch receipt data from the database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
 
         query = """
@@ -141,7 +136,6 @@ class ReceiptPrinter:
         result = cursor.fetchone()
 
         if not result:
-            conn.close()
             return None
 
         # Fetch items linked to this receipt
@@ -153,8 +147,6 @@ class ReceiptPrinter:
         """, (receipt_id,))
         items = [{"name": row[0], "qty": row[1], "price": row[2]} for row in cursor.fetchall()]
 
-        conn.close()
-
         return {
             "receipt_number": result[0],
             "customer_name": result[1],
@@ -172,23 +164,14 @@ class ReceiptPrinter:
         """Fetches the ticket type name from the database."""
         if ticket_type_id is None:
             return "N/A"
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM TicketTypes WHERE id = ?", (ticket_type_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else "Unknown"
+        return catalog.ticket_types().name(ticket_type_id, "Unknown")
 
     def get_ticket_type_letter(self, ticket_type_id):
         """Fetch the ticket type's first letter from the database."""
         if ticket_type_id is None:
             return "D"  # Default for 'Detailed'
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM TicketTypes WHERE id = ?", (ticket_type_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0][0] if result else "D"
+        name = catalog.ticket_types().name(ticket_type_id)
+        return name[0] if name else "D"
 
     def print_quick_ticket(self, ticket_data):
         try:
@@ -1,9 +1,9 @@
-import sqlite3
-import os
 from PySide6.QtWidgets import QMainWindow, QMessageBox
 from PySide6.QtCore import QDateTime, Signal
 from views.quickticketui import Ui_QuickTicketCreation
-from views.utils import get_next_ticket_number
+from models.database import get_connection
+from models import catalog
+from models.sequences import next_ticket_number
 
 
 
@@ -95,14 +95,7 @@ class QuickTicketWindow(QMainWindow):
         self.ui.dial_3.blockSignals(False)
 
     def populate_ticket_types(self):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, name FROM TicketTypes")
-        ticket_types = cursor.fetchall()
-        conn.close()
+        ticket_types = [(row["id"], row["name"]) for row in catalog.ticket_types()]
 
         self.ui.ttselection.clear()
         self.ui.ttselection_2.clear()
@@ -153,15 +146,15 @@ class QuickTicketWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Customer ID or Employee ID is missing.")
             return
 
-        next_ticket_number = get_next_ticket_number() if self.ticket_id is None else self.ticket_id
+        ticket_number = next_ticket_number() if self.ticket_id is None else self.ticket_id
         ticket_data = [self.get_ticket_data(i) for i in range(1, 4)]
         if not any(data[0] for data in ticket_data):
             QMessageBox.warning(self, "Input Error", "Please select at least one ticket type.")
             return
 
         try:
-            self.insert_quick_ticket(next_ticket_number, ticket_data)
-            quick_ticket_details = self.construct_quick_ticket_details(next_ticket_number, ticket_data)
+            self.insert_quick_ticket(ticket_number, ticket_data)
+            quick_ticket_details = self.construct_quick_ticket_details(ticket_number, ticket_data)
             self.quick_ticket_created.emit({'customer_id': self.customer_id, 'quick_ticket': quick_ticket_details})
             QMessageBox.information(self, "Success", "Quick ticket created and saved successfully.")
             self.print_ticket()
@@ -172,9 +165,7 @@ class QuickTicketWindow(QMainWindow):
         QMessageBox.information(self, "Print", "Print functionality is not implemented yet.")
 
     def insert_quick_ticket(self, ticket_number, ticket_data):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
+        conn = get_connection()
         cursor = conn.cursor()
         date_created = QDateTime.currentDateTime().toString('yyyy-MM-dd HH:mm:ss')
         cursor.execute('''
@@ -195,7 +186,6 @@ class QuickTicketWindow(QMainWindow):
             self.ui.atninput.toPlainText(), date_created
         ))
         conn.commit()
-        conn.close()
 
     def create_detailed_tickets(self):
         try:
@@ -259,11 +249,4 @@ class QuickTicketWindow(QMainWindow):
             return None
 
     def get_ticket_type_name(self, ticket_type_id):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        db_path = os.path.join(project_root, 'models', 'pos_system.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM TicketTypes WHERE id = ?", (ticket_type_id,))
-        ticket_type_name = cursor.fetchone()[0]
-        conn.close()
-        return ticket_type_name
+        return catalog.ticket_types().name(ticket_type_id)
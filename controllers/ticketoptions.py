@@ -4,6 +4,7 @@ from PySide6.QtWidgets import QMainWindow, QFileDialog, QListWidgetItem, QMessag
 from PySide6.QtGui import QPixmap, QIcon
 from PySide6.QtCore import Qt
 from views.ticketoptionsui import Ui_TicketOptionsCreation
+from models import catalog
 
 class TicketOptionsWindow(QMainWindow):
     def __init__(self):
@@ -43,6 +44,7 @@ class TicketOptionsWindow(QMainWindow):
             cursor.execute("INSERT INTO textures (name, image_path) VALUES (?, ?)", (name, self.selected_image))
             texture_id = cursor.lastrowid
             conn.commit()
+            catalog.invalidate("textures")
             conn.close()
             
             item = QListWidgetItem(name)
@@ -67,6 +69,7 @@ class TicketOptionsWindow(QMainWindow):
             cursor.execute("INSERT INTO patterns (name, image_path) VALUES (?, ?)", (name, self.selected_image))
             pattern_id = cursor.lastrowid
             conn.commit()
+            catalog.invalidate("patterns")
             conn.close()
             
             item = QListWidgetItem(name)
@@ -92,6 +95,7 @@ class TicketOptionsWindow(QMainWindow):
             cursor.execute("INSERT INTO upcharges (description, price) VALUES (?, ?)", (description, price))
             upcharge_id = cursor.lastrowid
             conn.commit()
+            catalog.invalidate("upcharges")
             conn.close()
             
             item = QListWidgetItem(f"{description} - ${price}")
@@ -126,6 +130,7 @@ class TicketOptionsWindow(QMainWindow):
                            (name, percent if percent else None, amount if amount else None))
             discount_id = cursor.lastrowid
             conn.commit()
+            catalog.invalidate("discounts")
             conn.close()
             
             if percent:
@@ -215,6 +220,7 @@ class TicketOptionsWindow(QMainWindow):
         cursor = conn.cursor()
         cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (option_id,))
         conn.commit()
+        catalog.invalidate()
         conn.close()
 
         current_list.takeItem(current_list.row(selected_item))
@@ -4,6 +4,7 @@ from PySide6.QtWidgets import QMainWindow, QListWidgetItem, QMessageBox
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
 from views.tickettypeui import Ui_TicketTypeCreation
+from models import catalog
 
 class TicketTypeCreationWindow(QMainWindow):
     def __init__(self):
@@ -141,6 +142,7 @@ class TicketTypeCreationWindow(QMainWindow):
             insert_into_table("ticket_type_discounts", ticket_type_id, chosen_discounts)
 
             conn.commit()
+            catalog.invalidate("ticket_types")
 
             # Add the new ticket type to the list and clear inputs
             self.ui.sttlist.addItem(QListWidgetItem(ticket_type_name))
@@ -182,6 +184,7 @@ class TicketTypeCreationWindow(QMainWindow):
             cursor.execute("DELETE FROM ticket_type_discounts WHERE ticket_type_id = ?", (ticket_type_id,))
 
             conn.commit()
+            catalog.invalidate("ticket_types")
 
             self.ui.sttlist.takeItem(self.ui.sttlist.row(selected_item))
 
@@ -0,0 +1,119 @@
+from collections import namedtuple
+
+from models.database import get_connection, transaction
+from models.ledger import get_balance, ticket_due_sql
+
+# What a payment or pickup changed: the touched tickets' new payment/pickedup
+# flags and the customer's new balance, so the account view can patch in place.
+AccountChange = namedtuple("AccountChange", ["customer_id", "tickets", "total_owed"])
+
+# Detailed tickets first, then open quick tickets, each in the order they were created.
+_ACCOUNT_TICKETS_SQL = """
+    SELECT 0 AS is_quick, t.id AS row_id, t.ticket_number,
+           t.ticket_type_id, COALESCE(tt.name, 'Unknown') AS type_name,
+           t.date_created, t.date_due AS due_date, t.pieces, t.total_price,
+           CAST(t.payment AS INTEGER) AS payment, CAST(t.pickedup AS INTEGER) AS pickedup,
+           NULL AS pieces1, NULL AS pieces2, NULL AS pieces3, 0 AS converted
+    FROM Tickets t
+    LEFT JOIN TicketTypes tt ON tt.id = t.ticket_type_id
+    WHERE t.customer_id = ?
+
+    UNION ALL
+
+    SELECT 1, q.id, q.ticket_number,
+           q.ticket_type_id1, 'Quick Ticket',
+           q.date_created, q.due_date1,
+           COALESCE(q.pieces1, 0) + COALESCE(q.pieces2, 0) + COALESCE(q.pieces3, 0), NULL,
+           0, 0,
+           q.pieces1, q.pieces2, q.pieces3, q.converted
+    FROM quick_tickets q
+    WHERE q.customer_id = ? AND q.converted = 0
+
+    ORDER BY is_quick, row_id
+"""
+
+
+def load_account_tickets(customer_id):
+    """Return every detailed ticket and open quick ticket of a customer in one query."""
+    conn = get_connection()
+    return conn.execute(_ACCOUNT_TICKETS_SQL, (customer_id, customer_id)).fetchall()
+
+
+def get_total_owed(customer_id):
+    """What the customer still owes, read from the balance ledger (see models/ledger.py)."""
+    return get_balance(customer_id)
+
+
+def apply_ticket_changes(customer_id, ticket_numbers, paid=False, picked_up=False, payment=None):
+    """
+    Mark tickets paid and/or picked up in one transaction and return an AccountChange.
+
+    `payment` is an optional dict (payment_method, amount, stripe_charge_id) that
+    is recorded in Payments for each ticket in the same transaction.
+    """
+    ticket_numbers = list(ticket_numbers)
+    params = [(customer_id, ticket_number) for ticket_number in ticket_numbers]
+
+    with transaction(immediate=True) as conn:
+        if paid:
+            conn.executemany(
+                "UPDATE Tickets SET payment = 1 WHERE customer_id = ? AND ticket_number = ?", params
+            )
+        if picked_up:
+            conn.executemany(
+                "UPDATE Tickets SET pickedup = 1 WHERE customer_id = ? AND ticket_number = ?", params
+            )
+        if payment:
+            conn.executemany(
+                "INSERT INTO Payments (customer_id, ticket_number, payment_method, amount, stripe_charge_id) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (customer_id, ticket_number, payment["payment_method"], payment["amount"], payment.get("stripe_charge_id"))
+                    for ticket_number in ticket_numbers
+                ],
+            )
+
+        placeholders = ", ".join("?" for _ in ticket_numbers)
+        tickets = [
+            dict(row) for row in conn.execute(f"""
+                SELECT ticket_number, CAST(payment AS INTEGER) AS payment, CAST(pickedup AS INTEGER) AS pickedup
+                FROM Tickets
+                WHERE customer_id = ? AND ticket_number IN ({placeholders})
+            """, [customer_id, *ticket_numbers])
+        ] if ticket_numbers else []
+        total_owed = get_total_owed(customer_id)
+
+    return AccountChange(customer_id, tickets, total_owed)
+
+
+def apply_payment(customer_id, amount, conn=None):
+    """
+    Spread a payment over the customer's tickets that still owe, oldest first.
+
+    Each ticket's amount_paid goes up by what it owes or by what is left of the
+    payment, and a ticket that is paid off gets payment = 1 like the desktop
+    app sets. One transaction; the ledger triggers book every part of it.
+    Returns the amount applied, which is less than `amount` if the customer
+    owes less.
+    """
+    remaining = round(amount, 2)
+    with transaction(immediate=True, conn=conn) as conn:
+        parts = []
+        for ticket_id, due in conn.execute(f"""
+            SELECT t.id, {ticket_due_sql('t')} AS due
+            FROM Tickets t
+            WHERE t.customer_id = ? AND due > 0
+            ORDER BY t.date_created, t.id
+        """, (customer_id,)).fetchall():
+            if remaining <= 0:
+                break
+            part = round(min(due, remaining), 2)
+            remaining = round(remaining - part, 2)
+            parts.append((part, part, ticket_id))
+
+        conn.executemany("""
+            UPDATE Tickets
+            SET amount_paid = ROUND(COALESCE(amount_paid, 0) + ?, 2),
+                payment = CASE WHEN ROUND(COALESCE(amount_paid, 0) + ?, 2) >= COALESCE(total_price, 0) THEN 1 ELSE 0 END
+            WHERE id = ?
+        """, parts)
+    return round(amount - remaining, 2)
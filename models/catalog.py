@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+import time
+
+from models.database import get_connection
+
+# Other terminals edit the same tables, so a loaded table is also re-read after
+# this many seconds even if nothing in this process invalidated it.
+CATALOG_TTL_SECONDS = 300
+
+# name -> query. Columns are what the screens need; rows keep query order.
+_QUERIES = {
+    "ticket_types": "SELECT id, name FROM TicketTypes",
+    "garments": "SELECT id, name, image_path, COALESCE(price, 0) AS price FROM Garments",
+    "garment_variants": "SELECT id, garment_id, name, COALESCE(price, 0) AS price FROM GarmentVariants",
+    "colors": "SELECT id, name, value FROM Colors",
+    "patterns": "SELECT id, name, image_path FROM Patterns",
+    "textures": "SELECT id, name, image_path FROM Textures",
+    "upcharges": "SELECT id, name, COALESCE(price, 0) AS price FROM Upcharges",
+    "discounts": "SELECT id, name, percent, amount FROM discounts",
+}
+
+
+class CatalogTable:
+    """One reference table held in memory with id -> row and name -> id maps."""
+
+    def __init__(self, rows):
+        self.rows = [dict(row) for row in rows]
+        self.by_id = {row["id"]: row for row in self.rows}
+        self.ids_by_name = {}
+        for row in self.rows:
+            # Names are not unique in the schema; the first row wins like the old fetchone() did
+            self.ids_by_name.setdefault(row["name"], row["id"])
+        self.loaded_at = time.monotonic()
+
+    def get(self, row_id):
+        return self.by_id.get(row_id)
+
+    def name(self, row_id, default=None):
+        row = self.by_id.get(row_id)
+        return row["name"] if row else default
+
+    def id_for(self, name):
+        return self.ids_by_name.get(name)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+_lock = threading.Lock()
+_tables = {}
+
+
+def _load(name):
+    try:
+        rows = get_connection().execute(_QUERIES[name]).fetchall()
+    except sqlite3.OperationalError as e:
+        # Older databases may not have every table yet
+        print(f"Catalog table '{name}' could not be loaded: {e}")
+        rows = []
+    return CatalogTable(rows)
+
+
+def table(name):
+    """Return the cached CatalogTable for `name`, loading it on first use."""
+    with _lock:
+        cached = _tables.get(name)
+        if cached is None or time.monotonic() - cached.loaded_at > CATALOG_TTL_SECONDS:
+            cached = _tables[name] = _load(name)
+        return cached
+
+
+def invalidate(*names):
+    """Drop cached tables (all of them if no names are given). Call after saving edits."""
+    with _lock:
+        if not names:
+            _tables.clear()
+        for name in names:
+            _tables.pop(name, None)
+        # Every ticket type panel is built from these tables and their ticket type links
+        _panels.clear()
+
+
+def ticket_types():
+    return table("ticket_types")
+
+
+def garments():
+    return table("garments")
+
+
+def garment_variants():
+    return table("garment_variants")
+
+
+def colors():
+    return table("colors")
+
+
+def patterns():
+    return table("patterns")
+
+
+def textures():
+    return table("textures")
+
+
+def upcharges():
+    return table("upcharges")
+
+
+def discounts():
+    return table("discounts")
+
+
+# Option lists per ticket type: name -> (link table, link column, catalog table)
+_PANEL_OPTIONS = {
+    "colors": ("ticket_type_colors", "colors_id", "colors"),
+    "patterns": ("ticket_type_patterns", "patterns_id", "patterns"),
+    "textures": ("ticket_type_textures", "textures_id", "textures"),
+    "upcharges": ("ticket_type_upcharges", "upcharges_id", "upcharges"),
+}
+
+
+class TicketTypePanel:
+    """
+    What DetailedTicketWindow shows for one ticket type: the garments linked to
+    it in ticket_type_garments, each with its variants, and its color, pattern,
+    texture and upcharge lists.
+    """
+
+    def __init__(self, ticket_type_id, garments, options):
+        self.ticket_type_id = ticket_type_id
+        # [(garment_id, name, [(variant_id, name, price), ...]), ...]
+        self.garments = garments
+        # kind -> [catalog row, ...]
+        self.options = options
+        self.loaded_at = time.monotonic()
+
+
+_panels = {}
+
+
+def _linked_ids(conn, link_table, link_column, ticket_type_id):
+    try:
+        rows = conn.execute(
+            f"SELECT {link_column} FROM {link_table} WHERE ticket_type_id = ?", (ticket_type_id,)
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"Ticket type links from '{link_table}' could not be loaded: {e}")
+        rows = []
+    return [row[0] for row in rows]
+
+
+def _load_panel(ticket_type_id):
+    conn = get_connection()
+
+    # Ticket types saved before garments were linked to them show every garment
+    linked = set(_linked_ids(conn, "ticket_type_garments", "garments_id", ticket_type_id))
+    variants_by_garment = {}
+    for variant in garment_variants():
+        variants_by_garment.setdefault(variant["garment_id"], []).append(
+            (variant["id"], variant["name"], variant["price"])
+        )
+    garment_tree = [
+        (garment["id"], garment["name"], variants_by_garment.get(garment["id"], []))
+        for garment in garments()
+        if not linked or garment["id"] in linked
+    ]
+
+    options = {}
+    for kind, (link_table, link_column, table_name) in _PANEL_OPTIONS.items():
+        lookup = table(table_name)
+        ids = _linked_ids(conn, link_table, link_column, ticket_type_id)
+        options[kind] = [lookup.get(option_id) for option_id in ids if lookup.get(option_id)]
+    return TicketTypePanel(ticket_type_id, garment_tree, options)
+
+
+def ticket_type_panel(ticket_type_id):
+    """Return the cached TicketTypePanel for a ticket type, loading it on first use."""
+    with _lock:
+        cached = _panels.get(ticket_type_id)
+    if cached is None or time.monotonic() - cached.loaded_at > CATALOG_TTL_SECONDS:
+        # Built outside the lock, since it reads other cached tables
+        cached = _load_panel(ticket_type_id)
+        with _lock:
+            _panels[ticket_type_id] = cached
+    return cached
+
+
+def variant_price(variant_id):
+    """Price of a garment variant, 0 if it is unknown or has no price."""
+    row = garment_variants().get(variant_id)
+    return row["price"] if row else 0
@@ -0,0 +1,54 @@
+import re
+
+# bm25 weights for first_name, last_name, phone, email, notes
+_RANK = "bm25(customer_search, 10.0, 10.0, 5.0, 2.0, 1.0)"
+
+SEARCH_LIMIT = 100
+
+# Customer columns API clients may see (the customers API and the change feed).
+# Push tokens and Stripe ids are deliberately not listed.
+CUSTOMER_FIELDS = (
+    'id', 'first_name', 'last_name', 'phone_number', 'email', 'notes', 'created_at',
+    'deladdress', 'billaddress', 'home_address', 'ste_apt_number', 'zipcode', 'zip_code',
+    'price_list', 'delivery_customer', 'billing_customer', 'customer_preferences',
+)
+
+
+def build_match_query(term):
+    """
+    Turn what the user typed into an FTS5 query.
+
+    Every word (or run of digits) becomes a quoted prefix term and all of them
+    must match, so "jo smi" finds "John Smith" and "(928) 853" finds the phone.
+    Returns None when there is nothing searchable in the input.
+    """
+    tokens = re.findall(r"\w+", term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_customers(conn, term, limit=SEARCH_LIMIT):
+    """
+    Return customers matching `term`, best matches first.
+
+    An empty search returns the first `limit` customers by name so the dialog
+    still lists something without reading the whole table.
+    """
+    match = build_match_query(term)
+    if match is None:
+        return conn.execute("""
+            SELECT id, first_name, last_name, phone_number, notes
+            FROM customers
+            ORDER BY last_name, first_name
+            LIMIT ?
+        """, (limit,)).fetchall()
+
+    return conn.execute(f"""
+        SELECT c.id, c.first_name, c.last_name, c.phone_number, c.notes
+        FROM customer_search
+        JOIN customers c ON c.id = customer_search.rowid
+        WHERE customer_search MATCH ?
+        ORDER BY {_RANK}
+        LIMIT ?
+    """, (match, limit)).fetchall()
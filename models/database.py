@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# sqlite keeps this many prepared statements per connection, keyed by SQL text.
+STATEMENT_CACHE_SIZE = 256
+
+# Negative cache_size is in KiB (about 16 MB of page cache per connection).
+CACHE_SIZE_KIB = 16000
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+# The legacy schema has foreign keys pointing at tables/columns that do not
+# exist (e.g. tickets -> quick_tickets(pieces1)), so enforcement stays opt-in
+# until the schema is cleaned up. It is still set explicitly on every connection.
+FOREIGN_KEYS = os.getenv("POS_DB_FOREIGN_KEYS", "0") == "1"
+
+_local = threading.local()
+
+
+def get_db_path():
+    """
+    POS_DB_PATH if it is set (scripts and tests point it at a copy), otherwise
+    the app's database from controllers/config.py.
+    """
+    path = os.getenv("POS_DB_PATH")
+    if path:
+        return path
+    # Imported here because controllers.config also sets up Firebase, SES and Stripe
+    from controllers.config import get_db_path as config_db_path
+    return config_db_path()
+
+
+def _apply_pragmas(conn):
+    """Apply the same tuning to every connection we hand out."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA foreign_keys={'ON' if FOREIGN_KEYS else 'OFF'}")
+
+
+def open_connection(db_path=None, check_same_thread=True):
+    """
+    Open a new, tuned connection. Most code should use get_connection() instead.
+
+    Pass check_same_thread=False only for pools that hand a connection to one
+    thread at a time (see api/db.py).
+    """
+    conn = sqlite3.connect(
+        db_path or get_db_path(),
+        timeout=30.0,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=check_same_thread,
+    )
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+    return conn
+
+
+def get_connection(db_path=None):
+    """
+    Return this thread's connection to the database, opening it on first use.
+
+    The connection is shared by everything running on the thread, so callers
+    must not close it. Commit or roll back what you start.
+    """
+    db_path = db_path or get_db_path()
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = open_connection(db_path)
+    return conn
+
+
+def close_connection(db_path=None):
+    """Close this thread's connection(s). Call from worker threads before they exit."""
+    connections = getattr(_local, "connections", None)
+    if not connections:
+        return
+    paths = [db_path] if db_path else list(connections)
+    for path in paths:
+        conn = connections.pop(path, None)
+        if conn is not None:
+            conn.close()
+
+
+@contextmanager
+def transaction(immediate=False, db_path=None, conn=None):
+    """
+    Run a block in a single transaction on this thread's connection (or `conn`).
+
+    BEGIN IMMEDIATE takes the write lock up front, which is what you want for
+    read-modify-write sequences. If a transaction is already open the block
+    joins it and the outer owner decides whether to commit.
+    """
+    conn = conn or get_connection(db_path)
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
@@ -0,0 +1,176 @@
+"""
+In-memory draft of a detailed ticket.
+
+DetailedTicketWindow edits a DraftTicket while the clerk clicks: garments,
+piece counts and the colors/patterns/textures/upcharges picked for each one
+are plain Python objects holding catalog ids, and the tables only render them.
+Nothing touches the database until commit(), which writes the ticket, all of
+its garments and all of their options in a single transaction with one
+executemany per table.
+"""
+from datetime import datetime
+
+from models import catalog, pricing
+from models.database import get_connection, transaction
+from models.sequences import next_ticket_number
+
+# Option kind -> (link table, id column, catalog table)
+OPTION_TABLES = {
+    "colors": ("garment_colors", "color_id", catalog.colors),
+    "patterns": ("garment_patterns", "pattern_id", catalog.patterns),
+    "textures": ("garment_textures", "texture_id", catalog.textures),
+    "upcharges": ("garment_upcharges", "upcharge_id", catalog.upcharges),
+}
+
+
+class DraftGarment:
+    """One garment variant line: how many pieces, at what price, with which options."""
+
+    def __init__(self, variant_id, name, quantity, unit_price):
+        self.variant_id = variant_id
+        self.name = name
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.options = {kind: [] for kind in OPTION_TABLES}
+
+    def line_item(self):
+        return pricing.LineItem(self.variant_id, self.quantity, tuple(self.options["upcharges"]), self.unit_price)
+
+    @property
+    def price(self):
+        """Line total including upcharges (see models/pricing.py)."""
+        return pricing.price_line(self.line_item()).total
+
+    def option_names(self, kind):
+        """Comma-separated names of the options of one kind, as shown in the ticket table."""
+        lookup = OPTION_TABLES[kind][2]()
+        return ", ".join(lookup.name(option_id, "") for option_id in self.options[kind])
+
+
+class DraftTab:
+    """The garments for one ticket type (one tab of the window, one Tickets row)."""
+
+    def __init__(self, ticket_type_id, due_date=None, notes=None):
+        self.ticket_type_id = ticket_type_id
+        self.due_date = due_date
+        self.notes = notes
+        self.garments = []
+        self.discount_ids = []
+        self.fees = 0
+
+    def find(self, variant_id):
+        """Index of the line for a variant, or None."""
+        for index, garment in enumerate(self.garments):
+            if garment.variant_id == variant_id:
+                return index
+        return None
+
+    def add_variant(self, variant_id, quantity):
+        """Add a line for a garment variant at its current catalog price. Returns its index."""
+        variant = catalog.garment_variants().get(variant_id)
+        if variant is None:
+            raise KeyError(f"Unknown garment variant {variant_id}")
+        self.garments.append(DraftGarment(variant_id, variant["name"], quantity, variant["price"]))
+        return len(self.garments) - 1
+
+    def set_quantity(self, index, quantity):
+        self.garments[index].quantity = max(1, int(quantity))
+
+    def remove(self, index):
+        del self.garments[index]
+
+    def set_options(self, index, kind, option_ids):
+        self.garments[index].options[kind] = list(option_ids)
+
+    def add_option(self, index, kind, option_id):
+        self.garments[index].options[kind].append(option_id)
+
+    def remove_last_option(self, index, kind):
+        options = self.garments[index].options[kind]
+        if options:
+            options.pop()
+
+    @property
+    def pieces(self):
+        return sum(garment.quantity for garment in self.garments)
+
+    def quote(self):
+        """Subtotal, discounts, tax and total for the tab (a pricing.Quote)."""
+        return pricing.quote(
+            [garment.line_item() for garment in self.garments], self.discount_ids, self.fees
+        )
+
+
+class DraftTicket:
+    """Up to three tabs of garments for one customer, saved with commit()."""
+
+    def __init__(self, customer_id, employee_id):
+        self.customer_id = customer_id
+        self.employee_id = employee_id
+        self.tabs = {}
+
+    def tab(self, index):
+        return self.tabs.get(index)
+
+    def commit(self, index, conn=None):
+        """
+        Save one tab as a new ticket and return (ticket_id, ticket_number).
+
+        The ticket row, its TicketGarments and every option row are written in
+        one BEGIN IMMEDIATE transaction (or the caller's, if one is open);
+        nothing is saved if any insert fails.
+        """
+        tab = self.tabs[index]
+        if not tab.garments:
+            raise ValueError("No garments have been added to this ticket.")
+
+        quote = tab.quote()
+
+        # Reserved in its own short transaction before ours starts, unless the
+        # caller already has one open; then it is part of (and undone with) theirs
+        conn = conn or get_connection()
+        ticket_number = next_ticket_number(conn)
+
+        with transaction(immediate=True, conn=conn):
+            cursor = conn.execute("""
+                INSERT INTO Tickets (
+                    customer_id, ticket_number, ticket_type_id,
+                    employee_id, date_created, total_price,
+                    pieces, date_due, notes
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                self.customer_id,
+                ticket_number,
+                tab.ticket_type_id,
+                self.employee_id,
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                quote.total,
+                tab.pieces,
+                tab.due_date,
+                tab.notes,
+            ))
+            ticket_id = cursor.lastrowid
+
+            conn.executemany(
+                "INSERT INTO TicketGarments (ticket_id, garment_variant_id, quantity, price) VALUES (?, ?, ?, ?)",
+                [(ticket_id, garment.variant_id, garment.quantity, line.total)
+                 for garment, line in zip(tab.garments, quote.lines)],
+            )
+            # The ticket is new and we hold the write lock, so its garment rows
+            # are exactly the ones just inserted, in insertion order
+            garment_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM TicketGarments WHERE ticket_id = ? ORDER BY id", (ticket_id,)
+            )]
+
+            for kind, (link_table, id_column, _) in OPTION_TABLES.items():
+                rows = [
+                    (garment_id, option_id)
+                    for garment_id, garment in zip(garment_ids, tab.garments)
+                    for option_id in garment.options[kind]
+                ]
+                if rows:
+                    conn.executemany(
+                        f"INSERT INTO {link_table} (ticket_garment_id, {id_column}) VALUES (?, ?)", rows
+                    )
+        return ticket_id, ticket_number
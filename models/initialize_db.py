@@ -1,5 +1,11 @@
 import sqlite3
 import os
+import sys
+
+# Allow running this file directly (python models/initialize_db.py)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.migrations import run_migrations
 
 def initialize_database():
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -137,7 +143,7 @@ def initialize_database():
 
 # Create Tickets Table
     cursor.execute("""
-    CREATE TABLE "Tickets" (
+    CREATE TABLE IF NOT EXISTS "Tickets" (
 	    "id"	INTEGER,
 	    "customer_id"	INTEGER,
 	    "ticket_type_id"	INTEGER,
@@ -195,9 +201,10 @@ def initialize_database():
     )
     ''')
     
-    
-    
     conn.commit()
+
+    # Indexes and later schema changes are versioned in models/migrations.py
+    run_migrations(conn)
     conn.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+"""
+Customer balance ledger.
+
+Every change to what a customer owes is appended to customer_ledger by
+triggers on Tickets (see migrations 4 and 10 in models/migrations.py), and a trigger
+on the ledger keeps customer_balances.balance equal to the ledger total. The
+balance is therefore updated in the same transaction as the ticket change, no
+matter whether the desktop app or the API made it, and reading it is a single
+primary-key lookup.
+
+    python -m models.ledger verify    # report customers whose balance is off
+    python -m models.ledger rebuild   # fix them with correction entries
+"""
+import sys
+
+from models.database import get_connection, transaction
+
+
+def ticket_due_sql(alias):
+    """
+    SQL for what one ticket still owes.
+
+    `payment` is the 0/1 paid-in-full flag the desktop app sets and
+    `amount_paid` what has been paid toward the ticket so far (see
+    models.account.apply_payment).
+    """
+    return f"""(CASE
+        WHEN COALESCE({alias}.payment, 0) != 0 THEN 0
+        ELSE MAX(COALESCE({alias}.total_price, 0) - COALESCE({alias}.amount_paid, 0), 0)
+    END)"""
+
+
+def get_balance(customer_id, conn=None):
+    """Return the customer's outstanding balance (0.0 if they have no ledger entries)."""
+    conn = conn or get_connection()
+    row = conn.execute(
+        "SELECT balance FROM customer_balances WHERE customer_id = ?", (customer_id,)
+    ).fetchone()
+    return round(row[0], 2) if row else 0.0
+
+
+def get_ledger(customer_id, conn=None):
+    """Return the customer's ledger entries, oldest first."""
+    conn = conn or get_connection()
+    return conn.execute("""
+        SELECT id, ticket_id, entry_type, amount, created_at
+        FROM customer_ledger
+        WHERE customer_id = ?
+        ORDER BY id
+    """, (customer_id,)).fetchall()
+
+
+def _expected_balances(conn):
+    return {
+        row[0]: round(row[1], 2)
+        for row in conn.execute(f"""
+            SELECT t.customer_id, SUM({ticket_due_sql('t')})
+            FROM Tickets t
+            WHERE t.customer_id IS NOT NULL
+            GROUP BY t.customer_id
+        """)
+    }
+
+
+def _ledger_totals(conn):
+    return {
+        row[0]: round(row[1], 2)
+        for row in conn.execute(
+            "SELECT customer_id, SUM(amount) FROM customer_ledger GROUP BY customer_id"
+        )
+    }
+
+
+def _stored_balances(conn):
+    return {
+        row[0]: round(row[1], 2)
+        for row in conn.execute("SELECT customer_id, balance FROM customer_balances")
+    }
+
+
+def verify(conn=None):
+    """
+    Recompute every balance from the tickets and compare.
+
+    Returns a list of (customer_id, stored_balance, ledger_total, expected)
+    tuples for customers where any of the three disagree.
+    """
+    conn = conn or get_connection()
+    expected = _expected_balances(conn)
+    ledger = _ledger_totals(conn)
+    stored = _stored_balances(conn)
+
+    problems = []
+    for customer_id in sorted(set(expected) | set(ledger) | set(stored)):
+        values = (stored.get(customer_id, 0.0), ledger.get(customer_id, 0.0), expected.get(customer_id, 0.0))
+        if len(set(values)) > 1:
+            problems.append((customer_id, *values))
+    return problems
+
+
+def rebuild(conn=None):
+    """
+    Bring every balance back in line with the tickets.
+
+    The ledger stays append-only: a 'correction' entry is added for the
+    difference, and customer_balances is reset from the ledger totals first in
+    case the two ever drifted apart. Returns the number of customers corrected.
+    """
+    with transaction(immediate=True, conn=conn) as conn:
+        conn.execute("DELETE FROM customer_balances")
+        conn.execute("""
+            INSERT INTO customer_balances (customer_id, balance, updated_at)
+            SELECT customer_id, ROUND(SUM(amount), 2), CURRENT_TIMESTAMP
+            FROM customer_ledger
+            GROUP BY customer_id
+        """)
+
+        expected = _expected_balances(conn)
+        ledger = _ledger_totals(conn)
+        corrections = [
+            (customer_id, round(expected.get(customer_id, 0.0) - ledger.get(customer_id, 0.0), 2))
+            for customer_id in set(expected) | set(ledger)
+        ]
+        corrections = [(customer_id, amount) for customer_id, amount in corrections if amount]
+
+        # The ledger insert trigger applies each correction to customer_balances
+        conn.executemany(
+            "INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount) VALUES (?, NULL, 'correction', ?)",
+            corrections,
+        )
+    return len(corrections)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command == "verify":
+        problems = verify()
+        for customer_id, stored, ledger_total, expected in problems:
+            print(f"Customer {customer_id}: balance {stored:.2f}, ledger {ledger_total:.2f}, tickets {expected:.2f}")
+        print("Ledger OK." if not problems else f"{len(problems)} customer(s) out of balance.")
+        sys.exit(1 if problems else 0)
+    elif command == "rebuild":
+        print(f"Corrected {rebuild()} customer balance(s).")
+    else:
+        print("Usage: python -m models.ledger [verify|rebuild]")
+        sys.exit(2)
@@ -0,0 +1,558 @@
+import sqlite3
+from datetime import datetime
+
+from models.database import get_connection
+from models.changes import CHANGE_LOG_ENTITIES
+from models.ledger import ticket_due_sql
+
+
+def _table_columns(conn, table):
+    """Return the column names of a table (empty set if the table does not exist)."""
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """
+    Create an index if the table and all of its columns exist.
+
+    Several tables the API talks to are created outside initialize_db.py (or not
+    at all on older installs), so a missing table is skipped instead of failing
+    the whole migration. Returns True if the index exists afterwards.
+    """
+    existing = _table_columns(conn, table)
+    if not existing:
+        print(f"Skipping index {name}: table {table} does not exist")
+        return False
+    missing = [column for column in columns if column not in existing]
+    if missing:
+        print(f"Skipping index {name}: {table} has no column(s) {', '.join(missing)}")
+        return False
+
+    column_sql = ", ".join(f'"{column}"' for column in columns)
+    conn.execute(
+        f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {name} ON "{table}" ({column_sql})'
+    )
+    return True
+
+
+def _add_hot_path_indexes(conn):
+    """Indexes for the lookups the desktop app and API run on every screen/request."""
+    # Ticket lists, balances and ticket-number lookups
+    create_index(conn, "idx_tickets_customer", "Tickets", ["customer_id"])
+    create_index(conn, "idx_tickets_ticket_number", "Tickets", ["ticket_number"])
+    create_index(conn, "idx_quick_tickets_customer_converted", "quick_tickets", ["customer_id", "converted"])
+    create_index(conn, "idx_ticket_garments_ticket", "TicketGarments", ["ticket_id"])
+
+    # Per-garment details of a ticket
+    create_index(conn, "idx_garment_colors_ticket_garment", "garment_colors", ["ticket_garment_id"])
+    create_index(conn, "idx_garment_patterns_ticket_garment", "garment_patterns", ["ticket_garment_id"])
+    create_index(conn, "idx_garment_textures_ticket_garment", "garment_textures", ["ticket_garment_id"])
+    create_index(conn, "idx_garment_upcharges_ticket_garment", "garment_upcharges", ["ticket_garment_id"])
+
+    # API history screens
+    create_index(conn, "idx_payments_customer_date", "Payments", ["customer_id", "payment_date"])
+    create_index(conn, "idx_notifications_customer_read_sent", "Notifications", ["customer_id", "is_read", "sent_at"])
+    create_index(conn, "idx_messages_user_sent", "Messages", ["user_id", "sent_at"])
+    create_index(conn, "idx_deliveries_customer_pickup", "Deliveries", ["customer_id", "pickup_date"])
+
+    # Ticket type option link tables
+    create_index(conn, "idx_ticket_type_colors_type", "ticket_type_colors", ["ticket_type_id"])
+    create_index(conn, "idx_ticket_type_patterns_type", "ticket_type_patterns", ["ticket_type_id"])
+    create_index(conn, "idx_ticket_type_textures_type", "ticket_type_textures", ["ticket_type_id"])
+    create_index(conn, "idx_ticket_type_upcharges_type", "ticket_type_upcharges", ["ticket_type_id"])
+    create_index(conn, "idx_ticket_type_discounts_type", "ticket_type_discounts", ["ticket_type_id"])
+    create_index(conn, "idx_ticket_type_garments_type", "ticket_type_garments", ["ticket_type_id"])
+    create_index(conn, "idx_tickettypegarments_type", "TicketTypeGarments", ["ticket_type_id"])
+
+
+def _add_ticket_number_sequence(conn):
+    """Sequence table for ticket numbers, seeded past every number already issued."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    """)
+
+    highest = 0
+    for table in ("Tickets", "quick_tickets", "ticket_numbers"):
+        if "ticket_number" in _table_columns(conn, table):
+            value = conn.execute(
+                f'SELECT MAX(CAST(ticket_number AS INTEGER)) FROM "{table}"'
+            ).fetchone()[0]
+            highest = max(highest, value or 0)
+
+    conn.execute(
+        "INSERT OR IGNORE INTO sequences (name, next_value) VALUES ('ticket_number', ?)",
+        (highest + 1,),
+    )
+
+
+def _digits_sql(expr):
+    """SQL that strips the usual phone punctuation from an expression."""
+    for char in ("(", ")", "-", " ", ".", "+"):
+        expr = f"REPLACE({expr}, '{char}', '')"
+    return expr
+
+
+def _add_customer_search_index(conn):
+    """
+    FTS5 index over customers (see models/customer_search.py), kept in sync by triggers.
+
+    The phone column holds the digits-only number plus its last seven and last
+    four digits, so "853-7555" and "7555" find "(928) 853-7555" with a prefix match.
+    """
+    columns = _table_columns(conn, "customers")
+
+    def source(prefix):
+        digits = _digits_sql(f"COALESCE({prefix}phone_number, '')")
+        phone = f"{digits} || ' ' || SUBSTR({digits}, -7) || ' ' || SUBSTR({digits}, -4)"
+        email = f"{prefix}email" if "email" in columns else "''"
+        return f"{prefix}id, {prefix}first_name, {prefix}last_name, {phone}, {email}, {prefix}notes"
+
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS customer_search USING fts5(
+            first_name, last_name, phone, email, notes,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+        )
+    """)
+    fts_columns = "rowid, first_name, last_name, phone, email, notes"
+
+    conn.execute("DELETE FROM customer_search")
+    conn.execute(f"INSERT INTO customer_search ({fts_columns}) SELECT {source('')} FROM customers")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS customers_search_insert AFTER INSERT ON customers BEGIN
+            INSERT INTO customer_search ({fts_columns}) VALUES ({source('NEW.')});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS customers_search_update AFTER UPDATE ON customers BEGIN
+            DELETE FROM customer_search WHERE rowid = OLD.id;
+            INSERT INTO customer_search ({fts_columns}) VALUES ({source('NEW.')});
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS customers_search_delete AFTER DELETE ON customers BEGIN
+            DELETE FROM customer_search WHERE rowid = OLD.id;
+        END
+    """)
+
+
+def _legacy_ticket_due_sql(alias):
+    """
+    What a ticket owed under migration 4, when `payment` held either the
+    desktop app's 0/1 paid flag or an amount paid through the API. Frozen here
+    so migration 4 keeps doing what it shipped with; see migration 10.
+    """
+    return f"""(CASE
+        WHEN COALESCE({alias}.payment, 0) = 0 THEN COALESCE({alias}.total_price, 0)
+        WHEN {alias}.payment = 1 THEN 0
+        ELSE MAX(COALESCE({alias}.total_price, 0) - {alias}.payment, 0)
+    END)"""
+
+
+_TICKET_LEDGER_TRIGGERS = ("tickets_ledger_insert", "tickets_ledger_update", "tickets_ledger_transfer", "tickets_ledger_delete")
+
+
+def _create_ticket_ledger_triggers(conn, due_sql, paid_columns):
+    """
+    The Tickets triggers that append to customer_ledger. `due_sql(alias)` is
+    what a ticket owes; a change to any of `paid_columns` is booked as a payment.
+    """
+    paid_changed = " OR ".join(f"NEW.{column} IS NOT OLD.{column}" for column in paid_columns)
+    old_due, new_due = due_sql("OLD"), due_sql("NEW")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ledger_insert AFTER INSERT ON Tickets
+        WHEN NEW.customer_id IS NOT NULL AND {new_due} != 0 BEGIN
+            INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+            VALUES (NEW.customer_id, NEW.id, 'charge', {new_due});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ledger_update AFTER UPDATE OF total_price, {", ".join(paid_columns)} ON Tickets
+        WHEN NEW.customer_id IS NOT NULL AND OLD.customer_id IS NEW.customer_id AND {new_due} != {old_due} BEGIN
+            INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+            VALUES (
+                NEW.customer_id, NEW.id,
+                CASE WHEN {paid_changed} THEN 'payment' ELSE 'adjustment' END,
+                {new_due} - {old_due}
+            );
+        END
+    """)
+    # A ticket moved to another customer takes what it still owes with it
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ledger_transfer AFTER UPDATE OF customer_id ON Tickets
+        WHEN OLD.customer_id IS NOT NEW.customer_id BEGIN
+            INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+            SELECT OLD.customer_id, OLD.id, 'adjustment', -{old_due}
+            WHERE OLD.customer_id IS NOT NULL AND {old_due} != 0;
+            INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+            SELECT NEW.customer_id, NEW.id, 'adjustment', {new_due}
+            WHERE NEW.customer_id IS NOT NULL AND {new_due} != 0;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ledger_delete AFTER DELETE ON Tickets
+        WHEN OLD.customer_id IS NOT NULL AND {old_due} != 0 BEGIN
+            INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+            VALUES (OLD.customer_id, OLD.id, 'void', -{old_due});
+        END
+    """)
+
+
+def _add_customer_ledger(conn):
+    """
+    Append-only ledger of charges and payments plus a running balance per customer.
+
+    Triggers on Tickets write the ledger entries and a trigger on the ledger
+    keeps customer_balances current, all inside the transaction that changed the
+    ticket. Existing balances are carried over as one 'opening' entry each.
+    See models/ledger.py.
+    """
+    if not _table_columns(conn, "Tickets"):
+        print("Skipping customer ledger: table Tickets does not exist")
+        return
+    if "payment" not in _table_columns(conn, "Tickets"):
+        # Both the desktop app and the API write this column
+        conn.execute('ALTER TABLE "Tickets" ADD COLUMN payment INTEGER DEFAULT 0')
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            ticket_id INTEGER,
+            entry_type TEXT NOT NULL CHECK (entry_type IN ('opening', 'charge', 'payment', 'adjustment', 'void', 'correction')),
+            amount REAL NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    create_index(conn, "idx_customer_ledger_customer", "customer_ledger", ["customer_id"])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_balances (
+            customer_id INTEGER PRIMARY KEY,
+            balance REAL NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS customer_ledger_balance AFTER INSERT ON customer_ledger BEGIN
+            INSERT INTO customer_balances (customer_id, balance, updated_at)
+            VALUES (NEW.customer_id, ROUND(NEW.amount, 2), CURRENT_TIMESTAMP)
+            ON CONFLICT (customer_id) DO UPDATE SET
+                balance = ROUND(balance + excluded.balance, 2),
+                updated_at = excluded.updated_at;
+        END
+    """)
+
+    _create_ticket_ledger_triggers(conn, _legacy_ticket_due_sql, ["payment"])
+
+    # Opening balances; the ledger trigger fills customer_balances from these
+    conn.execute(f"""
+        INSERT INTO customer_ledger (customer_id, ticket_id, entry_type, amount)
+        SELECT t.customer_id, NULL, 'opening', ROUND(SUM({_legacy_ticket_due_sql('t')}), 2)
+        FROM Tickets t
+        WHERE t.customer_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM customer_ledger l WHERE l.customer_id = t.customer_id)
+        GROUP BY t.customer_id
+        HAVING SUM({_legacy_ticket_due_sql('t')}) != 0
+    """)
+
+
+def _add_ticket_keyset_indexes(conn):
+    """Indexes matching the (date_created, id) order the API pages tickets in (api/pagination.py)."""
+    create_index(conn, "idx_tickets_created", "Tickets", ["date_created", "id"])
+    create_index(conn, "idx_tickets_customer_created", "Tickets", ["customer_id", "date_created", "id"])
+
+
+def _add_permission_cache_versions(conn):
+    """
+    Version counter for the permission cache in models/permissions.py.
+
+    Any write to the RBAC tables bumps it, whichever process made the change.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('permissions', 0)")
+
+    for table in ("permissions", "roles", "role_permissions", "employee_roles", "employee_permissions"):
+        if not _table_columns(conn, table):
+            print(f"Skipping permission cache triggers: table {table} does not exist")
+            continue
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_bump_version AFTER {event} ON {table} BEGIN
+                    UPDATE cache_versions SET version = version + 1 WHERE name = 'permissions';
+                END
+            """)
+
+
+def _version_bump_sql(scope, owner_expr, condition="1"):
+    return f"""
+        INSERT INTO resource_versions (scope, owner_id, version, updated_at)
+        SELECT '{scope}', {owner_expr}, 1, CURRENT_TIMESTAMP
+        WHERE {owner_expr} IS NOT NULL AND {condition}
+        ON CONFLICT (scope, owner_id) DO UPDATE SET
+            version = version + 1,
+            updated_at = excluded.updated_at;
+    """
+
+
+def add_version_triggers(conn, table, scope, owner_column, collection_scope=None):
+    """
+    Bump resource_versions for every write to `table`.
+
+    `scope` is bumped for the row's `owner_column` (e.g. the customer it belongs
+    to) and `collection_scope`, if given, for owner 0, which stands for the
+    whole collection. Returns False if the table or column does not exist.
+    """
+    columns = _table_columns(conn, table)
+    if owner_column not in columns:
+        print(f"Skipping version triggers on {table}: no such table or column {owner_column}")
+        return False
+
+    bodies = {
+        "INSERT": _version_bump_sql(scope, f"NEW.{owner_column}"),
+        "DELETE": _version_bump_sql(scope, f"OLD.{owner_column}"),
+        "UPDATE": _version_bump_sql(scope, f"NEW.{owner_column}") + _version_bump_sql(
+            scope, f"OLD.{owner_column}", f"OLD.{owner_column} IS NOT NEW.{owner_column}"
+        ),
+    }
+    for event, body in bodies.items():
+        if collection_scope:
+            body += _version_bump_sql(collection_scope, "0")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table.lower()}_{event.lower()}_version_{scope}
+            AFTER {event} ON "{table}" BEGIN
+                {body}
+            END
+        """)
+    return True
+
+
+def _add_resource_versions(conn):
+    """
+    Version counters behind the API's ETag/Last-Modified headers (api/conditional.py).
+
+    scope 'customer' counts changes to anything a customer's screens show,
+    'employee' an employee's account, and 'tickets'/'customers' owner 0 the
+    whole collection.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resource_versions (
+            scope TEXT NOT NULL,
+            owner_id INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (scope, owner_id)
+        )
+    """)
+    add_version_triggers(conn, "Tickets", "customer", "customer_id", collection_scope="tickets")
+    add_version_triggers(conn, "customers", "customer", "id", collection_scope="customers")
+    add_version_triggers(conn, "Notifications", "customer", "customer_id")
+    add_version_triggers(conn, "Deliveries", "customer", "customer_id")
+    add_version_triggers(conn, "DeliveryAddresses", "customer", "customer_id")
+    add_version_triggers(conn, "Employees", "employee", "employee_id")
+
+
+def _change_log_sql(entity, owner_expr, id_expr, op, condition="1"):
+    return f"""
+        INSERT INTO change_log (customer_id, entity, entity_id, op)
+        SELECT {owner_expr}, '{entity}', {id_expr}, '{op}'
+        WHERE {owner_expr} IS NOT NULL AND {condition};
+    """
+
+
+def _add_change_log(conn):
+    """
+    Change data capture for the mobile sync feed (GET /api/changes).
+
+    Triggers append one change_log row per insert, update or delete of a
+    customer's tickets, notifications, deliveries, messages and their own
+    customer record. Tables this database does not have are skipped, as in the
+    other migrations; a migration that creates one should add its triggers.
+    """
+    create_index(conn, "idx_delivery_addresses_customer", "DeliveryAddresses", ["customer_id"])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    create_index(conn, "idx_change_log_customer", "change_log", ["customer_id", "id"])
+
+    for entity, (table, owner_column) in CHANGE_LOG_ENTITIES.items():
+        columns = _table_columns(conn, table)
+        if owner_column not in columns or "id" not in columns:
+            print(f"Skipping change log triggers on {table}: no such table or column {owner_column}")
+            continue
+        bodies = {
+            "INSERT": _change_log_sql(entity, f"NEW.{owner_column}", "NEW.id", "upsert"),
+            "DELETE": _change_log_sql(entity, f"OLD.{owner_column}", "OLD.id", "delete"),
+            # A row that moved to another customer disappears from the old one's feed
+            "UPDATE": _change_log_sql(entity, f"NEW.{owner_column}", "NEW.id", "upsert") + _change_log_sql(
+                entity, f"OLD.{owner_column}", "OLD.id", "delete", f"OLD.{owner_column} IS NOT NEW.{owner_column}"
+            ),
+        }
+        for event, body in bodies.items():
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table.lower()}_{event.lower()}_change_log
+                AFTER {event} ON "{table}" BEGIN
+                    {body}
+                END
+            """)
+
+
+def _add_notification_outbox(conn):
+    """
+    Outbox for customer emails and push notifications (see models/outbox.py).
+
+    Rows are written in the same transaction as the change they announce and
+    sent later by the dispatcher. dedupe_key is unique, so re-enqueuing the same
+    event is a no-op; pending rows are found through (status, next_attempt_at).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL CHECK (channel IN ('email', 'push')),
+            recipient TEXT NOT NULL,
+            subject TEXT,
+            body TEXT NOT NULL,
+            data TEXT,
+            dedupe_key TEXT UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL DEFAULT (datetime('now')),
+            last_error TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            sent_at TEXT
+        )
+    """)
+    create_index(conn, "idx_outbox_due", "notification_outbox", ["status", "next_attempt_at"])
+
+
+def _add_ticket_amount_paid(conn):
+    """
+    Split what Tickets.payment meant into a paid flag and Tickets.amount_paid.
+
+    The desktop app sets payment = 1 for "paid in full" while the API added the
+    amount paid to the same column, so a $1 payment read as paid in full.
+    Values other than 0 and 1 can only be API amounts and move to amount_paid;
+    a stored 1 is ambiguous and stays a paid flag, which is how the ledger
+    already counted it, so no balance changes here. The ledger triggers are
+    recreated with the new due amount (models/ledger.py).
+    """
+    columns = _table_columns(conn, "Tickets")
+    if "payment" not in columns:
+        print("Skipping ticket amount paid: table Tickets has no payment column")
+        return
+    if "amount_paid" not in columns:
+        conn.execute('ALTER TABLE "Tickets" ADD COLUMN amount_paid REAL NOT NULL DEFAULT 0')
+
+    for trigger in _TICKET_LEDGER_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("""
+        UPDATE Tickets
+        SET amount_paid = payment,
+            payment = CASE WHEN payment >= COALESCE(total_price, 0) THEN 1 ELSE 0 END
+        WHERE payment IS NOT NULL AND payment NOT IN (0, 1)
+    """)
+    _create_ticket_ledger_triggers(conn, ticket_due_sql, ["payment", "amount_paid"])
+
+
+def _add_notifications_index(conn):
+    """
+    The notifications hot-path index, for databases that ran migration 1 while
+    it named a created_at column the Notifications table does not have.
+    """
+    create_index(conn, "idx_notifications_customer_read_sent", "Notifications", ["customer_id", "is_read", "sent_at"])
+
+
+# (version, description, function). Append new migrations at the end and never
+# renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "hot-path indexes", _add_hot_path_indexes),
+    (2, "ticket number sequence", _add_ticket_number_sequence),
+    (3, "customer full-text search", _add_customer_search_index),
+    (4, "customer balance ledger", _add_customer_ledger),
+    (5, "ticket keyset indexes", _add_ticket_keyset_indexes),
+    (6, "permission cache versions", _add_permission_cache_versions),
+    (7, "resource versions for conditional GET", _add_resource_versions),
+    (8, "change log for mobile sync", _add_change_log),
+    (9, "notification outbox", _add_notification_outbox),
+    (10, "ticket amount paid", _add_ticket_amount_paid),
+    (11, "notifications index", _add_notifications_index),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def get_schema_version(conn=None):
+    """Return the highest migration version applied to the database (0 if none)."""
+    conn = conn or get_connection()
+    _ensure_version_table(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+
+def run_migrations(conn=None):
+    """
+    Apply every migration newer than the recorded schema version.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction together with the
+    row that records it, so a failed step leaves the version untouched and two
+    processes starting at once cannot apply the same step twice.
+    """
+    conn = conn or get_connection()
+    if conn.in_transaction:
+        conn.commit()
+    _ensure_version_table(conn)
+
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            already_applied = conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+            ).fetchone()
+            if already_applied:
+                conn.rollback()
+                continue
+
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"Applied migration {version}: {name}")
+
+    return applied
+
+
+if __name__ == "__main__":
+    run_migrations()
+    print(f"Database schema is at version {get_schema_version()}.")
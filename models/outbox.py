@@ -0,0 +1,410 @@
+"""
+Transactional outbox for customer emails and push notifications.
+
+Code that changes something a customer should hear about calls enqueue_email()
+or enqueue_push() on the same connection, before its own commit, so the message
+is stored if and only if the change is, and calls wake() once that commit returns. Nothing is sent on the UI or request
+thread: a background dispatcher drains notification_outbox in batches, reusing
+one SMTP session and sending FCM messages in multicast batches, retrying
+failures with exponential backoff until MAX_ATTEMPTS.
+
+A message enqueued twice with the same dedupe_key is stored once, and identical
+messages to the same recipient that are waiting together go out once.
+
+    outbox.start_dispatcher()          # once per process (desktop app, API)
+    python -m models.outbox            # run a dispatcher on its own
+
+Transports are looked up per channel, so tests can swap in stand-ins:
+
+    dispatcher = Dispatcher(transports={"email": MemoryTransport(), "push": MemoryTransport()})
+    dispatcher.drain()
+"""
+import json
+import os
+import random
+import smtplib
+import threading
+import time
+
+from models.database import open_connection
+
+CHANNELS = ("email", "push")
+
+# Messages claimed per round trip, and the largest FCM batch (the API's limit is 500).
+BATCH_SIZE = int(os.getenv("POS_OUTBOX_BATCH_SIZE", "100"))
+FCM_BATCH_SIZE = 500
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+# A claimed message is retried by any dispatcher after this long, in case the
+# process that claimed it died mid-send.
+CLAIM_SECONDS = 300
+
+# Idle dispatchers look for work this often; wake() in the same process wakes them at once.
+POLL_SECONDS = 2.0
+
+# Sent messages are kept this long (for dedupe) and then purged.
+KEEP_SENT_DAYS = 30
+
+# Close the SMTP session after this long without mail, rather than let the server drop it.
+SMTP_IDLE_SECONDS = 60
+
+
+class PermanentError(Exception):
+    """A send that will never succeed (bad address, unregistered token); not retried."""
+
+
+_wake = threading.Event()
+
+
+def enqueue(conn, channel, recipient, subject, body, data=None, dedupe_key=None):
+    """
+    Add a message to the outbox on `conn` without committing.
+
+    Returns True if stored, False if the dedupe_key was already used or there is
+    no recipient. Call wake() after committing.
+    """
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown outbox channel: {channel}")
+    if not recipient:
+        return False
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO notification_outbox (channel, recipient, subject, body, data, dedupe_key)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (channel, recipient, subject, body, json.dumps(data) if data else None, dedupe_key),
+    )
+    return cursor.rowcount == 1
+
+
+def wake():
+    """Start this process's dispatcher on new messages now instead of at its next poll. Call after committing."""
+    _wake.set()
+
+
+def enqueue_email(conn, email, subject, body, dedupe_key=None):
+    return enqueue(conn, "email", email, subject, body, dedupe_key=dedupe_key)
+
+
+def enqueue_push(conn, fcm_token, title, body, data=None, dedupe_key=None):
+    return enqueue(conn, "push", fcm_token, title, body, data=data, dedupe_key=dedupe_key)
+
+
+def enqueue_customer_push(conn, customer_id, title, body, data=None, dedupe_key=None):
+    """Queue a push to the customer's registered device. Returns False if they have none."""
+    row = conn.execute("SELECT fcm_token FROM customers WHERE id = ?", (customer_id,)).fetchone()
+    return enqueue_push(conn, row[0] if row else None, title, body, data=data, dedupe_key=dedupe_key)
+
+
+def backoff_seconds(attempts):
+    """Delay before retry number `attempts`: doubling from BACKOFF_BASE_SECONDS, capped, with jitter."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return int(delay * random.uniform(1.0, 1.25))
+
+
+class SmtpTransport:
+    """Sends email over one SMTP session, kept open between batches."""
+
+    def __init__(self, host=None, port=None, username=None, password=None, sender=None):
+        if host is None:
+            from controllers.config import (
+                AWS_SES_USERNAME, AWS_SES_PASSWORD, AWS_SES_SMTP_SERVER,
+                AWS_SES_SMTP_PORT, AWS_SES_SENDER_EMAIL,
+            )
+            host, port = AWS_SES_SMTP_SERVER, AWS_SES_SMTP_PORT
+            username, password, sender = AWS_SES_USERNAME, AWS_SES_PASSWORD, AWS_SES_SENDER_EMAIL
+        self.host, self.port = host, port
+        self.username, self.password, self.sender = username, password, sender
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _session(self):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _build(self, message):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = message["recipient"]
+        msg['Subject'] = message["subject"] or ""
+        msg.attach(MIMEText(message["body"], 'plain'))
+        return msg.as_string()
+
+    def send_batch(self, messages):
+        results = []
+        for message in messages:
+            try:
+                try:
+                    self._session().sendmail(self.sender, [message["recipient"]], self._build(message))
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped an idle session; reconnect once
+                    self._server = None
+                    self._session().sendmail(self.sender, [message["recipient"]], self._build(message))
+                results.append(None)
+            except smtplib.SMTPRecipientsRefused as e:
+                results.append(PermanentError(str(e)))
+            except Exception as e:
+                self.close()
+                results.append(e)
+            self._last_used = time.monotonic()
+        return results
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class FcmTransport:
+    """Sends push notifications through Firebase, FCM_BATCH_SIZE messages per call."""
+
+    def send_batch(self, messages):
+        from firebase_admin import exceptions, messaging
+        import controllers.config  # noqa: F401  (initializes the Firebase app)
+
+        results = []
+        for start in range(0, len(messages), FCM_BATCH_SIZE):
+            chunk = messages[start:start + FCM_BATCH_SIZE]
+            batch = [
+                messaging.Message(
+                    notification=messaging.Notification(title=message["subject"], body=message["body"]),
+                    data=json.loads(message["data"]) if message["data"] else None,
+                    token=message["recipient"],
+                )
+                for message in chunk
+            ]
+            try:
+                response = messaging.send_each(batch)
+            except Exception as e:
+                results.extend(e for _ in chunk)
+                continue
+            for sent in response.responses:
+                if sent.success:
+                    results.append(None)
+                elif isinstance(sent.exception, (messaging.UnregisteredError, exceptions.InvalidArgumentError)):
+                    results.append(PermanentError(str(sent.exception)))
+                else:
+                    results.append(sent.exception)
+        return results
+
+    def close(self):
+        pass
+
+
+class MemoryTransport:
+    """Records messages instead of sending them. For tests and local runs without credentials."""
+
+    def __init__(self, fail=None):
+        self.sent = []
+        self.fail = fail
+
+    def send_batch(self, messages):
+        results = []
+        for message in messages:
+            error = self.fail(message) if self.fail else None
+            if error is None:
+                self.sent.append(dict(message))
+            results.append(error)
+        return results
+
+    def close(self):
+        pass
+
+
+def default_transports():
+    return {"email": SmtpTransport(), "push": FcmTransport()}
+
+
+class Dispatcher:
+    """Drains the outbox on a background thread (or synchronously with drain())."""
+
+    def __init__(self, transports=None, db_path=None):
+        self._transports = transports
+        self.db_path = db_path
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_purge = 0.0
+
+    @property
+    def transports(self):
+        if self._transports is None:
+            self._transports = default_transports()
+        return self._transports
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    def _claim(self):
+        """Take up to BATCH_SIZE due messages, so other dispatchers skip them until CLAIM_SECONDS pass."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                """
+                SELECT id, channel, recipient, subject, body, data, attempts
+                FROM notification_outbox
+                WHERE status = 'pending' AND next_attempt_at <= datetime('now')
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+                """,
+                (BATCH_SIZE,),
+            ).fetchall()
+            conn.executemany(
+                """
+                UPDATE notification_outbox
+                SET attempts = attempts + 1, next_attempt_at = datetime('now', ?)
+                WHERE id = ?
+                """,
+                [(f"+{CLAIM_SECONDS} seconds", row["id"]) for row in rows],
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return [dict(row, attempts=row["attempts"] + 1) for row in rows]
+
+    def _record(self, sent, retries, failed):
+        conn = self.conn
+        with conn:
+            conn.executemany(
+                "UPDATE notification_outbox SET status = 'sent', sent_at = datetime('now'), last_error = NULL WHERE id = ?",
+                [(message_id,) for message_id in sent],
+            )
+            conn.executemany(
+                "UPDATE notification_outbox SET next_attempt_at = datetime('now', ?), last_error = ? WHERE id = ?",
+                [(f"+{delay} seconds", error, message_id) for message_id, delay, error in retries],
+            )
+            conn.executemany(
+                "UPDATE notification_outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                [(error, message_id) for message_id, error in failed],
+            )
+
+    def dispatch_once(self):
+        """Send one claimed batch. Returns the number of messages claimed."""
+        messages = self._claim()
+        if not messages:
+            return 0
+
+        sent, retries, failed = [], [], []
+        for channel in CHANNELS:
+            pending = [message for message in messages if message["channel"] == channel]
+            if not pending:
+                continue
+
+            # Identical messages to the same recipient go out once
+            unique = {}
+            for message in pending:
+                key = (message["recipient"], message["subject"], message["body"], message["data"])
+                unique.setdefault(key, []).append(message)
+            batch = [group[0] for group in unique.values()]
+
+            try:
+                results = self.transports[channel].send_batch(batch)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for group, error in zip(unique.values(), results):
+                for message in group:
+                    if error is None:
+                        sent.append(message["id"])
+                    elif isinstance(error, PermanentError) or message["attempts"] >= MAX_ATTEMPTS:
+                        failed.append((message["id"], str(error)))
+                    else:
+                        retries.append((message["id"], backoff_seconds(message["attempts"]), str(error)))
+
+        self._record(sent, retries, failed)
+        if failed:
+            print(f"❌ Outbox: {len(failed)} message(s) failed permanently")
+        return len(messages)
+
+    def drain(self):
+        """Send batches until nothing is due. Returns the number of messages handled."""
+        handled = 0
+        while True:
+            count = self.dispatch_once()
+            handled += count
+            if count < BATCH_SIZE:
+                return handled
+
+    def purge(self, days=KEEP_SENT_DAYS):
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM notification_outbox WHERE status = 'sent' AND sent_at < datetime('now', ?)",
+                (f"-{days} days",),
+            )
+
+    def _run(self):
+        while not self._stop.is_set():
+            _wake.clear()
+            try:
+                self.drain()
+                if time.monotonic() - self._last_purge > 3600:
+                    self.purge()
+                    self._last_purge = time.monotonic()
+            except Exception as e:
+                print(f"❌ Outbox dispatcher error: {e}")
+            _wake.wait(POLL_SECONDS)
+        for transport in (self._transports or {}).values():
+            transport.close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        _wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher(transports=None):
+    """Start this process's dispatcher thread (once)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher(transports)
+        return _dispatcher.start()
+
+
+if __name__ == "__main__":
+    dispatcher = start_dispatcher()
+    print("Outbox dispatcher running, Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        dispatcher.stop()
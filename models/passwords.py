@@ -0,0 +1,101 @@
+"""
+Password hashing and verification on a bounded worker pool.
+
+bcrypt is deliberately slow (tens to hundreds of milliseconds per check) and
+releases the GIL while it works, so running it on a few dedicated threads lets
+the Flask worker and the Qt event loop carry on while a login is verified.
+At most PASSWORD_WORKERS hashes run at once and at most PASSWORD_MAX_PENDING
+may be waiting; past that submit_* raises PasswordPoolBusy instead of letting
+a login storm queue without limit. Request threads wait a few seconds for a
+free slot; the Qt dialog passes wait=0 so the click never blocks the UI.
+
+    python -m models.passwords   # login throughput at different cost factors
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# bcrypt cost factor for new hashes. Existing hashes keep the cost they were made with.
+BCRYPT_ROUNDS = int(os.getenv("POS_BCRYPT_ROUNDS", "12"))
+
+PASSWORD_WORKERS = int(os.getenv("POS_PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_MAX_PENDING = int(os.getenv("POS_PASSWORD_MAX_PENDING", str(PASSWORD_WORKERS * 8)))
+
+# How long a caller waits for a free slot by default before giving up with PasswordPoolBusy.
+SUBMIT_TIMEOUT_SECONDS = 5
+
+
+class PasswordPoolBusy(RuntimeError):
+    """Too many hashes are already queued; the caller should ask the user to retry."""
+
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+_slots = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_MAX_PENDING)
+
+
+def hash_password(password, rounds=None):
+    """Hash synchronously. Prefer submit_hash() on the UI thread or in a request."""
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, hashed):
+    """Verify synchronously. Prefer submit_check() on the UI thread or in a request."""
+    if not hashed:
+        return False
+    if isinstance(hashed, str):
+        hashed = hashed.encode('utf-8')
+    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+
+def _submit(fn, *args, wait=SUBMIT_TIMEOUT_SECONDS):
+    acquired = _slots.acquire(timeout=wait) if wait > 0 else _slots.acquire(blocking=False)
+    if not acquired:
+        raise PasswordPoolBusy("Too many logins in progress, please try again")
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def submit_check(password, hashed, wait=SUBMIT_TIMEOUT_SECONDS):
+    """
+    Verify on the pool. Returns a concurrent.futures.Future resolving to a bool.
+
+    Waits up to `wait` seconds for a free slot (0: fail at once) and then
+    raises PasswordPoolBusy.
+    """
+    return _submit(check_password, password, hashed, wait=wait)
+
+
+def submit_hash(password, rounds=None, wait=SUBMIT_TIMEOUT_SECONDS):
+    """Hash on the pool. Returns a concurrent.futures.Future resolving to the hash string."""
+    return _submit(hash_password, password, rounds, wait=wait)
+
+
+def benchmark(costs=(10, 11, 12, 13), logins=32, workers=None):
+    """Return (cost, seconds, logins per second) for `logins` concurrent checks at each cost."""
+    workers = workers or PASSWORD_WORKERS
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for cost in costs:
+            hashed = hash_password("benchmark-password", rounds=cost)
+            started = time.perf_counter()
+            list(pool.map(lambda _: check_password("benchmark-password", hashed), range(logins)))
+            elapsed = time.perf_counter() - started
+            results.append((cost, elapsed, logins / elapsed))
+    return results
+
+
+if __name__ == "__main__":
+    costs = [int(arg) for arg in sys.argv[1:]] or [10, 11, 12, 13]
+    print(f"{PASSWORD_WORKERS} worker(s), 32 logins per cost factor")
+    for cost, elapsed, rate in benchmark(costs):
+        print(f"cost {cost:>2}: {elapsed:6.2f}s  {rate:7.1f} logins/s  {1000 / rate * PASSWORD_WORKERS:7.1f} ms per login")
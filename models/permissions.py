@@ -0,0 +1,133 @@
+"""
+Cached permission checks for the desktop app and the API.
+
+Each employee's effective permissions (role permissions plus their own
+overrides, or only the overrides for the 'custom' role) are compiled once into
+an int bitset with one bit per permission id. has_permission() is then a dict
+lookup and a bit test with no database round-trip.
+
+Triggers added by migration 6 bump the 'permissions' row of cache_versions on
+any change to roles, permissions or their link tables, so edits made by
+another process are picked up within VERSION_CHECK_SECONDS. Edits made in this
+process call invalidate() and take effect immediately.
+"""
+import threading
+import time
+
+from models.database import get_connection
+
+# How often the resolver reads cache_versions to notice edits from other processes.
+VERSION_CHECK_SECONDS = 5
+
+PERMISSIONS_VERSION_KEY = "permissions"
+
+# Role whose members get only their own employee_permissions rows.
+CUSTOM_ROLE = "custom"
+
+_EMPLOYEE_PERMISSIONS_SQL = """
+    SELECT ep.permission_id
+    FROM employee_permissions ep
+    WHERE ep.employee_id = ?
+
+    UNION
+
+    SELECT rp.permission_id
+    FROM role_permissions rp
+    JOIN employee_roles er ON er.role_id = rp.role_id
+    WHERE er.employee_id = ?
+      AND NOT EXISTS (
+          SELECT 1
+          FROM employee_roles custom
+          JOIN roles r ON r.id = custom.role_id
+          WHERE custom.employee_id = er.employee_id AND r.name = ?
+      )
+"""
+
+
+class PermissionResolver:
+    """Compiles and caches one permission bitset per employee."""
+
+    def __init__(self, check_interval=VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._bit_by_name = None
+        self._name_by_bit = {}
+        self._masks = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        """Forget every compiled bitset; the next check recompiles from the database."""
+        with self._lock:
+            self._bit_by_name = None
+            self._name_by_bit = {}
+            self._masks.clear()
+            self._checked_at = 0.0
+
+    def _sync(self, conn):
+        # Called with the lock held
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval and self._bit_by_name is not None:
+            return
+        self._checked_at = now
+
+        row = conn.execute(
+            "SELECT version FROM cache_versions WHERE name = ?", (PERMISSIONS_VERSION_KEY,)
+        ).fetchone()
+        version = row[0] if row else 0
+        if version != self._version or self._bit_by_name is None:
+            self._version = version
+            self._masks.clear()
+            self._bit_by_name = {
+                name: 1 << permission_id
+                for permission_id, name in conn.execute("SELECT id, name FROM permissions")
+            }
+            self._name_by_bit = {bit: name for name, bit in self._bit_by_name.items()}
+
+    def _compiled(self, employee_id, conn):
+        """Return (mask, bit_by_name, name_by_bit), compiling the employee's mask on first use."""
+        employee_id = int(employee_id)  # the API's JWT identity is a string
+        with self._lock:
+            conn = conn or get_connection()
+            self._sync(conn)
+            mask = self._masks.get(employee_id)
+            if mask is None:
+                mask = 0
+                for (permission_id,) in conn.execute(
+                    _EMPLOYEE_PERMISSIONS_SQL, (employee_id, employee_id, CUSTOM_ROLE)
+                ):
+                    if permission_id is not None:
+                        mask |= 1 << permission_id
+                self._masks[employee_id] = mask
+            return mask, self._bit_by_name, self._name_by_bit
+
+    def mask(self, employee_id, conn=None):
+        """Return the employee's permission bitset."""
+        return self._compiled(employee_id, conn)[0]
+
+    def has_permission(self, employee_id, permission_name, conn=None):
+        mask, bit_by_name, _ = self._compiled(employee_id, conn)
+        return bool(mask & bit_by_name.get(permission_name, 0))
+
+    def permissions(self, employee_id, conn=None):
+        """Return the employee's permission names as a set."""
+        mask, _, name_by_bit = self._compiled(employee_id, conn)
+        return {name for bit, name in name_by_bit.items() if mask & bit}
+
+
+_resolver = PermissionResolver()
+
+
+def has_permission(employee_id, permission_name, conn=None):
+    """True if the employee holds the permission (through a role or directly)."""
+    return _resolver.has_permission(employee_id, permission_name, conn)
+
+
+def get_permissions(employee_id, conn=None):
+    """Names of every permission the employee holds."""
+    return _resolver.permissions(employee_id, conn)
+
+
+def invalidate():
+    """Call after editing roles or permissions so this process sees the change at once."""
+    _resolver.invalidate()
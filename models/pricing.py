@@ -0,0 +1,363 @@
+"""
+Ticket pricing.
+
+One place that turns line items into money, for the detailed ticket window,
+the payment window and bulk repricing:
+
+    line total = (variant price + its upcharges) * quantity
+    subtotal   = sum of line totals
+    discounts  = percent discounts of the subtotal, then amount discounts,
+                 never more than the subtotal
+    tax        = (subtotal - discounts) * TAX_RATE
+    total      = subtotal - discounts + tax + fees
+
+Prices come from the in-memory catalog (models/catalog.py), so pricing a draft
+or a saved ticket costs no queries beyond loading its lines.
+reprice_open_tickets() carries a price-list change into every open ticket at
+once, in SQL, by moving each affected line by the change in price. A ticket
+the engine priced is quoted again from its moved lines, tax included; any
+other total moves by as much as its lines. change_prices() applies a
+price-list change and reprices the affected tickets in one transaction:
+
+    python -m models.pricing --percent 5                 # dry-run diff
+    python -m models.pricing --set 12=8.50 14=9 --apply
+"""
+import os
+from collections import namedtuple
+
+from models import catalog
+from models.database import get_connection, transaction
+
+TAX_RATE = float(os.getenv("POS_TAX_RATE", "0.10"))
+
+# One garment line. unit_price None means "the variant's current catalog price".
+LineItem = namedtuple("LineItem", ["variant_id", "quantity", "upcharge_ids", "unit_price"], defaults=((), None))
+PricedLine = namedtuple("PricedLine", ["item", "unit_price", "upcharge_price", "total"])
+Quote = namedtuple("Quote", ["lines", "subtotal", "upcharges", "discounts", "tax", "fees", "total"])
+RepriceDiff = namedtuple("RepriceDiff", ["ticket_id", "ticket_number", "customer_id", "old_total", "new_total"])
+PriceChange = namedtuple("PriceChange", ["variant_id", "name", "old_price", "new_price"])
+
+# Ids per IN (...) list when loading lines for many tickets.
+_ID_CHUNK = 500
+
+
+def price_line(item, variants=None, upcharges=None):
+    """Price one LineItem. Upcharges are charged per piece, like the variant price."""
+    variants = variants or catalog.garment_variants()
+    upcharges = upcharges or catalog.upcharges()
+
+    unit_price = item.unit_price
+    if unit_price is None:
+        variant = variants.get(item.variant_id)
+        unit_price = variant["price"] if variant else 0
+    upcharge_price = sum(upcharges.get(upcharge_id)["price"] for upcharge_id in item.upcharge_ids if upcharges.get(upcharge_id))
+    return PricedLine(item, unit_price, upcharge_price, round((unit_price + upcharge_price) * item.quantity, 2))
+
+
+def price_lines(items):
+    """Price many LineItems against one snapshot of the catalog."""
+    variants, upcharges = catalog.garment_variants(), catalog.upcharges()
+    return [price_line(item, variants, upcharges) for item in items]
+
+
+def discount_amount(subtotal, discount_ids):
+    """
+    What the given rows of the discounts table take off a subtotal.
+
+    Percent discounts are each taken from the full subtotal (they do not
+    compound), amount discounts are then subtracted, and the result never
+    exceeds the subtotal.
+    """
+    discounts = catalog.discounts()
+    percent = amount = 0
+    for discount_id in discount_ids:
+        discount = discounts.get(discount_id)
+        if discount is None:
+            continue
+        percent += discount["percent"] or 0
+        amount += discount["amount"] or 0
+    return round(min(subtotal * percent / 100 + amount, max(subtotal, 0)), 2)
+
+
+def quote(items, discount_ids=(), fees=0, tax_rate=None):
+    """Price a ticket's line items and return a Quote with every total the screens show."""
+    tax_rate = TAX_RATE if tax_rate is None else tax_rate
+    lines = price_lines(items)
+    subtotal = round(sum(line.total for line in lines), 2)
+    upcharges = round(sum(line.upcharge_price * line.item.quantity for line in lines), 2)
+    discounts = discount_amount(subtotal, discount_ids)
+    tax, total = _tax_and_total(subtotal, discounts, fees, tax_rate)
+    return Quote(lines, subtotal, upcharges, discounts, tax, fees, total)
+
+
+def _tax_and_total(subtotal, discounts, fees, tax_rate):
+    tax = round((subtotal - discounts) * tax_rate, 2)
+    return tax, round(subtotal - discounts + tax + fees, 2)
+
+
+def ticket_items(ticket_ids, conn=None):
+    """Load the LineItems of saved tickets: {ticket_id: [LineItem, ...]}, two queries per 500 tickets."""
+    conn = conn or get_connection()
+    ticket_ids = list(ticket_ids)
+    items = {ticket_id: [] for ticket_id in ticket_ids}
+    for start in range(0, len(ticket_ids), _ID_CHUNK):
+        chunk = ticket_ids[start:start + _ID_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+
+        upcharge_ids = {}
+        for row in conn.execute(f"""
+            SELECT gu.ticket_garment_id, gu.upcharge_id
+            FROM garment_upcharges gu
+            JOIN TicketGarments tg ON tg.id = gu.ticket_garment_id
+            WHERE tg.ticket_id IN ({placeholders})
+        """, chunk):
+            upcharge_ids.setdefault(row[0], []).append(row[1])
+
+        for row in conn.execute(f"""
+            SELECT id, ticket_id, garment_variant_id, quantity
+            FROM TicketGarments
+            WHERE ticket_id IN ({placeholders})
+            ORDER BY id
+        """, chunk):
+            items[row["ticket_id"]].append(
+                LineItem(row["garment_variant_id"], row["quantity"], tuple(upcharge_ids.get(row["id"], ())))
+            )
+    return items
+
+
+def quote_ticket(ticket_id, discount_ids=(), fees=0, tax_rate=None, conn=None):
+    """Quote a saved ticket at current catalog prices."""
+    return quote(ticket_items([ticket_id], conn)[ticket_id], discount_ids, fees, tax_rate)
+
+
+def open_tickets_sql(alias):
+    """SQL condition for tickets that are neither paid nor picked up."""
+    return f"(COALESCE({alias}.payment, 0) = 0 AND COALESCE(CAST({alias}.pickedup AS INTEGER), 0) = 0)"
+
+
+def _line_deltas_cte(changes):
+    """
+    CTE `line_deltas`: how far each open-ticket line of a changed variant moves
+    (line_delta, applied to TicketGarments.price) and how far it moves its
+    ticket's charges (total_delta).
+
+    A line moves only if its stored price is still the old one. The pricing
+    engine stores a line total, (old price + upcharges) * quantity; older rows
+    always stored the bare unit price, whatever the quantity (0 meant one
+    piece). Either way the ticket is charged (new price - old price) per piece,
+    and the stored price moves by as much as it covers: every piece for a line
+    total, one for a unit price. Lines priced any other way were not priced
+    from this list, so the change is not applied to them, and neither is it to
+    tickets with no total (nothing was charged for their lines).
+    """
+    values = ", ".join("(?, ?, ?)" for _ in changes)
+    params = [value for change in changes for value in (change.variant_id, change.old_price, change.new_price)]
+    return f"""
+        WITH changes(variant_id, old_price, new_price) AS (VALUES {values}),
+        lines AS (
+            SELECT tg.id, tg.ticket_id, ROUND(tg.price, 2) AS price, tg.quantity,
+                   MAX(COALESCE(tg.quantity, 0), 1) AS pieces,
+                   c.old_price, c.new_price,
+                   (
+                       SELECT COALESCE(SUM(u.price), 0)
+                       FROM garment_upcharges gu
+                       JOIN Upcharges u ON u.id = gu.upcharge_id
+                       WHERE gu.ticket_garment_id = tg.id
+                   ) AS upcharge_price
+            FROM TicketGarments tg
+            JOIN changes c ON c.variant_id = tg.garment_variant_id
+            JOIN Tickets t ON t.id = tg.ticket_id
+            WHERE {open_tickets_sql('t')} AND COALESCE(t.total_price, 0) > 0
+        ),
+        line_deltas AS (
+            SELECT id, ticket_id, line_delta, ROUND((new_price - old_price) * pieces, 2) AS total_delta
+            FROM (
+                SELECT id, ticket_id, pieces, old_price, new_price, CASE
+                    WHEN price = ROUND((old_price + upcharge_price) * quantity, 2)
+                        THEN ROUND((new_price - old_price) * quantity, 2)
+                    WHEN price = ROUND(old_price, 2)
+                        THEN ROUND(new_price - old_price, 2)
+                END AS line_delta
+                FROM lines
+            )
+            WHERE line_delta != 0
+        )
+    """, params
+
+
+def _repriced_total(total_price, subtotal, line_delta, total_delta):
+    """
+    A ticket's total after its stored line prices move by `line_delta` and its
+    charges by `total_delta` in all.
+
+    A total that is exactly what quote() gives for the ticket's lines (tax,
+    no discounts or fees: how DraftTicket.commit() saves one) is quoted again
+    from the moved lines, so it keeps matching quote_ticket(). Any other total
+    (older tickets carried no tax) moves by `total_delta` itself.
+    """
+    subtotal = round(subtotal or 0, 2)
+    if total_price is not None and round(total_price, 2) == _tax_and_total(subtotal, 0, 0, TAX_RATE)[1]:
+        return _tax_and_total(round(subtotal + line_delta, 2), 0, 0, TAX_RATE)[1]
+    return round((total_price or 0) + total_delta, 2)
+
+
+def _reprice(conn, changes, dry_run):
+    """Apply PriceChanges to open tickets on `conn` (inside the caller's transaction). Returns the RepriceDiffs."""
+    if not changes:
+        return []
+    cte, params = _line_deltas_cte(changes)
+
+    diffs = [
+        RepriceDiff(
+            ticket_id, ticket_number, customer_id, total_price,
+            _repriced_total(total_price, subtotal, line_delta, total_delta),
+        )
+        for ticket_id, ticket_number, customer_id, total_price, subtotal, line_delta, total_delta in conn.execute(f"""
+            {cte}
+            SELECT t.id, t.ticket_number, t.customer_id, t.total_price,
+                   (SELECT SUM(tg.price) FROM TicketGarments tg WHERE tg.ticket_id = t.id),
+                   SUM(ld.line_delta), SUM(ld.total_delta)
+            FROM line_deltas ld
+            JOIN Tickets t ON t.id = ld.ticket_id
+            GROUP BY t.id
+            ORDER BY t.id
+        """, params)
+    ]
+    if dry_run or not diffs:
+        return diffs
+
+    conn.execute(f"""
+        {cte}
+        UPDATE TicketGarments SET price = ROUND(TicketGarments.price + ld.line_delta, 2)
+        FROM line_deltas ld
+        WHERE TicketGarments.id = ld.id
+    """, params)
+    conn.executemany(
+        "UPDATE Tickets SET total_price = ? WHERE id = ?",
+        [(diff.new_total, diff.ticket_id) for diff in diffs],
+    )
+    return diffs
+
+
+def reprice_open_tickets(changes, dry_run=False, conn=None):
+    """
+    Carry PriceChanges (see plan_price_changes) into the open tickets that
+    contain the changed variants.
+
+    Each affected line is charged (new price - old price) more per piece (see
+    _line_deltas_cte for lines that store a unit price). A ticket
+    saved by the pricing engine gets the total quote() gives for its moved
+    lines, tax included; any other ticket's total moves by the sum of its
+    lines' moves, so the tax, discounts and fees already in it stay as they
+    were. Set-based: one statement computes every diff and one updates
+    every TicketGarments price, and the totals are written with a single
+    executemany in one BEGIN IMMEDIATE transaction (the ledger triggers adjust
+    customer balances in the same transaction).
+
+    Returns a RepriceDiff for every ticket whose total changes. A dry run only
+    reads.
+    """
+    if dry_run:
+        return _reprice(conn or get_connection(), changes, dry_run=True)
+    with transaction(immediate=True, conn=conn) as conn:
+        return _reprice(conn, changes, dry_run=False)
+
+
+def plan_price_changes(percent=None, prices=None, variant_ids=None, conn=None):
+    """
+    Work out new GarmentVariants prices without writing anything.
+
+    Give either `prices`, a {variant_id: new_price} map, or `percent` (5 for
+    5% up, -10 for 10% down) applied to `variant_ids`, or to every variant if
+    that is None. New prices are rounded to the cent. Returns a PriceChange
+    for each variant whose price actually changes.
+    """
+    if (percent is None) == (prices is None):
+        raise ValueError("Give either a percentage or a map of new prices.")
+    conn = conn or get_connection()
+
+    if prices is not None:
+        variant_ids = list(prices)
+    where, params = "", []
+    if variant_ids is not None:
+        variant_ids = list(variant_ids)
+        if not variant_ids:
+            return []
+        where = f"WHERE id IN ({', '.join('?' for _ in variant_ids)})"
+        params = variant_ids
+
+    changes = []
+    for row in conn.execute(f"SELECT id, name, COALESCE(price, 0) FROM GarmentVariants {where} ORDER BY id", params):
+        variant_id, name, old_price = row
+        if prices is not None:
+            new_price = round(float(prices[variant_id]), 2)
+        else:
+            new_price = round(old_price * (1 + percent / 100), 2)
+        if new_price < 0:
+            raise ValueError(f"New price for {name} would be negative: {new_price:.2f}")
+        if new_price != old_price:
+            changes.append(PriceChange(variant_id, name, old_price, new_price))
+    return changes
+
+
+def change_prices(changes, reprice_tickets=True, dry_run=False, conn=None):
+    """
+    Apply PriceChanges (see plan_price_changes) and optionally reprice the open
+    tickets that contain the affected variants, in one transaction.
+
+    Returns the RepriceDiffs of the affected tickets (empty if reprice_tickets
+    is False). Repricing only needs each change's old and new price, so a dry
+    run computes exactly what applying would do without writing anything.
+    """
+    if not changes:
+        return []
+    if dry_run:
+        return reprice_open_tickets(changes, dry_run=True, conn=conn) if reprice_tickets else []
+
+    with transaction(immediate=True, conn=conn) as conn:
+        conn.executemany(
+            "UPDATE GarmentVariants SET price = ? WHERE id = ?",
+            [(change.new_price, change.variant_id) for change in changes],
+        )
+        diffs = _reprice(conn, changes, dry_run=False) if reprice_tickets else []
+
+    catalog.invalidate("garment_variants")
+    return diffs
+
+
+def format_report(changes, diffs):
+    """Plain-text summary of a price change and the tickets it reprices."""
+    lines = [f"{len(changes)} variant price(s):"]
+    lines += [f"  {c.name} (#{c.variant_id}): ${c.old_price:.2f} -> ${c.new_price:.2f}" for c in changes]
+    lines.append(f"{len(diffs)} open ticket total(s):")
+    lines += [
+        f"  Ticket {d.ticket_number} (customer {d.customer_id}): ${d.old_total or 0:.2f} -> ${d.new_total:.2f}"
+        for d in diffs
+    ]
+    lines.append(f"Change in open balances: ${sum(d.new_total - (d.old_total or 0) for d in diffs):+.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Change garment variant prices and reprice open tickets.")
+    parser.add_argument("--percent", type=float, help="Raise (or with a negative value, lower) prices by this percentage")
+    parser.add_argument("--set", nargs="*", default=None, metavar="VARIANT_ID=PRICE", help="Explicit new prices")
+    parser.add_argument("--variants", help="Comma-separated variant ids --percent applies to (default: all)")
+    parser.add_argument("--no-tickets", action="store_true", help="Only change the price list")
+    parser.add_argument("--apply", action="store_true", help="Write the changes (default is a dry run)")
+    args = parser.parse_args()
+
+    explicit = None
+    if args.set is not None:
+        explicit = {int(pair.split("=")[0]): float(pair.split("=")[1]) for pair in args.set}
+    variants = [int(v) for v in args.variants.split(",")] if args.variants else None
+    try:
+        planned = plan_price_changes(args.percent, explicit, variants)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = change_prices(planned, reprice_tickets=not args.no_tickets, dry_run=not args.apply)
+    print(format_report(planned, report))
+    print("Applied." if args.apply else "Dry run, nothing written. Add --apply to save.")
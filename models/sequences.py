@@ -0,0 +1,61 @@
+import os
+import threading
+
+from models.database import get_connection, transaction
+
+TICKET_NUMBER_SEQUENCE = "ticket_number"
+
+# How many ticket numbers a terminal reserves at a time. With the default of 1
+# numbers stay dense; a larger block means fewer write locks on busy terminals,
+# at the cost of gaps when a terminal closes with part of its block unused.
+TICKET_NUMBER_BLOCK_SIZE = max(1, int(os.getenv("POS_TICKET_NUMBER_BLOCK", "1")))
+
+
+def reserve_block(name, size=1, conn=None):
+    """
+    Reserve `size` consecutive values from a sequence and return the first one.
+
+    The increment runs under the write lock, so two terminals can never be
+    handed the same value. If the caller already has a transaction open the
+    reservation joins it and is undone if that transaction rolls back.
+    """
+    with transaction(immediate=True, conn=conn) as conn:
+        row = conn.execute("SELECT next_value FROM sequences WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise LookupError(f"Sequence '{name}' does not exist. Run models/migrations.py first.")
+        first = row[0]
+        conn.execute("UPDATE sequences SET next_value = ? WHERE name = ?", (first + size, name))
+    return first
+
+
+class BlockAllocator:
+    """Hands out values from a locally reserved block, reserving a new one when it runs out."""
+
+    def __init__(self, name, block_size=1):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next(self, conn=None):
+        conn = conn or get_connection()
+        if conn.in_transaction:
+            # The caller may still roll back, which would hand a cached block to
+            # another terminal as well, so take exactly one value inside it
+            return reserve_block(self.name, 1, conn)
+        with self._lock:
+            if self._next >= self._end:
+                self._next = reserve_block(self.name, self.block_size, conn)
+                self._end = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+
+_ticket_numbers = BlockAllocator(TICKET_NUMBER_SEQUENCE, TICKET_NUMBER_BLOCK_SIZE)
+
+
+def next_ticket_number(conn=None):
+    """Return the next ticket number for a quick or detailed ticket."""
+    return _ticket_numbers.next(conn)
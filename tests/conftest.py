@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from models import catalog  # noqa: E402
+from models.database import close_connection, get_connection  # noqa: E402
+from models.migrations import run_migrations  # noqa: E402
+from models.sequences import next_ticket_number  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """An unmigrated copy of models/pos_system.db, used as the database for the test."""
+    path = tmp_path / "pos_system.db"
+    shutil.copy(os.path.join(ROOT, "models", "pos_system.db"), path)
+    monkeypatch.setenv("POS_DB_PATH", str(path))
+    catalog.invalidate()
+    yield path
+
+    close_connection()
+    catalog.invalidate()
+
+
+@pytest.fixture
+def db(db_path):
+    """This thread's connection to a migrated copy of models/pos_system.db."""
+    conn = get_connection()
+    run_migrations(conn)
+    return conn
+
+
+@pytest.fixture
+def customer_id(db):
+    """A customer id with no tickets yet."""
+    return db.execute("SELECT COALESCE(MAX(customer_id), 0) + 1000 FROM Tickets").fetchone()[0]
+
+
+def add_ticket(conn, customer_id, total_price, ticket_type_id=1):
+    """Insert an open ticket and return its id."""
+    cursor = conn.execute(
+        "INSERT INTO Tickets (customer_id, ticket_type_id, ticket_number, total_price) VALUES (?, ?, ?, ?)",
+        (customer_id, ticket_type_id, next_ticket_number(conn), total_price),
+    )
+    conn.commit()
+    return cursor.lastrowid
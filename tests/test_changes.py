@@ -0,0 +1,26 @@
+from conftest import add_ticket
+from models.changes import changes_since, latest_cursor
+
+
+def test_customer_changes_never_carry_push_tokens_or_stripe_ids(db):
+    customer_id = db.execute("SELECT MIN(id) FROM customers").fetchone()[0]
+    since = latest_cursor(db)
+
+    db.execute(
+        "UPDATE customers SET notes = 'Starch', fcm_token = 'token-1', stripe_customer_id = 'cus_1' WHERE id = ?",
+        (customer_id,),
+    )
+    db.commit()
+    ticket_id = add_ticket(db, customer_id, 12.5)
+
+    changes, _, has_more = changes_since(db, customer_id, since)
+
+    assert not has_more
+    by_entity = {change["entity"]: change for change in changes}
+    customer = by_entity["customer"]["data"]
+    assert customer["id"] == customer_id and customer["notes"] == "Starch"
+    assert "fcm_token" not in customer
+    assert "stripe_customer_id" not in customer
+    # Other entities still come back whole
+    assert by_entity["ticket"]["data"]["id"] == ticket_id
+    assert by_entity["ticket"]["data"]["total_price"] == 12.5
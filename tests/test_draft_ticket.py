@@ -0,0 +1,126 @@
+import sqlite3
+
+import pytest
+
+from models import catalog, draft_ticket
+from models.draft_ticket import DraftTab, DraftTicket
+
+DRESS, SHIRT = 2, 4          # GarmentVariants: 10.50 and 6.00
+BLUE, RED = 3, 4             # Colors
+ARGYLE = 1                   # Patterns
+CASHMERE = 1                 # Textures
+HEAVY = 3                    # Upcharges: 2.00 per piece
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _draft(customer_id, notes=None):
+    draft = DraftTicket(customer_id, employee_id=1)
+    draft.tabs[0] = DraftTab(ticket_type_id=1, due_date="2026-10-20", notes=notes)
+    return draft
+
+
+def test_add_variant_uses_the_catalog_price(db, customer_id):
+    tab = _draft(customer_id).tab(0)
+
+    assert tab.add_variant(DRESS, 2) == 0
+    assert tab.add_variant(SHIRT, 1) == 1
+
+    dress = tab.garments[0]
+    assert (dress.name, dress.unit_price, dress.quantity) == ("Dress", 10.5, 2)
+    assert dress.price == 21.0
+    assert tab.pieces == 3
+    with pytest.raises(KeyError):
+        tab.add_variant(-1, 1)
+
+
+def test_set_quantity_reprices_the_line_and_never_drops_below_one(db, customer_id):
+    tab = _draft(customer_id).tab(0)
+    tab.add_variant(SHIRT, 1)
+
+    tab.set_quantity(0, "3")
+    assert (tab.garments[0].quantity, tab.garments[0].price) == (3, 18.0)
+
+    tab.set_quantity(0, 0)
+    assert tab.garments[0].quantity == 1
+    assert tab.pieces == 1
+
+
+def test_option_edits(db, customer_id):
+    tab = _draft(customer_id).tab(0)
+    tab.add_variant(SHIRT, 2)
+
+    tab.add_option(0, "colors", BLUE)
+    tab.add_option(0, "colors", RED)
+    tab.remove_last_option(0, "colors")
+    tab.remove_last_option(0, "patterns")  # nothing to remove
+    tab.set_options(0, "upcharges", [HEAVY])
+
+    shirt = tab.garments[0]
+    assert shirt.options == {"colors": [BLUE], "patterns": [], "textures": [], "upcharges": [HEAVY]}
+    assert shirt.option_names("colors") == catalog.colors().name(BLUE)
+    # Upcharges are charged per piece
+    assert shirt.price == 16.0
+
+
+def test_commit_writes_ticket_garments_and_options(db, customer_id):
+    draft = _draft(customer_id, notes="Press only")
+    tab = draft.tab(0)
+    tab.add_variant(DRESS, 1)
+    tab.add_variant(SHIRT, 2)
+    tab.set_options(0, "colors", [BLUE, RED])
+    tab.add_option(0, "patterns", ARGYLE)
+    tab.add_option(1, "textures", CASHMERE)
+    tab.add_option(1, "upcharges", HEAVY)
+    expected_total = tab.quote().total
+
+    ticket_id, ticket_number = draft.commit(0)
+
+    ticket = db.execute(
+        "SELECT customer_id, ticket_number, ticket_type_id, total_price, pieces, date_due, notes FROM Tickets WHERE id = ?",
+        (ticket_id,),
+    ).fetchone()
+    assert tuple(ticket) == (customer_id, ticket_number, 1, expected_total, 3, "2026-10-20", "Press only")
+
+    garments = db.execute(
+        "SELECT id, garment_variant_id, quantity, price FROM TicketGarments WHERE ticket_id = ? ORDER BY id",
+        (ticket_id,),
+    ).fetchall()
+    assert [tuple(row)[1:] for row in garments] == [(DRESS, 1, 10.5), (SHIRT, 2, 16.0)]
+    dress_id, shirt_id = garments[0]["id"], garments[1]["id"]
+
+    def links(table, column):
+        return sorted(tuple(row) for row in db.execute(
+            f"SELECT ticket_garment_id, {column} FROM {table} WHERE ticket_garment_id IN (?, ?)",
+            (dress_id, shirt_id),
+        ))
+
+    assert links("garment_colors", "color_id") == [(dress_id, BLUE), (dress_id, RED)]
+    assert links("garment_patterns", "pattern_id") == [(dress_id, ARGYLE)]
+    assert links("garment_textures", "texture_id") == [(shirt_id, CASHMERE)]
+    assert links("garment_upcharges", "upcharge_id") == [(shirt_id, HEAVY)]
+
+
+def test_commit_writes_nothing_if_an_insert_fails(db, customer_id, monkeypatch):
+    draft = _draft(customer_id)
+    tab = draft.tab(0)
+    tab.add_variant(DRESS, 1)
+    tab.add_option(0, "colors", BLUE)
+    tab.add_option(0, "textures", CASHMERE)
+    # The texture links are written after the ticket, its garments and its colors
+    monkeypatch.setitem(draft_ticket.OPTION_TABLES, "textures", ("no_such_table", "texture_id", catalog.textures))
+
+    before = {table: _count(db, table) for table in ("Tickets", "TicketGarments", "garment_colors")}
+    with pytest.raises(sqlite3.OperationalError):
+        draft.commit(0)
+
+    assert not db.in_transaction
+    assert {table: _count(db, table) for table in before} == before
+    assert db.execute("SELECT COUNT(*) FROM Tickets WHERE customer_id = ?", (customer_id,)).fetchone()[0] == 0
+
+
+def test_commit_refuses_an_empty_tab(db, customer_id):
+    with pytest.raises(ValueError):
+        _draft(customer_id).commit(0)
@@ -0,0 +1,43 @@
+from conftest import add_ticket
+from models import ledger
+from models.account import apply_payment
+
+
+def test_partial_payment_is_an_amount_not_a_paid_flag(db, customer_id):
+    ticket_id = add_ticket(db, customer_id, 10.0)
+    assert ledger.get_balance(customer_id, db) == 10.0
+
+    assert apply_payment(customer_id, 1, db) == 1.0
+
+    assert ledger.get_balance(customer_id, db) == 9.0
+    payment, amount_paid = db.execute(
+        "SELECT payment, amount_paid FROM Tickets WHERE id = ?", (ticket_id,)
+    ).fetchone()
+    assert (payment, amount_paid) == (0, 1.0)
+    assert ledger.verify(db) == []
+
+
+def test_payment_pays_oldest_tickets_first_and_sets_paid_flag(db, customer_id):
+    first = add_ticket(db, customer_id, 10.0)
+    second = add_ticket(db, customer_id, 5.0)
+
+    # More than is owed: only what the tickets still owe is applied
+    assert apply_payment(customer_id, 1, db) == 1.0
+    assert apply_payment(customer_id, 20, db) == 14.0
+
+    rows = db.execute(
+        "SELECT id, payment, amount_paid FROM Tickets WHERE id IN (?, ?) ORDER BY id", (first, second)
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [(first, 1, 10.0), (second, 1, 5.0)]
+    assert ledger.get_balance(customer_id, db) == 0.0
+    assert ledger.verify(db) == []
+
+
+def test_desktop_paid_flag_still_clears_the_ticket(db, customer_id):
+    ticket_id = add_ticket(db, customer_id, 10.0)
+
+    db.execute("UPDATE Tickets SET payment = 1 WHERE id = ?", (ticket_id,))
+    db.commit()
+
+    assert ledger.get_balance(customer_id, db) == 0.0
+    assert [row["entry_type"] for row in ledger.get_ledger(customer_id, db)] == ["charge", "payment"]
@@ -0,0 +1,27 @@
+from models import migrations
+from models.database import get_connection
+
+
+def test_every_declared_index_exists_after_migrating(db_path, monkeypatch):
+    declared = []
+    create_index = migrations.create_index
+
+    def record(conn, name, table, columns, unique=False):
+        declared.append((name, table))
+        return create_index(conn, name, table, columns, unique)
+
+    monkeypatch.setattr(migrations, "create_index", record)
+    conn = get_connection()
+    migrations.run_migrations(conn)
+
+    tables = {row[0].lower() for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    # Only indexes on tables this install lacks may be skipped; a wrong column name fails here
+    missing = [name for name, table in declared if table.lower() in tables and name not in indexes]
+    assert missing == []
+    assert "idx_notifications_customer_read_sent" in indexes
+
+
+def test_migrations_are_recorded_once(db):
+    assert migrations.get_schema_version(db) == migrations.MIGRATIONS[-1][0]
+    assert migrations.run_migrations(db) == []
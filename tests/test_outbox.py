@@ -0,0 +1,130 @@
+import pytest
+
+from models import outbox
+from models.database import transaction
+from models.outbox import Dispatcher, MemoryTransport, PermanentError
+
+
+class BatchRecorder(MemoryTransport):
+    """MemoryTransport that also records the size of each batch it is handed."""
+
+    def __init__(self, fail=None):
+        super().__init__(fail)
+        self.batches = []
+
+    def send_batch(self, messages):
+        self.batches.append(len(messages))
+        return super().send_batch(messages)
+
+
+@pytest.fixture
+def transports():
+    return {"email": BatchRecorder(), "push": BatchRecorder()}
+
+
+def _rows(conn):
+    return conn.execute(
+        "SELECT recipient, status, attempts, last_error FROM notification_outbox ORDER BY id"
+    ).fetchall()
+
+
+def test_message_is_stored_only_if_the_transaction_commits(db):
+    with pytest.raises(RuntimeError):
+        with transaction(conn=db):
+            outbox.enqueue_email(db, "a@example.com", "Ready", "Your order is ready.")
+            raise RuntimeError("business change failed")
+    assert _rows(db) == []
+
+    with transaction(conn=db):
+        outbox.enqueue_email(db, "a@example.com", "Ready", "Your order is ready.")
+    assert len(_rows(db)) == 1
+
+
+def test_dispatcher_is_woken_only_after_commit(db):
+    outbox._wake.clear()
+    with transaction(conn=db):
+        outbox.enqueue_email(db, "a@example.com", "Ready", "Your order is ready.")
+        # A dispatcher woken now would find nothing it can see yet
+        assert not outbox._wake.is_set()
+    outbox.wake()
+    assert outbox._wake.is_set()
+
+
+def test_dedupe_key_and_identical_messages_are_sent_once(db, transports):
+    assert outbox.enqueue_email(db, "a@example.com", "Ready", "Order 1", dedupe_key="ready:1")
+    assert not outbox.enqueue_email(db, "a@example.com", "Ready", "Order 1", dedupe_key="ready:1")
+    # Same message without a key, waiting alongside the first: stored, but sent once
+    assert outbox.enqueue_email(db, "a@example.com", "Ready", "Order 1")
+    assert outbox.enqueue_push(db, "token-1", "Ready", "Order 1")
+    db.commit()
+
+    assert Dispatcher(transports).drain() == 3
+
+    assert [m["recipient"] for m in transports["email"].sent] == ["a@example.com"]
+    assert [m["recipient"] for m in transports["push"].sent] == ["token-1"]
+    assert {row["status"] for row in _rows(db)} == {"sent"}
+
+
+def test_failed_send_is_retried_after_backoff(db):
+    failing = MemoryTransport(fail=lambda message: RuntimeError("SMTP unavailable"))
+    outbox.enqueue_email(db, "a@example.com", "Ready", "Order 1")
+    db.commit()
+
+    assert Dispatcher({"email": failing}).drain() == 1
+    (row,) = _rows(db)
+    assert (row["status"], row["attempts"], row["last_error"]) == ("pending", 1, "SMTP unavailable")
+    delay = db.execute(
+        "SELECT strftime('%s', next_attempt_at) - strftime('%s', 'now') FROM notification_outbox"
+    ).fetchone()[0]
+    assert outbox.BACKOFF_BASE_SECONDS - 1 <= delay <= outbox.BACKOFF_BASE_SECONDS * 1.25 + 1
+
+    # Not due yet, so a second pass leaves it alone
+    working = MemoryTransport()
+    assert Dispatcher({"email": working}).drain() == 0
+
+    db.execute("UPDATE notification_outbox SET next_attempt_at = datetime('now', '-1 second')")
+    db.commit()
+    assert Dispatcher({"email": working}).drain() == 1
+    assert len(working.sent) == 1
+    assert _rows(db)[0]["status"] == "sent"
+
+
+def test_backoff_doubles_up_to_the_cap():
+    assert outbox.BACKOFF_BASE_SECONDS <= outbox.backoff_seconds(1) <= outbox.BACKOFF_BASE_SECONDS * 1.25
+    assert 2 * outbox.BACKOFF_BASE_SECONDS <= outbox.backoff_seconds(2) <= 2.5 * outbox.BACKOFF_BASE_SECONDS
+    assert outbox.BACKOFF_MAX_SECONDS <= outbox.backoff_seconds(50) <= outbox.BACKOFF_MAX_SECONDS * 1.25
+
+
+def test_message_fails_after_max_attempts_or_a_permanent_error(db):
+    outbox.enqueue_email(db, "retry@example.com", "Ready", "Order 1")
+    outbox.enqueue_email(db, "bad@example.com", "Ready", "Order 2")
+    db.execute(
+        "UPDATE notification_outbox SET attempts = ? WHERE recipient = 'retry@example.com'",
+        (outbox.MAX_ATTEMPTS - 1,),
+    )
+    db.commit()
+
+    def fail(message):
+        if message["recipient"] == "bad@example.com":
+            return PermanentError("no such mailbox")
+        return RuntimeError("SMTP unavailable")
+
+    Dispatcher({"email": MemoryTransport(fail=fail)}).drain()
+
+    rows = {row["recipient"]: row for row in _rows(db)}
+    assert rows["retry@example.com"]["status"] == "failed"
+    assert rows["retry@example.com"]["attempts"] == outbox.MAX_ATTEMPTS
+    assert (rows["bad@example.com"]["status"], rows["bad@example.com"]["attempts"]) == ("failed", 1)
+
+
+def test_outbox_is_drained_in_batches(db, transports, monkeypatch):
+    monkeypatch.setattr(outbox, "BATCH_SIZE", 3)
+    for n in range(7):
+        outbox.enqueue_email(db, f"c{n}@example.com", "Ready", "Your order is ready.")
+    db.commit()
+
+    assert Dispatcher(transports).drain() == 7
+
+    assert transports["email"].batches == [3, 3, 1]
+    assert transports["push"].batches == []
+    assert len(transports["email"].sent) == 7
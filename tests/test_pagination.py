@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from api import pagination
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE Tickets (id INTEGER PRIMARY KEY, date_created TEXT)")
+    conn.executemany(
+        "INSERT INTO Tickets (id, date_created) VALUES (?, ?)",
+        [(1, "2024-01-02"), (2, None), (3, "2024-01-01"), (4, None), (5, "2024-01-03"), (6, "2024-01-02")],
+    )
+    return conn
+
+
+def walk(conn, order, per_page=2):
+    """Every id, page by page, following next_cursor."""
+    ids, after = [], None
+    while True:
+        page_args = {'per_page': per_page, 'page': None, 'after': after, 'order': order, 'count': 'none'}
+        rows, meta = pagination.keyset_page(conn, 'Tickets', '1=1', [], page_args)
+        ids += [row['id'] for row in rows]
+        if not meta['next_cursor']:
+            return ids
+        after = pagination.decode_cursor(meta['next_cursor'])
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_rows_without_date_are_not_skipped(conn, order):
+    expected = [row[0] for row in conn.execute(
+        f"SELECT id FROM Tickets ORDER BY date_created {order}, id {order}"
+    )]
+    for per_page in (1, 2, 4):
+        assert walk(conn, order, per_page) == expected
+
+
+def test_count_cache_is_capped(conn, monkeypatch):
+    monkeypatch.setattr(pagination, "COUNT_CACHE_MAX_ENTRIES", 3)
+    monkeypatch.setattr(pagination, "_count_cache", {})
+    for ticket_id in range(10):
+        pagination.count_rows(conn, 'Tickets', 'id > ?', [ticket_id], 'cached')
+    assert list(pagination._count_cache) == [('Tickets', 'id > ?', (ticket_id,)) for ticket_id in (7, 8, 9)]
@@ -0,0 +1,157 @@
+from conftest import add_ticket
+from models import catalog, ledger, pricing
+from models.draft_ticket import DraftTab, DraftTicket
+from models.pricing import PriceChange
+
+DRESS, SHIRT = 2, 4          # GarmentVariants: 10.50 and 6.00
+HEAVY = 3                    # Upcharges: 2.00 per piece
+
+DRESS_UP = PriceChange(DRESS, "Dress", 10.5, 11.5)
+
+
+def _draft_ticket(customer_id, lines):
+    """Save a ticket through DraftTicket (line totals with upcharges, tax in the total)."""
+    draft = DraftTicket(customer_id, employee_id=1)
+    tab = draft.tabs[0] = DraftTab(ticket_type_id=1)
+    for variant_id, quantity, upcharge_ids in lines:
+        index = tab.add_variant(variant_id, quantity)
+        tab.set_options(index, "upcharges", upcharge_ids)
+    return draft.commit(0)[0]
+
+
+def _legacy_ticket(conn, customer_id, total_price, lines):
+    """A ticket as the old screens saved it: a typed-in total and lines priced however they were."""
+    ticket_id = add_ticket(conn, customer_id, total_price)
+    conn.executemany(
+        "INSERT INTO TicketGarments (ticket_id, garment_variant_id, quantity, price) VALUES (?, ?, ?, ?)",
+        [(ticket_id, variant_id, quantity, price) for variant_id, quantity, price in lines],
+    )
+    conn.commit()
+    return ticket_id
+
+
+def _totals(conn, ticket_ids):
+    placeholders = ", ".join("?" for _ in ticket_ids)
+    return dict(conn.execute(f"SELECT id, total_price FROM Tickets WHERE id IN ({placeholders})", ticket_ids).fetchall())
+
+
+def _lines(conn, ticket_id):
+    return [row[0] for row in conn.execute("SELECT price FROM TicketGarments WHERE ticket_id = ? ORDER BY id", (ticket_id,))]
+
+
+def test_no_price_change_reprices_nothing(db, customer_id):
+    ticket_id = _legacy_ticket(db, customer_id, 50.0, [(SHIRT, 0, 6.0), (DRESS, 0, 3.5)])
+    before = db.execute("SELECT SUM(total_price) FROM Tickets").fetchone()[0]
+
+    assert pricing.reprice_open_tickets([], dry_run=True) == []
+    assert pricing.reprice_open_tickets([]) == []
+
+    assert db.execute("SELECT SUM(total_price) FROM Tickets").fetchone()[0] == before
+    assert _totals(db, [ticket_id]) == {ticket_id: 50.0}
+
+
+def test_dry_run_only_reads(db, customer_id):
+    ticket_id = _draft_ticket(customer_id, [(DRESS, 1, ())])
+
+    diffs = pricing.reprice_open_tickets([DRESS_UP], dry_run=True)
+
+    assert not db.in_transaction
+    assert [d.ticket_id for d in diffs if d.ticket_id == ticket_id] == [ticket_id]
+    assert _lines(db, ticket_id) == [10.5]
+
+
+def test_reprice_moves_only_the_changed_lines_by_the_price_difference(db, customer_id):
+    # Drafted: 2 dresses with a 2.00 upcharge (25.00) and a shirt (6.00), plus 10% tax
+    drafted = _draft_ticket(customer_id, [(DRESS, 2, (HEAVY,)), (SHIRT, 1, ())])
+    # Legacy: unit prices with quantity 0, and a total that is not the sum of its lines
+    legacy = _legacy_ticket(db, customer_id, 50.0, [(SHIRT, 0, 6.0), (DRESS, 0, 10.5)])
+    # A dress line at a price that did not come from this price list
+    hand_priced = _legacy_ticket(db, customer_id, 9.0, [(DRESS, 1, 9.0)])
+    shirts_only = _draft_ticket(customer_id, [(SHIRT, 3, ())])
+    paid = _draft_ticket(customer_id, [(DRESS, 1, ())])
+    db.execute("UPDATE Tickets SET payment = 1 WHERE id = ?", (paid,))
+    db.commit()
+    tickets = [drafted, legacy, hand_priced, shirts_only, paid]
+    before = _totals(db, tickets)
+    balance = ledger.get_balance(customer_id, db)
+
+    diffs = [d for d in pricing.reprice_open_tickets([DRESS_UP]) if d.ticket_id in tickets]
+
+    # The drafted ticket is taxed, so its 2.00 of lines is 2.20 of total; the legacy one carried no tax
+    assert [(d.ticket_id, d.old_total, d.new_total) for d in diffs] == [
+        (drafted, 34.1, 36.3),
+        (legacy, 50.0, 51.0),
+    ]
+    assert _totals(db, tickets) == {**before, drafted: 36.3, legacy: 51.0}
+    assert _lines(db, drafted) == [27.0, 6.0]
+    assert _lines(db, legacy) == [6.0, 11.5]
+    assert _lines(db, hand_priced) == [9.0]
+    assert ledger.get_balance(customer_id, db) == round(balance + 3.2, 2)
+    assert ledger.verify(db) == []
+
+
+def test_legacy_unit_price_lines_charge_the_difference_per_piece(db, customer_id):
+    # Older rows stored the unit price whatever the quantity; 0 meant one piece
+    legacy = _legacy_ticket(db, customer_id, 80.0, [(DRESS, 3, 10.5), (DRESS, 0, 10.5), (SHIRT, 2, 6.0)])
+    # The engine stores line totals: the same three dresses as one 31.50 line
+    drafted = _draft_ticket(customer_id, [(DRESS, 3, ())])
+
+    diffs = {d.ticket_id: d for d in pricing.reprice_open_tickets([DRESS_UP])}
+
+    # Three pieces and one piece at 1.00 more each, not one unit's difference per line
+    assert _lines(db, legacy) == [11.5, 11.5, 6.0]
+    assert diffs[legacy].new_total == 84.0
+    assert _lines(db, drafted) == [34.5]
+    assert diffs[drafted].new_total == 37.95
+    assert ledger.verify(db) == []
+
+
+def test_repriced_engine_ticket_matches_quote_ticket(db, customer_id):
+    drafted = _draft_ticket(customer_id, [(DRESS, 2, (HEAVY,)), (DRESS, 1, ()), (SHIRT, 3, (HEAVY,))])
+    assert _totals(db, [drafted])[drafted] == pricing.quote_ticket(drafted, conn=db).total
+
+    change = PriceChange(DRESS, "Dress", 10.5, 20.5)
+    db.execute("UPDATE GarmentVariants SET price = ? WHERE id = ?", (change.new_price, DRESS))
+    db.commit()
+    catalog.invalidate("garment_variants")
+    pricing.reprice_open_tickets([change])
+
+    assert _totals(db, [drafted])[drafted] == pricing.quote_ticket(drafted, conn=db).total
+    assert ledger.verify(db) == []
+
+
+def _variant_price(conn, variant_id):
+    return conn.execute("SELECT price FROM GarmentVariants WHERE id = ?", (variant_id,)).fetchone()[0]
+
+
+def test_change_prices_dry_run_matches_apply_and_writes_nothing(db, customer_id):
+    drafted = _draft_ticket(customer_id, [(DRESS, 1, ()), (SHIRT, 2, ())])
+    shirts_only = _draft_ticket(customer_id, [(SHIRT, 1, ())])
+    before = _totals(db, [drafted, shirts_only])
+    changes = pricing.plan_price_changes(prices={DRESS: 11.5})
+    assert changes == [DRESS_UP]
+
+    preview = pricing.change_prices(changes, dry_run=True)
+
+    assert not db.in_transaction
+    assert _variant_price(db, DRESS) == 10.5
+    assert _totals(db, [drafted, shirts_only]) == before
+
+    applied = pricing.change_prices(changes)
+
+    assert applied == preview
+    assert _variant_price(db, DRESS) == 11.5
+    assert _lines(db, drafted) == [11.5, 12.0]
+    assert _totals(db, [drafted, shirts_only]) == {drafted: round(before[drafted] + 1.1, 2), shirts_only: before[shirts_only]}
+    assert ledger.verify(db) == []
+
+
+def test_change_prices_without_repricing_leaves_tickets_alone(db, customer_id):
+    drafted = _draft_ticket(customer_id, [(DRESS, 1, ())])
+    before = _totals(db, [drafted])
+
+    assert pricing.change_prices([DRESS_UP], reprice_tickets=False) == []
+
+    assert _variant_price(db, DRESS) == 11.5
+    assert _totals(db, [drafted]) == before
+    assert _lines(db, drafted) == [10.5]
@@ -6,7 +6,7 @@ from PySide6.QtWidgets import (QAbstractItemView, QAbstractScrollArea, QCommandL
     QFrame, QGridLayout, QLabel,
     QLayout, QLineEdit, QPlainTextEdit,
     QPushButton, QSizePolicy, QStackedWidget, QTabWidget,
-    QTableWidget, QTableWidgetItem, QWidget)
+    QTableView, QWidget)
 
 class Ui_CustomerAccount2(object):
     def setupUi(self, CustomerAccount2):
@@ -161,31 +161,7 @@ class Ui_CustomerAccount2(object):
         self.tickettypebuttongrid = QGridLayout(self.gridLayoutWidget_2)
         self.tickettypebuttongrid.setObjectName(u"tickettypebuttongrid")
         self.tickettypebuttongrid.setContentsMargins(0, 0, 0, 0)
-        self.ctlist = QTableWidget(self.page1)
-        if (self.ctlist.columnCount() < 8):
-            self.ctlist.setColumnCount(8)
-        icon = QIcon()
-        icon.addFile(u":/images/Logo2.jpg", QSize(), QIcon.Mode.Normal, QIcon.State.On)
-        __qtablewidgetitem = QTableWidgetItem()
-        __qtablewidgetitem.setIcon(icon);
-        self.ctlist.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(3, __qtablewidgetitem3)
-        __qtablewidgetitem4 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(4, __qtablewidgetitem4)
-        __qtablewidgetitem5 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(5, __qtablewidgetitem5)
-        __qtablewidgetitem6 = QTableWidgetItem()
-        self.ctlist.setHorizontalHeaderItem(6, __qtablewidgetitem6)
-        font = QFont()
-        font.setBold(False)
-        __qtablewidgetitem7 = QTableWidgetItem()
-        __qtablewidgetitem7.setFont(font);
-        self.ctlist.setHorizontalHeaderItem(7, __qtablewidgetitem7)
+        self.ctlist = QTableView(self.page1)
         self.ctlist.setObjectName(u"ctlist")
         self.ctlist.setGeometry(QRect(464, 46, 995, 1040))
         sizePolicy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -326,28 +302,7 @@ class Ui_CustomerAccount2(object):
         self.tickettypebuttongrid_2.setObjectName(u"tickettypebuttongrid_2")
         self.tickettypebuttongrid_2.setSizeConstraint(QLayout.SizeConstraint.SetMinimumSize)
         self.tickettypebuttongrid_2.setContentsMargins(1, 1, 1, 1)
-        self.ctlist_2 = QTableWidget(self.page_2)
-        if (self.ctlist_2.columnCount() < 8):
-            self.ctlist_2.setColumnCount(8)
-        icon2 = QIcon()
-        icon2.addFile(u":/images/Logo2.jpg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
-        __qtablewidgetitem8 = QTableWidgetItem()
-        __qtablewidgetitem8.setIcon(icon2);
-        self.ctlist_2.setHorizontalHeaderItem(0, __qtablewidgetitem8)
-        __qtablewidgetitem9 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(1, __qtablewidgetitem9)
-        __qtablewidgetitem10 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(2, __qtablewidgetitem10)
-        __qtablewidgetitem11 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(3, __qtablewidgetitem11)
-        __qtablewidgetitem12 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(4, __qtablewidgetitem12)
-        __qtablewidgetitem13 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(5, __qtablewidgetitem13)
-        __qtablewidgetitem14 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(6, __qtablewidgetitem14)
-        __qtablewidgetitem15 = QTableWidgetItem()
-        self.ctlist_2.setHorizontalHeaderItem(7, __qtablewidgetitem15)
+        self.ctlist_2 = QTableView(self.page_2)
         self.ctlist_2.setObjectName(u"ctlist_2")
         self.ctlist_2.setGeometry(QRect(464, 46, 995, 1040))
         sizePolicy1 = QSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
@@ -472,23 +427,7 @@ class Ui_CustomerAccount2(object):
         self.pushButton_16.setText(QCoreApplication.translate("CustomerAccount2", u"Go To Customer Account 2", None))
         
         # ----------------------------
-        # Updated Header Texts for ctlist:
-        ___qtablewidgetitem = self.ctlist.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("CustomerAccount2", u"Picked/Paid", None))
-        ___qtablewidgetitem1 = self.ctlist.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("CustomerAccount2", u"Ticket Type", None))
-        ___qtablewidgetitem2 = self.ctlist.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("CustomerAccount2", u"Drop Off Date", None))
-        ___qtablewidgetitem3 = self.ctlist.horizontalHeaderItem(3)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("CustomerAccount2", u"Due Date", None))
-        ___qtablewidgetitem4 = self.ctlist.horizontalHeaderItem(4)
-        ___qtablewidgetitem4.setText(QCoreApplication.translate("CustomerAccount2", u"Ticket #", None))
-        ___qtablewidgetitem5 = self.ctlist.horizontalHeaderItem(5)
-        ___qtablewidgetitem5.setText(QCoreApplication.translate("CustomerAccount2", u"Location", None))
-        ___qtablewidgetitem6 = self.ctlist.horizontalHeaderItem(6)
-        ___qtablewidgetitem6.setText(QCoreApplication.translate("CustomerAccount2", u"Pieces", None))
-        ___qtablewidgetitem7 = self.ctlist.horizontalHeaderItem(7)
-        ___qtablewidgetitem7.setText(QCoreApplication.translate("CustomerAccount2", u"Total$", None))
+        # Header texts for ctlist come from TicketTableModel (views/tickettable.py)
         # ----------------------------
         
         self.changetodetailedticket_2.setText(QCoreApplication.translate("CustomerAccount2", u"Change to Detailed Ticket", None))
@@ -512,23 +451,7 @@ class Ui_CustomerAccount2(object):
         self.pushButton_3.setText(QCoreApplication.translate("CustomerAccount2", u"Go To Customer Account 1", None))
         
         # ----------------------------
-        # Updated Header Texts for ctlist_2:
-        ___qtablewidgetitem8 = self.ctlist_2.horizontalHeaderItem(0)
-        ___qtablewidgetitem8.setText(QCoreApplication.translate("CustomerAccount2", u"Picked/Paid", None))
-        ___qtablewidgetitem9 = self.ctlist_2.horizontalHeaderItem(1)
-        ___qtablewidgetitem9.setText(QCoreApplication.translate("CustomerAccount2", u"Ticket Type", None))
-        ___qtablewidgetitem10 = self.ctlist_2.horizontalHeaderItem(2)
-        ___qtablewidgetitem10.setText(QCoreApplication.translate("CustomerAccount2", u"Drop Off Date", None))
-        ___qtablewidgetitem11 = self.ctlist_2.horizontalHeaderItem(3)
-        ___qtablewidgetitem11.setText(QCoreApplication.translate("CustomerAccount2", u"Due Date", None))
-        ___qtablewidgetitem12 = self.ctlist_2.horizontalHeaderItem(4)
-        ___qtablewidgetitem12.setText(QCoreApplication.translate("CustomerAccount2", u"Ticket #", None))
-        ___qtablewidgetitem13 = self.ctlist_2.horizontalHeaderItem(5)
-        ___qtablewidgetitem13.setText(QCoreApplication.translate("CustomerAccount2", u"Location", None))
-        ___qtablewidgetitem14 = self.ctlist_2.horizontalHeaderItem(6)
-        ___qtablewidgetitem14.setText(QCoreApplication.translate("CustomerAccount2", u"Pieces", None))
-        ___qtablewidgetitem15 = self.ctlist_2.horizontalHeaderItem(7)
-        ___qtablewidgetitem15.setText(QCoreApplication.translate("CustomerAccount2", u"Total$", None))
+        # Header texts for ctlist_2 come from TicketTableModel (views/tickettable.py)
         # ----------------------------
         
         self.changetodetailedticket.setText(QCoreApplication.translate("CustomerAccount2", u"Change to Detailed Ticket", None))
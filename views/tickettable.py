@@ -0,0 +1,251 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPointF, QRectF, Qt
+from PySide6.QtGui import QBrush, QColor, QIcon, QPen
+from PySide6.QtWidgets import QStyledItemDelegate
+
+HEADERS = ["Picked/Paid", "Ticket Type", "Drop Off Date", "Due Date", "Ticket #", "Location", "Pieces", "Total$"]
+STATUS_COLUMN = 0
+TICKET_NUMBER_COLUMN = 4
+
+# Role used by TicketStatusDelegate to read (payment, pickedup) for a row
+StatusRole = Qt.UserRole + 1
+
+PAID_BRUSH = QBrush(QColor("#00002b"))
+SELECTED_BRUSH = QBrush(QColor(255, 0, 0))
+
+
+class TicketRow:
+    """One line of the account ticket list, kept small so thousands of rows are cheap."""
+
+    __slots__ = ("ticket_number", "is_quick", "type_name", "date_created", "due_date",
+                 "location", "pieces", "total_price", "payment", "pickedup", "quick_data")
+
+    def __init__(self, record):
+        self.ticket_number = str(record["ticket_number"])
+        self.is_quick = bool(record["is_quick"])
+        self.type_name = record["type_name"]
+        self.date_created = record["date_created"]
+        self.due_date = record["due_date"]
+        self.location = "N/A"
+        self.pieces = record["pieces"]
+        self.total_price = record["total_price"]
+        self.payment = record["payment"] or 0
+        self.pickedup = record["pickedup"] or 0
+        self.quick_data = None
+        if self.is_quick:
+            # Handed to the detailed ticket window when a quick ticket is converted
+            self.quick_data = {
+                "ticket_number": record["ticket_number"],
+                "ticket_type_id1": record["ticket_type_id"],
+                "date_created": record["date_created"],
+                "due_date1": record["due_date"],
+                "pieces1": record["pieces1"],
+                "pieces2": record["pieces2"],
+                "pieces3": record["pieces3"],
+                "converted": record["converted"],
+            }
+
+    def display(self, column):
+        if column == STATUS_COLUMN:
+            return ""  # painted by TicketStatusDelegate
+        if column == 1:
+            return self.type_name
+        if column == 2:
+            return self.date_created
+        if column == 3:
+            return self.due_date
+        if column == TICKET_NUMBER_COLUMN:
+            return self.ticket_number
+        if column == 5:
+            return self.location
+        if column == 6:
+            return str(self.pieces)
+        if column == 7:
+            return "" if self.is_quick else f"${self.total_price or 0:.2f}"
+        return None
+
+    def sort_key(self, column):
+        if column == 6:
+            return self.pieces or 0
+        if column == 7:
+            return self.total_price or 0
+        if column == TICKET_NUMBER_COLUMN:
+            return int(self.ticket_number) if self.ticket_number.isdigit() else 0
+        if column == STATUS_COLUMN:
+            return (self.payment, self.pickedup)
+        return self.display(column) or ""
+
+
+class TicketTableModel(QAbstractTableModel):
+    """
+    Ticket list for one customer page.
+
+    All rows are held as TicketRow records, but the view is only told about
+    them FETCH_BATCH at a time through canFetchMore/fetchMore. Rows are
+    indexed by ticket number so selection and status updates don't scan.
+    """
+
+    FETCH_BATCH = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._row_by_number = {}
+        self._loaded = 0
+        self._selected = set()
+        self._header_icon = QIcon(":/images/Logo2.jpg")
+
+    # Qt model API
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return row.display(index.column())
+        if role == StatusRole:
+            return (row.payment, row.pickedup)
+        if role == Qt.BackgroundRole:
+            if row.ticket_number in self._selected:
+                return SELECTED_BRUSH
+            if row.payment and not row.is_quick:
+                return PAID_BRUSH
+            return None
+        if role == Qt.UserRole and index.column() == STATUS_COLUMN:
+            return row.quick_data
+        if role == Qt.TextAlignmentRole and index.column() == STATUS_COLUMN:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return None
+        if role == Qt.DisplayRole:
+            return HEADERS[section]
+        if role == Qt.DecorationRole and section == STATUS_COLUMN:
+            return self._header_icon
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(key=lambda row: row.sort_key(column), reverse=order == Qt.DescendingOrder)
+        self._reindex()
+        self.layoutChanged.emit()
+
+    # Loading
+
+    def set_tickets(self, records):
+        """Replace the rows with query results from models.account.load_account_tickets."""
+        self.beginResetModel()
+        self._rows = [TicketRow(record) for record in records]
+        self._reindex()
+        self._loaded = min(self.FETCH_BATCH, len(self._rows))
+        self._selected.clear()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_tickets([])
+
+    def _reindex(self):
+        self._row_by_number = {row.ticket_number: position for position, row in enumerate(self._rows)}
+
+    # Lookups and updates by ticket number
+
+    def ticket(self, ticket_number):
+        position = self._row_by_number.get(str(ticket_number))
+        return None if position is None else self._rows[position]
+
+    def ticket_at(self, row):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def _row_changed(self, ticket_number):
+        position = self._row_by_number.get(str(ticket_number))
+        if position is not None and position < self._loaded:
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(HEADERS) - 1))
+
+    def update_ticket(self, ticket_number, **changes):
+        """Change fields of one row (e.g. payment=1) and repaint just that row."""
+        row = self.ticket(ticket_number)
+        if row is None:
+            return False
+        for field, value in changes.items():
+            setattr(row, field, value)
+        self._row_changed(ticket_number)
+        return True
+
+    def set_selected(self, ticket_number, selected):
+        ticket_number = str(ticket_number)
+        if selected:
+            self._selected.add(ticket_number)
+        else:
+            self._selected.discard(ticket_number)
+        self._row_changed(ticket_number)
+
+    def clear_selection(self):
+        selected, self._selected = self._selected, set()
+        for ticket_number in selected:
+            self._row_changed(ticket_number)
+
+
+class TicketStatusDelegate(QStyledItemDelegate):
+    """Paints the Picked/Paid column: a check mark when paid, a circle when picked up."""
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+
+        status = index.data(StatusRole)
+        if not status:
+            return
+        payment, pickedup = status
+        if not payment and not pickedup:
+            return
+
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        pen = QPen(option.palette.text().color())
+        pen.setWidthF(2.0)
+        painter.setPen(pen)
+
+        rect = QRectF(option.rect)
+        size = min(rect.height(), rect.width() / 2) * 0.5
+        center_y = rect.center().y()
+        marks = [mark for mark, shown in (("paid", payment), ("picked", pickedup)) if shown]
+        spacing = size * 1.5
+        x = rect.center().x() - spacing * (len(marks) - 1) / 2
+
+        for mark in marks:
+            if mark == "paid":
+                painter.drawPolyline([
+                    QPointF(x - size / 2, center_y),
+                    QPointF(x - size / 6, center_y + size / 3),
+                    QPointF(x + size / 2, center_y - size / 3),
+                ])
+            else:
+                painter.drawEllipse(QRectF(x - size / 2, center_y - size / 2, size, size))
+            x += spacing
+
+        painter.restore()
@@ -1,78 +1,30 @@
-import sqlite3
 import os
 import stripe
-import bcrypt
-import smtplib
-from firebase_admin import messaging
 from cryptography.fernet import Fernet
 from controllers.config import STRIPE_SECRET_KEY, get_db_path
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from controllers.config import (
-    AWS_SES_USERNAME,
-    AWS_SES_PASSWORD,
-    AWS_SES_SMTP_SERVER,
-    AWS_SES_SMTP_PORT,
-    AWS_SES_SENDER_EMAIL
-)
+from models.database import get_connection, transaction
+from models.sequences import next_ticket_number
+from models import outbox, passwords, permissions
 
 stripe.api_key = STRIPE_SECRET_KEY
 
 
 def get_db_connection():
-    """Establish database connection"""
-    conn = sqlite3.connect(get_db_path())
-    conn.row_factory = sqlite3.Row
-    return conn
-    
-def get_employee_permissions(employee_id):
-    """Fetch all permissions assigned to an employee's role(s)."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Return this thread's shared database connection (do not close it)."""
+    return get_connection()
 
-    cursor.execute("""
-        SELECT p.name FROM permissions p
-        JOIN role_permissions rp ON p.id = rp.permission_id
-        JOIN employee_roles er ON rp.role_id = er.role_id
-        WHERE er.employee_id = ?
-    """, (employee_id,))
-    
-    permissions = {row[0] for row in cursor.fetchall()}
-    conn.close()
-    return permissions
+
+def get_employee_permissions(employee_id):
+    """Return the names of every permission the employee holds (cached, see models/permissions.py)."""
+    return permissions.get_permissions(employee_id)
 
 def has_permission(employee_id, permission_name):
     """Check if an employee has a specific permission."""
-    permissions = get_employee_permissions(employee_id)
-    return permission_name in permissions
+    return permissions.has_permission(employee_id, permission_name)
 
 def get_next_ticket_number():
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    db_path = os.path.join(project_root, 'models', 'pos_system.db')
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Get max from Tickets
-    cursor.execute("SELECT MAX(ticket_number) FROM Tickets")
-    max_ticket_detailed = cursor.fetchone()[0]
-    if max_ticket_detailed is None:
-        max_ticket_detailed = 0
-    else:
-        max_ticket_detailed = int(max_ticket_detailed)
-
-    # Get max from quick_tickets
-    cursor.execute("SELECT MAX(ticket_number) FROM quick_tickets")
-    max_ticket_quick = cursor.fetchone()[0]
-    if max_ticket_quick is None:
-        max_ticket_quick = 0
-    else:
-        max_ticket_quick = int(max_ticket_quick)
-
-    # Whichever is larger
-    max_ticket_number = max(max_ticket_detailed, max_ticket_quick)
-    conn.close()
-    
-    return max_ticket_number + 1
+    """Return the next ticket number from the shared sequence (no table scans)."""
+    return next_ticket_number()
 
 def get_stripe_customer_id_and_email(customer_id):
     """Fetches or creates a Stripe Customer ID, ensuring the customer has an email."""
@@ -83,7 +35,6 @@ def get_stripe_customer_id_and_email(customer_id):
     result = cursor.fetchone()
 
     if not result:
-        conn.close()
         return None, None  # No customer found
 
     stripe_customer_id, first_name, last_name, email = result
@@ -94,7 +45,6 @@ def get_stripe_customer_id_and_email(customer_id):
 
     # ✅ If Stripe ID exists, return it
     if stripe_customer_id:
-        conn.close()
         return stripe_customer_id, email
 
     # 🔥 Auto-create Stripe customer if missing
@@ -104,7 +54,6 @@ def get_stripe_customer_id_and_email(customer_id):
         cursor.execute("UPDATE customers SET stripe_customer_id = ? WHERE id = ?", (stripe_customer_id, customer_id))
         conn.commit()
 
-    conn.close()
     return stripe_customer_id, email
 
 
@@ -130,12 +79,10 @@ def create_stripe_customer(customer_name, email):
 
 
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return passwords.hash_password(password)
 
 def check_password(password, hashed):
-    if isinstance(hashed, str):
-        hashed = hashed.encode('utf-8') 
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+    return passwords.check_password(password, hashed)
 
 def update_employee(conn, employee_id, display_name, phone, acting_employee_id):
     """Update employee details, restricted by role permissions."""
@@ -240,9 +187,6 @@ def add_card_to_stripe_and_save(acting_employee_id, customer_id, card_number, ex
         print(f"❌ Error adding card: {e}")
         return None
 
-    finally:
-        conn.close()
-
 
 
 def get_default_card_from_db(acting_employee_id, customer_id):
@@ -250,7 +194,7 @@ def get_default_card_from_db(acting_employee_id, customer_id):
     if not has_permission(acting_employee_id, "Credit/debit card processing"):
         raise PermissionError("Access Denied: You do not have permission to access card details.")
 
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection()
     cursor = conn.cursor()
 
     try:
@@ -270,9 +214,6 @@ def get_default_card_from_db(acting_employee_id, customer_id):
     except Exception as e:
         raise Exception(f"Error retrieving default card: {str(e)}")
 
-    finally:
-        conn.close()
-
 
 def delete_card(acting_employee_id, customer_id, last_4):
     """Remove card from Stripe and the database."""
@@ -311,9 +252,6 @@ def delete_card(acting_employee_id, customer_id, last_4):
         print(f"❌ Error deleting card: {e}")
         return None
 
-    finally:
-        conn.close()
-
 
 
 def save_card_to_database(acting_employee_id, customer_id, stripe_customer_id, stripe_card_id, last_4, exp_date, is_default):
@@ -353,77 +291,70 @@ def save_card_to_database(acting_employee_id, customer_id, stripe_customer_id, s
         print(f"❌ Error saving card: {e}")
         return None
 
-    finally:
-        conn.close()
 
+def send_email(recipient_email, subject, body, dedupe_key=None, conn=None):
+    """
+    Queue an email for the outbox dispatcher (see models/outbox.py). Returns True once queued.
 
-def send_email(recipient_email, subject, body):
-    """Send an email using Amazon SES"""
+    Pass the connection of the transaction that made the change the email is about;
+    the message is then stored only if that transaction commits, and committing it
+    (then calling outbox.wake()) is left to the caller. Without one the email is queued in its own short transaction.
+    """
     try:
-        msg = MIMEMultipart()
-        msg['From'] = AWS_SES_SENDER_EMAIL
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(AWS_SES_SMTP_SERVER, AWS_SES_SMTP_PORT)
-        server.starttls()
-        server.login(AWS_SES_USERNAME, AWS_SES_PASSWORD)
-        server.sendmail(msg['From'], msg['To'], msg.as_string())
-        server.quit()
-
-        print(f"✅ Email sent successfully to {recipient_email}")
-        return True
+        with transaction(conn=conn) as tx:
+            queued = outbox.enqueue_email(tx, recipient_email, subject, body, dedupe_key=dedupe_key)
+        if not tx.in_transaction:
+            outbox.wake()
     except Exception as e:
-        print(f"❌ Email sending error: {e}")
+        if conn is not None:
+            raise
+        print(f"❌ Email queueing error: {e}")
         return False
+    if queued:
+        print(f"✅ Email to {recipient_email} queued")
+    return bool(recipient_email)
 
-def send_firebase_notification(customer_fcm_token, title, body):
+def send_firebase_notification(customer_fcm_token, title, body, dedupe_key=None, conn=None):
     """
-    Sends a push notification to the customer's device using Firebase Cloud Messaging (FCM).
+    Queue a push notification to the customer's device for the outbox dispatcher.
     
     :param customer_fcm_token: The FCM token of the customer's device
     :param title: Notification title
     :param body: Notification body message
+    :param conn: The caller's open transaction, if the push belongs to a change it will commit (then call outbox.wake())
     """
     if not customer_fcm_token:
         print("❌ No FCM token found for customer.")
         return False
 
-    message = messaging.Message(
-        notification=messaging.Notification(
-            title=title,
-            body=body,
-        ),
-        token=customer_fcm_token,  # Customer's unique device token
-    )
-
     try:
-        response = messaging.send(message)
-        print(f"✅ Firebase Notification Sent: {response}")
+        with transaction(conn=conn) as tx:
+            outbox.enqueue_push(tx, customer_fcm_token, title, body, dedupe_key=dedupe_key)
+        if not tx.in_transaction:
+            outbox.wake()
         return True
     except Exception as e:
-        print(f"❌ Firebase Notification Failed: {e}")
+        if conn is not None:
+            raise
+        print(f"❌ Firebase Notification queueing failed: {e}")
         return False
 
 def save_customer_fcm_token(customer_id, fcm_token):
     """ Save or update a customer's Firebase Cloud Messaging (FCM) token in the database. """
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("UPDATE customers SET fcm_token = ? WHERE id = ?", (fcm_token, customer_id))
     conn.commit()
-    conn.close()
     
     print(f"✅ Saved FCM Token for Customer ID {customer_id}")
 
 def get_customer_fcm_token(customer_id):
     """ Retrieve a customer's FCM token from the database. """
-    conn = sqlite3.connect(get_db_path())
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("SELECT fcm_token FROM customers WHERE id = ?", (customer_id,))
     result = cursor.fetchone()
-    conn.close()
     
     return result[0] if result else None